@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Hand statistics for whole archives of deals, computed with numpy over every seat of every board at once.
+
+pack takes deals (dictionaries from parseurl.parse, linfile or the saved json, or model.Deals) and returns an Archive:
+    masks    deals x 4 uint64, each seat's cards in the bit layout of model.Hand; seats in the order of globals.directions
+    known    deals x 4 bool, whether the seat's hand was given
+    spots    deals x 4 x 4 uint8, small cards entered as 'x' (counted in suit lengths only)
+    boards   board numbers (0 if not given)
+
+Metrics (each an array over deals x seats, or deals x seats x suits):
+    lengths, hcp, shapes (e.g. '5-4-3-1'), longest (length of the longest suit), losers (losing trick count)
+
+columns returns them as per-board columns, summary as tables over the whole archive.
+
+    python analytics.py <file> [-o columns.csv]
+reads a .lin file, a json deal (such as <output>.json) or a file of json deals (one per line) and prints the summary.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import globals
+import json
+import linfile
+import model
+import numpy as np
+import sys
+
+from collections.abc import Iterable, Iterator
+
+
+suitShifts = np.array([13 * i for i in range(4)], dtype=np.uint64)
+suitMask = np.uint64(0x1FFF)
+
+# lookup tables indexed by the 13 bits of one suit (bit 12 is the ace, bit 0 the 2)
+holdings = np.arange(1 << 13)
+popcount13 = np.array([bin(i).count('1') for i in range(1 << 13)], dtype=np.uint8)
+hcp13 = sum(points * (holdings >> model.rankBits[rank] & 1) for rank, points in globals.honors.items()).astype(np.uint8)
+
+def suitLosers(holding: int, spots: int = 0) -> int:
+    # losing trick count of one suit (its length counts the spots entered as 'x'): a singleton loses unless it is the ace,
+    # a doubleton to each of A, K it lacks, a longer suit to each of A, K, Q it lacks
+    top = min(bin(holding).count('1') + spots, 3)
+    return top - bin(holding >> (13 - top)).count('1')
+
+# indexed by the length of the suit (3 for any longer suit) and its 13 bits
+ltc13 = np.array([[top - bin(i >> (13 - top)).count('1') for i in range(1 << 13)] for top in range(4)], dtype=np.uint8)
+
+
+class Archive:
+    def __init__(self, masks: np.ndarray, known: np.ndarray, spots: np.ndarray, boards: np.ndarray):
+        self.masks = masks
+        self.known = known
+        self.spots = spots
+        self.boards = boards
+
+    def __len__(self) -> int:
+        return len(self.boards)
+
+    def suits(self) -> np.ndarray:
+        # deals x 4 x 4: the 13 bit holding of each suit
+        return ((self.masks[:, :, None] >> suitShifts) & suitMask).astype(np.intp)
+
+    def lengths(self) -> np.ndarray:
+        return popcount13[self.suits()] + self.spots
+
+    def hcp(self) -> np.ndarray:
+        return hcp13[self.suits()].sum(axis=2, dtype=np.int16)
+
+    def losers(self) -> np.ndarray:
+        suits = self.suits()
+        return ltc13[np.minimum(popcount13[suits] + self.spots, 3), suits].sum(axis=2, dtype=np.int16)
+
+    def longest(self) -> np.ndarray:
+        return self.lengths().max(axis=2)
+
+    def shapes(self) -> np.ndarray:
+        # deals x 4 strings, longest suit first, e.g. '5-4-3-1'
+        # each distinct pattern is formatted once
+        ordered = -np.sort(-self.lengths().astype(np.int32), axis=2)
+        codes = ((ordered[:, :, 0] * 14 + ordered[:, :, 1]) * 14 + ordered[:, :, 2]) * 14 + ordered[:, :, 3]
+        patterns, inverse = np.unique(codes, return_inverse=True)
+        names = np.array([f'{code // 2744}-{code // 196 % 14}-{code // 14 % 14}-{code % 14}' for code in patterns.tolist()])
+        return names[inverse.reshape(codes.shape)]
+
+
+def pack(deals: Iterable) -> Archive:
+    masks = []
+    known = []
+    spots = []
+    boards = []
+    for deal in deals:
+        if isinstance(deal, model.Deal):
+            hands = dict([(seat.direction, seat.hand) for seat in deal.seats if seat.hand is not None])
+            boards.append(deal.boardNumber or 0)
+        else:
+            hands = dict([(seat['Direction'], model.Hand.fromDict(seat['Hand'])) for seat in deal.get('Seats', []) if 'Hand' in seat])
+            boards.append(deal.get('Board number', 0))
+        hands = [hands.get(direction) for direction in globals.directions]
+        masks.append([hand.mask if hand is not None else 0 for hand in hands])
+        known.append([hand is not None for hand in hands])
+        spots.append([hand.spots if hand is not None and hand.spots else (0, 0, 0, 0) for hand in hands])
+    return Archive(np.array(masks, dtype=np.uint64).reshape(-1, 4), np.array(known, dtype=bool).reshape(-1, 4),
+                   np.array(spots, dtype=np.uint8).reshape(-1, 4, 4), np.array(boards, dtype=np.int32))
+
+def columns(archive: Archive) -> dict[str, np.ndarray]:
+    # one column per statistic and seat, e.g. 'North HCP', plus partnership totals
+    # seats whose hands were not given are -1 (or '' for shape)
+    lengths = archive.lengths()
+    hcp = archive.hcp()
+    losers = archive.losers()
+    longest = lengths.max(axis=2)
+    shapes = archive.shapes()
+    missing = ~archive.known
+    result = { 'Board': archive.boards }
+    for seat, direction in enumerate(globals.directions):
+        result[f'{direction} HCP'] = np.where(missing[:, seat], -1, hcp[:, seat])
+        result[f'{direction} shape'] = np.where(missing[:, seat], '', shapes[:, seat])
+        result[f'{direction} longest'] = np.where(missing[:, seat], -1, longest[:, seat])
+        result[f'{direction} LTC'] = np.where(missing[:, seat], -1, losers[:, seat])
+        for suitIndex, suit in enumerate(globals.suits):
+            result[f'{direction} {suit}'] = np.where(missing[:, seat], -1, lengths[:, seat, suitIndex])
+    for partnership, seats in [('NS', [1, 3]), ('EW', [0, 2])]:
+        result[f'{partnership} HCP'] = np.where(missing[:, seats].any(axis=1), -1, hcp[:, seats].sum(axis=1))
+    return result
+
+def summary(archive: Archive) -> dict[str, dict]:
+    # tables over every seat whose hand is known:
+    #   'HCP' and 'LTC': mean, standard deviation, min and max by direction
+    #   'shape': share of hands with each pattern, most common first
+    #   'longest suit': share of hands by length of the longest suit
+    known = archive.known
+    hcp = archive.hcp()
+    losers = archive.losers()
+    result = { 'HCP': {}, 'LTC': {} }
+    for seat, direction in enumerate(globals.directions):
+        for name, values in [('HCP', hcp), ('LTC', losers)]:
+            seatValues = values[known[:, seat], seat]
+            if len(seatValues):
+                result[name][direction] = { 'mean': float(seatValues.mean()), 'std': float(seatValues.std()),
+                                            'min': int(seatValues.min()), 'max': int(seatValues.max()) }
+    total = int(known.sum())
+    for name, values in [('shape', archive.shapes()[known]), ('longest suit', archive.longest()[known])]:
+        patterns, counts = np.unique(values, return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        result[name] = dict((str(patterns[i]), float(counts[i]) / total) for i in order)
+    return result
+
+def writeCsv(table: dict[str, np.ndarray], f):
+    writer = csv.writer(f)
+    writer.writerow(table.keys())
+    writer.writerows(zip(*[column.tolist() for column in table.values()]))
+
+
+def readDeals(path: str) -> Iterator[dict]:
+    # a .lin file, a single json deal, or json deals one per line
+    with open(path, 'r') as f:
+        if path.endswith('.lin'):
+            yield from linfile.readDeals(f)
+            return
+        text = f.read()
+    try:
+        deal = json.loads(text)
+        yield from deal if isinstance(deal, list) else [deal]
+    except json.JSONDecodeError:
+        yield from (json.loads(line) for line in text.splitlines() if line.strip())
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Analytics', )
+    parser.add_argument('input', help='.lin file, json deal, or file of json deals (one per line)')
+    parser.add_argument('-o', '--output', help='csv file for the per-board columns')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    archive = pack(readDeals(args.input))
+    print(f'{len(archive)} deals')
+    for table, rows in summary(archive).items():
+        print(f'\n{table}')
+        for row, value in rows.items():
+            print(f'   {row:10} {value if isinstance(value, dict) else f"{value:.1%}"}')
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writeCsv(columns(archive), f)
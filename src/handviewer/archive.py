@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+A compact binary file of deals, read through mmap so any deal can be loaded without reading the others.
+
+    header        magic 'HVDA', version, record size, number of deals, size of the board index, offset of the records,
+                  number of strings and offset of the string table
+    board index   for each board number, the position of its first deal (0xFFFFFFFF if there is none)
+    records       one fixed size record per deal:
+                      cards           13 bytes, the seat holding each card (see model.packCards)
+                      dealer          index into globals.directions
+                      vulnerability   index into vulnerabilities
+                      seats           high 4 bits: which directions have a seat; low 4 bits: which of those have a hand
+                      order           2 bits per seat, the directions in the order of the deal's Seats
+                      claim           the tricks declarer claimed
+                      board number
+                      auction         string number of the calls, separated by spaces
+                      play            string number of the cards played, separated by spaces
+                      players         string number of each player's name, in the order of globals.directions
+    strings       offsets of each string (plus one for the end of the last), then the strings in utf-8;
+                  each distinct auction or name is stored once
+
+Missing values (no dealer, no player, ...) are stored as all bits set and left out again when the deal is read.
+Cards that no hand holds (when some hands were not given) are stored with the first seat that has no hand.
+Hands with small cards entered as 'x' cannot be stored, and keys that parseurl does not write (e.g. the Result that scoring
+adds, which can be worked out again) are not stored.
+Archives written before the play was kept (version 1) are still read, as deals with no play.
+
+    write('deals.hva', deals)
+    with Archive('deals.hva') as deals:
+        deal = deals[1234]              # the same dictionary that was written
+        deal = deals.board(12)          # the first deal with board number 12
+
+    python archive.py pack deals.hva <file>...      urls, json deals (one per line) or .lin files
+    python archive.py unpack deals.hva [-o file]    json deals, one per line
+"""
+from __future__ import annotations
+
+import globals
+import mmap
+import model
+import os
+import struct
+
+from collections.abc import Iterable, Iterator
+
+
+magic = b'HVDA'
+version = 2
+header = struct.Struct('<4sHHIIQIQ')
+record = struct.Struct('<13sBBBBBHII4I')
+# the record of each older version, and how to read it as the current one (no claim, no play)
+oldRecords = { 1: struct.Struct('<13sBBBBHI4I') }
+none = 0xFFFFFFFF
+offset = struct.Struct('<I')
+vulnerabilities = ('None', 'NS', 'EW', 'Both')
+
+
+class Strings:
+    # the string table being written: each distinct string gets the next number
+    def __init__(self):
+        self.numbers: dict[str, int] = {}
+
+    def number(self, text: str | None) -> int:
+        if text is None:
+            return none
+        return self.numbers.setdefault(text, len(self.numbers))
+
+    def table(self) -> bytes:
+        encoded = [text.encode('utf-8') for text in self.numbers]
+        offsets = [0]
+        for text in encoded:
+            offsets.append(offsets[-1] + len(text))
+        return struct.pack(f'<{len(offsets)}I', *offsets) + b''.join(encoded)
+
+
+def packDeal(deal: dict, strings: Strings) -> bytes:
+    # the record of one deal dictionary
+    seats = deal.get('Seats', [])
+    directions = [seat['Direction'] for seat in seats]
+    assert len(set(directions)) == len(directions), "A deal can have only one seat in each direction"
+    byDirection = dict([(seat['Direction'], seat) for seat in seats])
+
+    hands = [model.Hand.fromDict(byDirection[direction]['Hand']) if 'Hand' in byDirection.get(direction, {}) else None
+             for direction in globals.directions]
+    assert not any(hand is not None and hand.spots for hand in hands), "Hands with x's cannot be archived"
+    missing = [i for i, hand in enumerate(hands) if hand is None]
+    if missing:
+        held = 0
+        for hand in hands:
+            held |= hand.mask if hand is not None else 0
+        for i in missing:
+            hands[i] = model.Hand(((1 << 52) - 1) & ~held if i == missing[0] else 0)
+
+    seatBits = 0
+    order = 0
+    for position, direction in enumerate(directions):
+        index = globals.directions.index(direction)
+        seatBits |= 0x10 << index
+        if 'Hand' in byDirection[direction]:
+            seatBits |= 1 << index
+        order |= index << (2 * position)
+
+    boardNumber = deal.get('Board number')
+    assert boardNumber is None or 0 <= boardNumber < 0xFFFF, "Board numbers must be between 0 and 65534"
+    claim = deal.get('Claim')
+    assert claim is None or 0 <= claim <= 13, "A claim must be between 0 and 13 tricks"
+    auction = deal.get('Auction')
+    play = deal.get('Play')
+    return record.pack(model.packCards(hands),
+                       globals.directions.index(deal['Dealer']) if 'Dealer' in deal else 0xFF,
+                       vulnerabilities.index(deal['Vulnerability']) if 'Vulnerability' in deal else 0xFF,
+                       seatBits, order,
+                       claim if claim is not None else 0xFF,
+                       boardNumber if boardNumber is not None else 0xFFFF,
+                       strings.number(' '.join(auction) if auction is not None else None),
+                       strings.number(' '.join(play) if play is not None else None),
+                       *[strings.number(byDirection.get(direction, {}).get('Player')) for direction in globals.directions])
+
+def write(path: str, deals: Iterable[dict]) -> int:
+    # write deals to path (replacing it only once it is complete); returns the number written
+    strings = Strings()
+    records = []
+    firstOfBoard: dict[int, int] = {}
+    for deal in deals:
+        records.append(packDeal(deal, strings))
+        if deal.get('Board number') is not None:
+            firstOfBoard.setdefault(deal['Board number'], len(records) - 1)
+
+    boards = max(firstOfBoard) + 1 if firstOfBoard else 0
+    index = [none] * boards
+    for boardNumber, position in firstOfBoard.items():
+        index[boardNumber] = position
+    recordsOffset = header.size + 4 * boards
+    stringsOffset = recordsOffset + record.size * len(records)
+
+    temp = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp, 'wb') as f:
+            f.write(header.pack(magic, version, record.size, len(records), boards, recordsOffset, len(strings.numbers), stringsOffset))
+            f.write(struct.pack(f'<{boards}I', *index))
+            f.write(b''.join(records))
+            f.write(strings.table())
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.unlink(temp)
+        raise
+    return len(records)
+
+
+class Archive:
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fileMagic, fileVersion, recordSize, self.count, self.boards, self.recordsOffset, self.stringCount, self.stringsOffset = \
+            header.unpack_from(self.data, 0)
+        self.record = record if fileVersion == version else oldRecords.get(fileVersion)
+        assert fileMagic == magic and self.record is not None and recordSize == self.record.size, f"{path} is not a deal archive"
+        self.textOffset = self.stringsOffset + 4 * (self.stringCount + 1)
+        self.strings: dict[int, str] = {}
+
+    def __enter__(self) -> 'Archive':
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, n: int) -> dict:
+        if n < 0:
+            n += self.count
+        if not 0 <= n < self.count:
+            raise IndexError('deal number out of range')
+        return self.unpack(self.recordsOffset + n * self.record.size)
+
+    def __iter__(self) -> Iterator[dict]:
+        for n in range(self.count):
+            yield self.unpack(self.recordsOffset + n * self.record.size)
+
+    def board(self, boardNumber: int) -> dict | None:
+        # the first deal with this board number, or None
+        if not 0 <= boardNumber < self.boards:
+            return None
+        n = offset.unpack_from(self.data, header.size + 4 * boardNumber)[0]
+        return self[n] if n != none else None
+
+    def string(self, number: int) -> str | None:
+        # names and auctions repeat, so each string is decoded once
+        if number == none:
+            return None
+        if number not in self.strings:
+            start, end = struct.unpack_from('<2I', self.data, self.stringsOffset + 4 * number)
+            self.strings[number] = self.data[self.textOffset + start:self.textOffset + end].decode('utf-8')
+        return self.strings[number]
+
+    def unpack(self, position: int) -> dict:
+        # the dictionary of the record at position, with keys in the order parseurl writes them
+        if self.record is record:
+            cards, dealer, vulnerability, seatBits, order, claim, boardNumber, auction, play, *players = record.unpack_from(self.data, position)
+        else:
+            cards, dealer, vulnerability, seatBits, order, boardNumber, auction, *players = self.record.unpack_from(self.data, position)
+            claim, play = 0xFF, none
+        masks = model.unpackMasks(cards)
+        deal = {}
+        if boardNumber != 0xFFFF:
+            deal['Board number'] = boardNumber
+        if dealer != 0xFF:
+            deal['Dealer'] = globals.directions[dealer]
+        calls = self.string(auction)
+        if calls is not None:
+            deal['Auction'] = calls.split(' ') if calls else []
+        seats = []
+        for position in range(bin(seatBits >> 4).count('1')):
+            # as model.Seat.toDict writes it
+            index = order >> (2 * position) & 3
+            seat = {}
+            if players[index] != none:
+                seat['Player'] = self.string(players[index])
+            seat['Direction'] = globals.directions[index]
+            if seatBits & (1 << index):
+                mask = masks[index]
+                seat['Hand'] = dict(zip(globals.suits, [model.holdingString(mask >> shift & 0x1FFF) for shift in (0, 13, 26, 39)]))
+            seats.append(seat)
+        deal['Seats'] = seats
+        played = self.string(play)
+        if played is not None:
+            deal['Play'] = played.split(' ') if played else []
+        if claim != 0xFF:
+            deal['Claim'] = claim
+        if vulnerability != 0xFF:
+            deal['Vulnerability'] = vulnerabilities[vulnerability]
+        return deal
+
+
+def save(path: str, deal: dict) -> bool:
+    # write a single deal to path; if it cannot be archived, remove any older archive there and return False
+    # (saving is best-effort: ** then reads the deal from its json)
+    try:
+        write(path, [deal])
+        return True
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+
+def parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description = 'Handviewer Deal Archive', )
+    parser.add_argument('archive', help='archive file')
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help='write deals to the archive')
+    pack.add_argument('files', nargs='+', help='files of urls or json deals (one per line), or .lin files')
+    unpack = commands.add_parser('unpack', help='write the deals in the archive as json, one per line')
+    unpack.add_argument('-o', '--output', help='json file (stdout if not given)')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    import dealstore
+    import itertools
+    import json
+    import sys
+    args = parse_args(sys.argv[1:])
+    if args.command == 'pack':
+        count = write(args.archive, itertools.chain.from_iterable(map(dealstore.readDeals, args.files)))
+        print(f'{count} deals written to {args.archive}')
+    else:
+        f = open(args.output, 'w') if args.output else sys.stdout
+        with Archive(args.archive) as deals:
+            for deal in deals:
+                f.write(json.dumps(deal) + '\n')
+        if f is not sys.stdout:
+            f.close()
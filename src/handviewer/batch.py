@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+The run method of this module renders many deals in a single process.
+
+Its input is a file (or - for stdin) with one record per line. Each record is either
+    a BBO handviewer url (starting with http), or
+    a deal in the json format described in buildhtml
+Blank lines and lines starting with # are ignored.
+If the file name ends in .lin, it is read as a BBO lin file instead, one record per board (see linfile);
+if it ends in .hva, each deal of the archive is a record (see archive).
+
+Each board is written to <output>-<n>.json and <output>-<n>.html, where n is the record's position in the input,
+or, if combine is specified, all boards are written one after another to <output>.html (or to stdout if output is -)
+each board is written as soon as it is rendered, so memory use does not grow with the number of boards
+
+A record that cannot be parsed or rendered is reported on stderr and skipped; the rest of the run continues.
+
+If a store is specified, every deal rendered is also added to that dealstore database.
+
+If a cache directory is specified, urls found in it are not parsed or rendered again (see rendercache).
+
+If jobs is greater than 1, records are sent in chunks of chunksize to a pool of that many worker processes.
+Results are written in input order, so the output is the same whatever the number of jobs.
+"""
+from __future__ import annotations
+
+import buildhtml
+import functools
+import instrument
+import json
+import linfile
+import parseurl
+import sys
+import time
+
+from collections.abc import Iterator
+
+
+boardSeparator = '<br />\n'
+
+
+def readRecords(f) -> Iterator[tuple[int, str]]:
+    # yield (line number, record) for every line that holds a record
+    for lineNumber, line in enumerate(f, 1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield lineNumber, line
+
+def readLinRecords(f) -> Iterator[tuple[int, dict]]:
+    # yield (board position, tokens) for every board in a lin file
+    return enumerate(linfile.readBoards(f), 1)
+
+def parseRecord(record: str | dict) -> dict:
+    # a record is either a handviewer url, a json deal, a deal from an archive, or the tokens of one board of a lin file
+    if isinstance(record, dict):
+        return record if 'Seats' in record else parseurl.dealFromTokens(record)
+    if record.startswith('http'):
+        return parseurl.parse(record)
+    if record.startswith('{'):
+        return json.loads(record)
+    raise ValueError('Record must be a url starting with http or a json deal')
+
+def renderRecord(record: str | dict, args) -> tuple[str, str]:
+    # returns the deal as json (saved before build rotates it) and its html
+    if getattr(args, 'cache', None) and isinstance(record, str) and record.startswith('http'):
+        import rendercache
+        return rendercache.fromArgs(args).render(record, args, buildhtml.build)
+    deal = parseRecord(record)
+    saved = json.dumps(deal)
+    return saved, buildhtml.build(deal, args)
+
+def renderSafely(item: tuple[int, str | dict], args) -> tuple[int, str | None, str | None, str | None, dict | None]:
+    # runs in a worker process, so errors are returned rather than raised
+    # returns (line number, saved json, html, error message, instrument timings if enabled)
+    lineNumber, record = item
+    try:
+        saved, html = renderRecord(record, args)
+    except Exception as e:
+        instrument.count('records failed')
+        return lineNumber, None, None, f'{type(e).__name__}: {e}', instrument.take()
+    instrument.count('records rendered')
+    return lineNumber, saved, html, None, instrument.take()
+
+def renderAll(records: Iterator[tuple[int, str | dict]], args) -> Iterator[tuple[int, str | None, str | None, str | None, dict | None]]:
+    # yield the result of renderSafely for each record, in input order
+    render = functools.partial(renderSafely, args=args)
+    jobs = getattr(args, 'jobs', 1) or 1
+    if jobs <= 1:
+        yield from map(render, records)
+        return
+    
+    import multiprocessing
+    with multiprocessing.Pool(jobs, initializer=instrument.enable if instrument.enabled else None) as pool:
+        yield from pool.imap(render, records, chunksize=max(1, getattr(args, 'chunksize', 1)))
+
+def writeBoard(prefix: str, n: int, saved: str, html: str):
+    with open(f'{prefix}-{n}.json', 'w') as f:
+        f.write(saved)
+    with open(f'{prefix}-{n}.html', 'w') as f:
+        f.write(html)
+
+def run(args) -> tuple[int, int, float]:
+    # render every record in args.input
+    # returns the number of boards written, the number of records that failed, and the elapsed time in seconds
+
+    start = time.perf_counter()
+    # worker processes started by fork inherit the warm caches
+    buildhtml.prewarm()
+    isLin = args.input.endswith('.lin')
+    label = 'Board' if isLin else 'Deal' if args.input.endswith('.hva') else 'Line'
+    if args.input.endswith('.hva'):
+        import archive
+        source = archive.Archive(args.input)
+        records = enumerate(source, 1)
+    else:
+        source = sys.stdin if args.input == '-' else open(args.input, 'r')
+        records = readLinRecords(source) if isLin else readRecords(source)
+    written = failed = 0
+    store = None
+    if getattr(args, 'store', None):
+        import dealstore
+        store = dealstore.DealStore(args.store)
+    combined = None
+    if args.combine:
+        combined = instrument.timedFile(sys.stdout if args.output == '-' else open(args.output + '.html', 'w'))
+    try:
+        for n, (lineNumber, saved, html, error, timings) in enumerate(renderAll(records, args), 1):
+            instrument.merge(timings)
+            if error:
+                print(f"{label} {lineNumber}: {error}", file=sys.stderr)
+                failed += 1
+                continue
+
+            if combined:
+                if written:
+                    combined.write(boardSeparator)
+                combined.write(html)
+            else:
+                writeBoard(args.output, n, saved, html)
+            if store:
+                try:
+                    store.insert(json.loads(saved))
+                except Exception as e:
+                    # the board is written; only the store misses it
+                    print(f"{label} {lineNumber}: not stored: {type(e).__name__}: {e}", file=sys.stderr)
+            written += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if combined and args.output != '-':
+            combined.close()
+        if store:
+            store.commit()
+            store.close()
+
+    return written, failed, time.perf_counter() - start
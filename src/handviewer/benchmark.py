@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+Timings for the parse and render paths.
+
+python benchmark.py runs every benchmark and prints one line per measurement.
+Each benchmark function returns a dictionary of results so they can also be called from other scripts.
+
+The parse, formatters, build, json, play, scoring and solver benchmarks run over boards from dealgen, so the same --seed and --count
+time the same boards on every commit. To compare two commits:
+
+    python benchmark.py -o before.json
+    (check out the other commit)
+    python benchmark.py --compare before.json
+"""
+from __future__ import annotations
+
+import argparse
+import bidding
+import buildhtml
+import dealgen
+import ddsolver
+import handviewer
+import json
+import model
+import os
+import parseurl
+import platform
+import rendersession
+import replay
+import scoring
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+
+
+def best(stmt, number: int, repeat: int = 5) -> float:
+    # best time per call, in microseconds
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e6
+
+def benchTokenizer(url: str = parseurl.sampleUrl, number: int = 20) -> dict:
+    # compare the per-field regex scans with the single pass tokenizer on the same url
+    # the url is also repeated with extra annotations and card plays to show how each grows with length
+    def scans(url):
+        return (parseurl.extractBoardNumber(url), parseurl.extractHands(url),
+                parseurl.extractPlayers(url), parseurl.extractAuction(url))
+
+    def tokens(url):
+        tokens = parseurl.tokenize(url)
+        return (parseurl.boardNumberFromTokens(tokens), parseurl.handsFromTokens(tokens),
+                parseurl.playersFromTokens(tokens), parseurl.auctionFromTokens(tokens))
+
+    assert scans(url) == tokens(url), "Tokenizer and regex scans disagree"
+
+    longUrl = url + 'an|' + 'x%20' * 50 + '|' + 'pc|S2|' * 200
+    return { 'regex scans (us)': best(lambda: scans(url), number),
+             'tokenizer (us)': best(lambda: tokens(url), number * 100),
+             'regex scans, long url (us)': best(lambda: scans(longUrl), number),
+             'tokenizer, long url (us)': best(lambda: tokens(longUrl), number * 100)
+            }
+
+def allocated(build) -> int:
+    # bytes still allocated after calling build (while its result is alive)
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def benchModel(url: str = parseurl.sampleUrl, count: int = 10000) -> dict:
+    # memory for count copies of a deal, as dictionaries (each loaded from json, as an archive would be) and as model.Deals
+    saved = json.dumps(parseurl.parse(url))
+    dicts = allocated(lambda: [json.loads(saved) for i in range(count)])
+    deals = allocated(lambda: [model.Deal.fromDict(json.loads(saved)) for i in range(count)])
+    cards = allocated(lambda: [model.Deal.fromDict(json.loads(saved)).packCards() for i in range(count)])
+    return { 'dict (bytes/deal)': dicts / count,
+             'model.Deal (bytes/deal)': deals / count,
+             'packed cards (bytes/deal)': cards / count
+            }
+
+def benchRender(url: str = parseurl.sampleUrl, number: int = 2000) -> dict:
+    # per-deal render time of buildhtml.build for a few common option sets
+    saved = json.dumps(parseurl.parse(url))
+    results = {}
+    for options in ['-nesa', '-nsa', '-s', '-a']:
+        args = handviewer.parse_args(['x', options])
+        # build rotates the deal it is given, so each call gets its own copy
+        deals = [json.loads(saved) for i in range(number * 5)]
+        results[f'build {options} (us)'] = best(lambda: buildhtml.build(deals.pop(), args), number)
+    auction = parseurl.parse(url)['Auction']
+    results['formatCall, whole auction (us)'] = best(lambda: [buildhtml.formatCall(call) for call in auction], number)
+    return results
+
+def benchSession(url: str = parseurl.sampleUrl, number: int = 20) -> dict:
+    # every one of the 15 non-empty sets of seats, with the auction, at each of 4 rotations, for one board
+    views = []
+    for seats in range(1, 16):
+        flags = ''.join(flag for i, flag in enumerate('nesw') if seats >> i & 1)
+        views += [handviewer.parse_args(['x', '-' + flags + 'a', '-r', str(rotate)]) for rotate in range(4)]
+    saved = json.dumps(parseurl.parse(url))
+    deal = json.loads(saved)
+
+    def copies():
+        # buildhtml.build rotates the deal, so it needs a fresh copy for each view
+        return [buildhtml.build(json.loads(saved), args) for args in views]
+
+    def session():
+        session = rendersession.RenderSession(deal)
+        return [session.build(args) for args in views]
+
+    assert copies() == session(), "RenderSession and build disagree"
+    return { 'build, 60 views (us)': best(copies, number),
+             'RenderSession, 60 views (us)': best(session, number)
+            }
+
+def perItem(f, items: list, repeat: int = 5) -> float:
+    # best time of f over every item, in microseconds per item
+    return best(lambda: [f(item) for item in items], 1, repeat) / len(items)
+
+def generated(count: int, seed: int) -> dict[str, list[str]]:
+    # urls from dealgen: plain (no annotations or play), annotated (every call), played (all 52 cards), and heavy (both)
+    return { 'plain': list(dealgen.urls(count, seed, annotate=0, played=0)),
+             'annotated': list(dealgen.urls(count, seed, annotate=1.0, played=0)),
+             'played': list(dealgen.urls(count, seed, annotate=0, played=52)),
+             'heavy': list(dealgen.urls(count, seed, annotate=1.0, played=52))
+            }
+
+def benchParse(urls: dict[str, list[str]]) -> dict:
+    results = {}
+    for kind, kindUrls in urls.items():
+        results[f'parse, {kind} (us)'] = perItem(parseurl.parse, kindUrls)
+        results[f'url length, {kind} (chars)'] = sum(map(len, kindUrls)) / len(kindUrls)
+    return results
+
+def benchFormatters(deals: list[dict]) -> dict:
+    # each buildhtml formatter, per call, with its caches as they are after a while (prewarmed and filled by the first repeat)
+    buildhtml.prewarm()
+    args = handviewer.parse_args(['x', '-nesw'])
+    seats = [seat for deal in deals for seat in deal['Seats']]
+    hands = [seat['Hand'] for seat in seats]
+    holdings = [holding for hand in hands for holding in hand.values()]
+    calls = [call for deal in deals for call in deal['Auction']]
+    return { 'formatSuit (us)': perItem(buildhtml.formatSuit, holdings),
+             'formatHand (us)': perItem(buildhtml.formatHand, hands),
+             'formatHandDiagram (us)': perItem(buildhtml.formatHandDiagram, seats),
+             'formatHandBody (us)': perItem(buildhtml.formatHandBody, seats),
+             'formatCall (us)': perItem(buildhtml.formatCall, calls),
+             'formatCallList (us)': perItem(lambda deal: buildhtml.formatCallList(deal['Auction']), deals),
+             'formatAuctionCalls (us)': perItem(lambda deal: buildhtml.formatAuctionCalls(deal['Auction'], deal['Dealer']), deals),
+             'formatAuctionHeader (us)': perItem(buildhtml.formatAuctionHeader, deals),
+             'buildHandTable (us)': perItem(lambda deal: buildhtml.buildHandTable(deal, args), deals),
+             'buildAuctionTable (us)': perItem(buildhtml.buildAuctionTable, deals),
+             'formatHand, cold caches (us)': best(lambda: (buildhtml.clearCaches(), [buildhtml.formatHand(hand) for hand in hands]), 1) / len(hands)
+            }
+
+def benchBuild(urls: list[str]) -> dict:
+    # url to html, and a parsed deal to html, for a few common option sets
+    results = {}
+    deals = [parseurl.parse(url) for url in urls]
+    for options in ['-nesa', '-sa', '-s']:
+        args = handviewer.parse_args(['x', options])
+        results[f'build {options} (us)'] = perItem(lambda deal: buildhtml.build(deal, args), deals)
+    args = handviewer.parse_args(['x', '-nesa'])
+    results['url to html -nesa (us)'] = perItem(lambda url: buildhtml.build(parseurl.parse(url), args), urls)
+    return results
+
+def benchJson(deals: list[dict]) -> dict:
+    # saving and loading deals as handviewer and batch do (the ** reload path)
+    saved = [json.dumps(deal) for deal in deals]
+    return { 'json save (us)': perItem(json.dumps, deals),
+             'json load (us)': perItem(json.loads, saved),
+             'json size (bytes)': sum(map(len, saved)) / len(saved)
+            }
+
+def benchPlay(urls: list[str]) -> dict:
+    # replaying every card of each deal, and the view of each trick (as -p builds them for a whole session)
+    deals = [parseurl.parse(url) for url in urls]
+    played = [replay.Replay(deal) for deal in deals]
+    args = handviewer.parse_args(['x', '-nesw'])
+    views = perItem(lambda p: ''.join(buildhtml.trickViews(p, args)), played)
+    tricks = sum(len(p.tricks) for p in played)
+    buildArgs = handviewer.parse_args(['x', '-nesap'])
+    return { 'replay (us)': perItem(replay.Replay, deals),
+             'trick views (us)': views,
+             'trick view, per trick (us)': views * len(played) / tricks,
+             'build -nesap (us)': perItem(lambda deal: buildhtml.build(deal, buildArgs), deals)
+            }
+
+def benchScoring(urls: list[str]) -> dict:
+    # the auction's facts, a deal's result (auction, play and score), and a whole session's travellers
+    deals = [parseurl.parse(url) for url in urls]
+    return { 'analyze auction (us)': perItem(lambda deal: bidding.analyze(deal['Auction'], deal['Dealer']), deals),
+             'result (us)': perItem(scoring.result, deals),
+             'scoreSession, per deal (us)': best(lambda: scoring.scoreSession([dict(deal) for deal in deals]), 1) / len(deals)
+            }
+
+def ending(url: str, tricks: int) -> tuple:
+    # the hands of a generated board (as ddsolver.handMasks) after its first tricks have been played
+    hands = list(ddsolver.handMasks(parseurl.parse(url)))
+    played = 0
+    for card in parseurl.tokenize(url).get('pc', [])[:4 * tricks]:
+        played |= 1 << (13 * 'SHDC'.index(card[0].upper()) + model.rankBits[card[1].upper()])
+    return tuple(hand & ~played for hand in hands)
+
+def benchSolver(urls: list[str], count: int = 3, left: list[int] = [5, 7, 9]) -> dict:
+    # the whole trick table (every strain and declarer) of the first count boards as dealt, by libdds where it is
+    # installed (see ddsolver.library) and otherwise by the python solver, which takes minutes a deal, so only the first is timed;
+    # then by the python solver with left cards in each hand
+    results = {}
+    backend = 'libdds' if ddsolver.library() is not None else 'python'
+    deals = [parseurl.parse(url) for url in urls[:count if backend == 'libdds' else 1]]
+    start = time.perf_counter()
+    for deal in deals:
+        ddsolver.trickTable(deal)
+    results[f'solve, full deal, {backend} (ms)'] = (time.perf_counter() - start) / len(deals) * 1000
+    for cards in left:
+        endings = [ending(url, 13 - cards) for url in urls[:count]]
+        nodes = 0
+        start = time.perf_counter()
+        for hands in endings:
+            for strain in ddsolver.strains:
+                solver = ddsolver.Solver(ddsolver.trumps[strain])
+                for leader in range(4):
+                    solver.tricks(hands, leader)
+                nodes += solver.nodes
+        results[f'solve, {cards} cards left (ms)'] = (time.perf_counter() - start) / len(endings) * 1000
+        results[f'nodes, {cards} cards left'] = nodes / len(endings)
+    return results
+
+startupBudget = 30.0   # milliseconds of imports for handviewer.py to render one url
+
+def importTime(argv: list[str], cwd: str) -> float:
+    # milliseconds python spends importing modules to run argv, beyond what it imports to start up at all
+    # bytecode is written by a first run, so the later runs load it as an installed copy would
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    def imports(argv):
+        stderr = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=cwd, env=env, capture_output=True, text=True).stderr
+        # top level imports only (their cumulative times include the modules they import)
+        return sum(int(line.split('|')[1]) for line in stderr.splitlines()
+                   if line.startswith('import time:') and line.split('|')[2].startswith(' ') and not line.split('|')[2].startswith('  ')
+                   and line.split('|')[1].strip().isdigit()) / 1000
+    imports(argv)
+    return min(imports(argv) for i in range(5)) - min(imports(['-c', 'pass']) for i in range(5))
+
+def benchStartup(url: str = parseurl.sampleUrl, budget: float = startupBudget) -> dict:
+    # cold start of the command line tool, for --help, one url, and ** (the deal saved by the previous run)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'handviewer.py')
+    with tempfile.TemporaryDirectory() as directory:
+        results = { 'imports, --help (ms)': importTime([script, '--help'], directory),
+                    'imports, one url (ms)': importTime([script, url, '-nesa', '-o', 'startup'], directory),
+                    'imports, ** (ms)': importTime([script, '**', '-nesa', '-o', 'startup'], directory) }
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, url, '-nesa', '-o', 'startup'], cwd=directory, capture_output=True)
+        results['run, one url (ms)'] = (time.perf_counter() - start) * 1000
+    results['budget (ms)'] = budget
+    return results
+
+def overBudget(results: dict) -> bool:
+    # whether any import time in the results of benchStartup exceeds its budget
+    measures = results.get('startup', {})
+    return any(value > measures['budget (ms)'] for measure, value in measures.items() if measure.startswith('imports'))
+
+def commit() -> str:
+    # the git commit being measured, if there is one
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def runAll(count: int, seed: int, only: list[str] = None) -> dict:
+    # every benchmark (or those named in only), as { benchmark: { measure: value } }
+    urls = generated(count, seed)
+    heavy = urls['heavy']
+    deals = [parseurl.parse(url) for url in heavy]
+    benches = [('tokenizer', benchTokenizer), ('model', benchModel), ('render', benchRender), ('session', benchSession),
+               ('parse', lambda: benchParse(urls)), ('formatters', lambda: benchFormatters(deals)),
+               ('build', lambda: benchBuild(heavy)), ('json', lambda: benchJson(deals)),
+               ('play', lambda: benchPlay(heavy)), ('scoring', lambda: benchScoring(heavy)), ('solver', lambda: benchSolver(heavy)),
+               ('startup', benchStartup)]
+    return dict([(name, bench()) for name, bench in benches if not only or name in only])
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Benchmarks', )
+    parser.add_argument('--only', nargs='+', help='benchmarks to run (tokenizer, model, render, session, parse, formatters, build, json, play, scoring, solver, startup)')
+    parser.add_argument('--count', type=int, default=200, help='number of generated boards')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated boards')
+    parser.add_argument('-o', '--output', help='json file to write the results to')
+    parser.add_argument('--compare', help='json file of earlier results to compare with')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    results = runAll(args.count, args.seed, args.only)
+    earlier = {}
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            earlier = json.load(f)['results']
+    for name, measures in results.items():
+        for measure, value in measures.items():
+            line = f'{name:12} {measure:32} {value:10.1f}'
+            if measure in earlier.get(name, {}):
+                line += f' {earlier[name][measure]:10.1f} {value / earlier[name][measure] if earlier[name][measure] else 0:6.2f}x'
+            print(line)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({ 'commit': commit(), 'time': time.time(), 'python': platform.python_version(),
+                        'count': args.count, 'seed': args.seed, 'results': results }, f, indent=1)
+    if overBudget(results):
+        print(f'handviewer.py imports take longer than the {startupBudget} ms budget', file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+The facts of an auction, found in one pass over its calls: the final contract, the declarer, whether it was doubled
+or redoubled, and whether the auction is over.
+
+    contract = bidding.analyze(['1N', 'P', '3N', 'D', 'P', 'P', 'P'], 'North')
+    contract.level, contract.strain, contract.doubled       3, 'N', 'X'        (0, None, '' if nobody bid)
+    contract.declarer                                       'North'            (None if nobody bid)
+    contract.complete                                       True once three passes follow a bid, or four passes open it
+    contract.name()                                         '3NX' ('P' if nobody bid)
+
+Calls are written as parseurl writes them: '1C' to '7N', 'P', 'D' and 'R'.
+Each call is checked as it is read: a bid must be higher than the one before it, a double needs an undoubled bid
+by the other side, a redouble needs a double of one's own side's bid, and nothing may follow the end of the auction.
+An illegal call raises AssertionError, naming the call and its position.
+
+The declarer is the first player of the declaring side to name the final strain.
+An auction with no dealer is read as if West dealt (as buildhtml lays it out).
+"""
+from __future__ import annotations
+
+import globals
+
+from collections.abc import Iterable
+
+
+strains = 'CDHSN'
+
+
+class Contract:
+    __slots__ = ('level', 'strain', 'doubled', 'declarer', 'complete')
+
+    def __init__(self, level: int = 0, strain: str | None = None, doubled: str = '', declarer: str | None = None,
+                 complete: bool = False):
+        self.level = level
+        self.strain = strain
+        self.doubled = doubled
+        self.declarer = declarer
+        self.complete = complete
+
+    def name(self) -> str:
+        # e.g. '4HX', or 'P' if nobody bid
+        return f'{self.level}{self.strain}{self.doubled}' if self.level else 'P'
+
+    def __repr__(self) -> str:
+        return f'Contract({self.name()}, {self.declarer}, complete={self.complete})'
+
+
+def analyze(calls: Iterable[str], dealer: str | None) -> Contract:
+    seat = globals.directions.index(dealer) if dealer in globals.directions else 0
+    contract = Contract()
+    # the rank of the last bid (level * 5 + strain), the side that made it, and who first named each strain for each side
+    highest = -1
+    bidder = None
+    firstToName: dict[tuple[int, str], str] = {}
+    passes = 0
+    for position, call in enumerate(calls, 1):
+        assert not contract.complete, f"Call {position}: {call} comes after the end of the auction"
+        direction = globals.directions[seat % 4]
+        side = seat % 2
+        if call == 'P':
+            passes += 1
+        elif call == 'D':
+            assert bidder is not None and bidder != side and not contract.doubled, f"Call {position}: {direction} cannot double"
+            contract.doubled = 'X'
+            passes = 0
+        elif call == 'R':
+            assert bidder == side and contract.doubled == 'X', f"Call {position}: {direction} cannot redouble"
+            contract.doubled = 'XX'
+            passes = 0
+        else:
+            assert len(call) == 2 and call[0] in '1234567' and call[1] in strains, f"Call {position}: {call} is not a call"
+            rank = int(call[0]) * 5 + strains.index(call[1])
+            assert rank > highest, f"Call {position}: {call} is not higher than {contract.name()}"
+            highest, bidder = rank, side
+            contract.level, contract.strain, contract.doubled = int(call[0]), call[1], ''
+            contract.declarer = firstToName.setdefault((side, call[1]), direction)
+            passes = 0
+        contract.complete = passes == (3 if bidder is not None else 4)
+        seat += 1
+    return contract
+
+def finalContract(calls: Iterable[str], dealer: str | None) -> tuple[str, str | None]:
+    # the contract ('3N', '4SX', '2HXX', or 'P' if passed out) and the direction of the declarer
+    contract = analyze(calls, dealer)
+    return contract.name(), contract.declarer
@@ -27,20 +27,43 @@ The build method of this module takes as input a dictionary describing a deal in
     if it contains more than one of SWNE, all the specified hands are formatted in a diagram
     
     if in contains A, the auction is formatted below the diagram
+
+    if tricks is specified, the double dummy tricks of each declarer in each strain and par (see ddsolver)
+    are formatted below the diagram, before the auction; every hand must be given in full
     
+    if play is specified, a view of each trick of the play (see replay) follows: the hands still to be played,
+    the cards of the trick (the winning card in bold) and the tricks each side has won
+
     if r is specified, the deal is shifted clockwise that number of positions (and directions are reassigned before formatting)
+
+    the deal may also be a model.Deal, which is left unchanged
+
+    the fixed parts of each table are prepared once, as templates, when the module is imported,
+    and build joins the pieces of the page once
+
+    buildChunks yields the page a table section at a time, and writeDeals writes the html for many deals
+    to a file object (a file, a pipe, a socket) without holding more than one deal's html in memory
+
+    formatCall, formatSuit, formatHand and formatCard remember what they have formatted in bounded (least recently used) caches;
+    cacheInfo reports their sizes, hits and misses and clearCaches empties them.
+    prewarm formats every call ahead of time; long runs (batch, the server, the watcher) call it, so importing this module costs nothing extra
 """
+from __future__ import annotations
+
+import functools
 import globals
+import model
 
-from typing import Dict, List
+from collections.abc import Iterable, Iterator
 
 
-globals.initialize()
 pips = { 'S': '&#9824;', 
         'H': '<span style="color: rgb(192, 22, 22);">&#9829;</span>',
         'D': '<span style="color: rgb(192, 22, 22);">&#9830;</span>',
         'C': '&#9827;'
         }
+# what formatHand puts before each suit, in the order of globals.suits
+suitPrefixes = [pip + ' ' for pip in pips.values()]
 
 
 def shift(direction: str, n: int) -> str:
@@ -53,14 +76,22 @@ def rotateDeal(deal: dict, n: int) -> dict:
     deal["Dealer"] = shift(deal["Dealer"], n)
     for seat in deal['Seats']:
         seat["Direction"] = shift(seat["Direction"], n)
+    # the vulnerable side moves with its hands
+    if n % 2 and "Vulnerability" in deal:
+        deal["Vulnerability"] = rotateVulnerability(deal["Vulnerability"], n)
     return deal
+
+def rotateVulnerability(vulnerability: str, n: int) -> str:
+    # 'NS' and 'EW' change places when the deal is rotated an odd number of seats
+    return { 'NS': 'EW', 'EW': 'NS' }.get(vulnerability, vulnerability) if n % 2 else vulnerability
     
+@functools.lru_cache(maxsize=4096)
 def formatSuit(suit: str) -> str:
     # input: 'AJT6'
     # output: ' A J 10 6'
     return ' '.join(suit).replace('T','10') or '--'
 
-def formatHand(hand: Dict[str, str], withBreaks: bool = True) -> str:
+def formatHand(hand: dict[str, str], withBreaks: bool = True) -> str:
     # convert dictionary of holdings by suit into an html string displaying the hand
     # input:  {'Spades': 'T5', 'Hearts': 'AJ7', 'Diamonds': 'KQJ2', 'Clubs': 'AJT6'}
     # output: 
@@ -69,8 +100,13 @@ def formatHand(hand: Dict[str, str], withBreaks: bool = True) -> str:
     #     <span style="color: rgb(192, 22, 22);">&#9830;</span> K Q J 2<br />
     #     &#9827; A J 10 6<br />'
 
+    return formatHolding(tuple([hand[suit] for suit in globals.suits]), withBreaks)
+
+@functools.lru_cache(maxsize=2048)
+def formatHolding(holding: tuple[str, str, str, str], withBreaks: bool) -> str:
+    # formatHand for a hand given as a tuple of suits, in the order of globals.suits, so it can be cached
     br = '<br />\n' if withBreaks else '&nbsp;&nbsp;'
-    suitStr = [pip + ' ' + formatSuit(hand[suit]) for pip, suit in zip(pips.values(), globals.suits)]
+    suitStr = [prefix + formatSuit(suit) for prefix, suit in zip(suitPrefixes, holding)]
     return br.join(suitStr) + br
 
 def formatHandDiagram(handInfo: dict) -> str:
@@ -85,12 +121,16 @@ def formatHandDiagram(handInfo: dict) -> str:
     #   ♣ 6<br />
     # 
     
-    diagram =  f'{handInfo["Direction"].upper()}<br />\n'
+    return ''.join([handInfo["Direction"].upper(), '<br />\n', formatHandBody(handInfo)])
+
+def formatHandBody(handInfo: dict) -> str:
+    # the part of formatHandDiagram below the direction, which does not change when the deal is rotated
+    body = []
     if "Player" in handInfo:
-        diagram += f'<i>{handInfo["Player"]}</i><br />\n'
+        body += ['<i>', handInfo["Player"], '</i><br />\n']
     if "Hand" in handInfo:
-        diagram += f'{formatHand(handInfo["Hand"])}\n'
-    return diagram
+        body += [formatHand(handInfo["Hand"]), '\n']
+    return ''.join(body)
     
     
 def formatHandDiagrams(hands: dict, withBreaks: bool = True) -> dict:
@@ -98,6 +138,7 @@ def formatHandDiagrams(hands: dict, withBreaks: bool = True) -> dict:
      
     return dict([(hand['Direction'], formatHandDiagram(hand)) for hand in hands])
 
+@functools.lru_cache(maxsize=256)
 def formatCall(call: str) -> str:
     # convert abbreviation into a displayable html string
     # input: '1C'
@@ -107,13 +148,37 @@ def formatCall(call: str) -> str:
             call = call.replace(suit, ' ' + pip)
     return call.replace('P', 'Pass').replace('D', 'Double').replace('R', 'Redouble').replace('N', ' NT')
 
-def formatAuctionCalls(auction: List[str], dealer: str) -> list:
+# every bid, plus Pass, Double and Redouble
+allCalls = [level + strain for level in '1234567' for strain in 'CDHSN'] + ['P', 'D', 'R']
+
+def prewarm():
+    # format every call, so they are all in the cache
+    for call in allCalls:
+        formatCall(call)
+
+def cacheInfo() -> dict[str, dict]:
+    # hits, misses, maxsize and currsize of each cache
+    return dict([(f.__name__, f.cache_info()._asdict()) for f in [formatCall, formatSuit, formatHolding, formatCard]])
+
+def clearCaches():
+    for f in [formatCall, formatSuit, formatHolding, formatCard]:
+        f.cache_clear()
+
+def formatAuctionCalls(auction: list[str], dealer: str) -> list:
     # convert list of call  abbreviations into a  list of displayable calls with the first call being West
     # input: ['1C', 'Pass', '2C', 'Pass', '2S', 'Pass', '3 NT', 'Pass', 'Pass', 'Pass'], North dealer
     # output: [' ', '1 &#9827;', 'Pass', '2 &#9827;',
     #     'Pass', '2 &#9824;', 'Pass', '3 NT', 
     #     '(All pass)']
         
+    # determine how many empty cells should begin the auction
+    newAuction = ([' '] * ((globals.directions.index(dealer)) % 4))
+    newAuction.extend(formatCallList(auction))
+    return newAuction
+
+def formatCallList(auction: list[str]) -> list:
+    # the calls of formatAuctionCalls, without the empty cells before the dealer
+        
     # translate abbreviations to full calls
     callList = [formatCall(call) for call in auction]
     
@@ -123,11 +188,7 @@ def formatAuctionCalls(auction: List[str], dealer: str) -> list:
             callList[-3:] = ['(All pass)']
         if callList[-1] == 'Pass':
             del callList[-1]
-         
-    # determine how many empty cells should begin the auction
-    newAuction = ([' '] * ((globals.directions.index(dealer)) % 4))
-    newAuction.extend(callList)
-    return newAuction
+    return callList
 
 def formatAuctionHeader(deal: dict) -> str:
     # contruct auction heading from list of players (West first)
@@ -146,16 +207,16 @@ def formatAuctionHeader(deal: dict) -> str:
     #    <td align="left" width="25%"><i>Phillip</i></td>
     # </tr>
     players = dict([(seat['Direction'], seat.get('Player', '')) for seat in deal['Seats']])
-    auctionHeader = '<tr>\n'
-    for direction in globals.directions:
-        auctionHeader += f'   <td align="direction in globals.directions:left" width="25%"><b>{direction}</b></td>\n'
-    auctionHeader += '</tr>\n<tr>\n'
-    for direction in globals.directions:
-        auctionHeader += f'   <td align="left" width="25%"><i>{players[direction]}</i></td>\n'
-    return auctionHeader + '</tr>\n'
+    return auctionHeaderTemplate.format(*[players[direction] for direction in globals.directions])
+
+auctionHeaderTemplate = '<tr>\n' + \
+    ''.join(f'   <td align="direction in globals.directions:left" width="25%"><b>{direction}</b></td>\n' for direction in globals.directions) + \
+    '</tr>\n<tr>\n' + \
+    '   <td align="left" width="25%"><i>{}</i></td>\n' * 4 + \
+    '</tr>\n'
     
     
-def formatAuction(auction: List[str]) -> str:
+def formatAuction(auction: list[str]) -> str:
     # take output of formatAuctionCalls and format it into html table rows
     # output: 
     # <tr>
@@ -181,40 +242,113 @@ def formatAuction(auction: List[str]) -> str:
     auction.extend([' '] * (4 - len(auction) % 4))
     
     # build rows
-    newAuction = ''
-    for i in range(len(auction)):
-        if 0 == i % 4:
-            newAuction += '<tr>\n'
-        newAuction += f'   <td align="left" width="25%">{auction[i]}</td>\n'
-        if 3 == i % 4:
-            newAuction += '</tr>\n'
-    return newAuction
+    return ''.join(auctionRows(auction))
+
+def auctionRows(auction: list[str]) -> Iterator[str]:
+    # one table row for each round of four calls; auction is already a multiple of four long
+    for i in range(0, len(auction), 4):
+        yield auctionRowTemplate.format(*auction[i:i + 4])
+
+auctionRowTemplate = '<tr>\n' + '   <td align="left" width="25%">{}</td>\n' * 4 + '</tr>\n'
 
 def buildAuctionTable(deal: dict, width: int = 300) -> str:
+    return ''.join(auctionTableChunks(deal, width))
+
+def auctionTableChunks(deal: dict, width: int = 300) -> Iterator[str]:
+    # the auction table a section at a time: the start of the table with its header, each row, the end of the table
     header = formatAuctionHeader(deal)
-    auction = formatAuction((formatAuctionCalls(deal["Auction"], deal["Dealer"])))
-    return f'<table align="center" border="0" cellpadding="0" cellspacing="0" style="width: {width}px;">\n<tbody>\n' + \
-        header + \
-        auction + \
-        '</tbody></table>'
+    yield auctionTableStart.format(width=width) + header
+    auction = formatAuctionCalls(deal["Auction"], deal["Dealer"])
+    auction.extend([' '] * (4 - len(auction) % 4))
+    yield from auctionRows(auction)
+    yield auctionTableEnd
+
+auctionTableStart = '<table align="center" border="0" cellpadding="0" cellspacing="0" style="width: {width}px;">\n<tbody>\n'
+auctionTableEnd = '</tbody></table>'
+
+def buildTricksTable(deal: dict, width: int = 300) -> str:
+    # the double dummy tricks of each declarer in each strain, and par
+    # solving is slow without libdds (minutes a deal, see ddsolver), so the solver is only imported when asked for
+    import ddsolver
+    return formatTricksTable(ddsolver.solve(deal), width)
+
+def formatTricksTable(solved: dict, width: int = 300) -> str:
+    # input: ddsolver.solve's result, {'Tricks': {'North': {'C': 8, ...}, ...}, 'Par': {'Score': 620, 'Contracts': ['4S-N']}}
+    # output: a row of strains (NT first), a row for each declarer, and par
+    table = solved['Tricks']
+    rows = [tricksRowTemplate.format('', *[strainHeadings[strain] for strain in tricksStrains])]
+    for direction in tricksDirections:
+        rows.append(tricksRowTemplate.format(direction, *[table[direction][strain] for strain in tricksStrains]))
+    par = solved['Par']
+    contracts = [formatCall(call) + ' ' + declarers for call, declarers in [contract.split('-') for contract in par['Contracts']]]
+    rows.append(parRowTemplate.format(score=par['Score'], contracts=', '.join(contracts) or 'Pass'))
+    return auctionTableStart.format(width=width) + ''.join(rows) + auctionTableEnd
+
+tricksStrains = 'NSHDC'
+tricksDirections = ['North', 'South', 'East', 'West']
+strainHeadings = dict(list(pips.items()) + [('N', 'NT')])
+tricksRowTemplate = '<tr>\n' + '   <td align="left" width="16%">{}</td>\n' * 6 + '</tr>\n'
+parRowTemplate = '<tr>\n   <td align="left" colspan="6">Par {score:+d}: {contracts}</td>\n</tr>\n'
+
+@functools.lru_cache(maxsize=64)
+def formatCard(card: str) -> str:
+    # input: 'ST'
+    # output: '&#9824; 10'
+    return pips[card[0]] + ' ' + formatSuit(card[1])
+
+def trickViews(played, args, rotate: int = 0) -> Iterator[str]:
+    # a view of each trick of played (a replay.Replay): the hands after it, its cards and the tricks won so far
+    # the seats shown are those of args (all four if fewer than two are asked for)
+    # with rotate, each direction is shifted as rotateDeal would shift it, so the replay of the deal as given can be shown rotated
+    shown = [direction for direction, show in [('North', args.north), ('West', args.west), ('East', args.east), ('South', args.south)] if show]
+    if len(shown) < 2:
+        shown = ['North', 'West', 'East', 'South']
+    sides = ['NS', 'EW'] if rotate % 2 == 0 else ['EW', 'NS']
+    for n, trick in enumerate(played.tricks, 1):
+        # the hands straight from the replay's masks (see model.Hand)
+        masks = dict(zip([shift(direction, rotate) for direction in globals.directions], played.masks[n]))
+        diagrams = dict([(direction, direction.upper() + '<br />\n' +
+                          formatHolding(tuple([model.holdingString(masks[direction] >> bits & 0x1FFF) for bits in (0, 13, 26, 39)]), True) + '\n')
+                         for direction in shown])
+        cards = dict([(shift(player, rotate), '<b>' + formatCard(card) + '</b>' if player == trick.winner else formatCard(card))
+                      for player, card in zip(trick.players(), trick.cards)])
+        taken = played.taken(n)
+        claim = ''
+        if n == len(played.tricks) and played.claim is not None:
+            claim = f'; {shift(played.declarer, rotate)} claims {played.claim}'
+        yield handTableTemplate.format(north=diagrams.get('North', ''), west=diagrams.get('West', ''),
+                                       east=diagrams.get('East', ''), south=diagrams.get('South', '')) + \
+            auctionTableStart.format(width=300) + trickHeader + \
+            auctionRowTemplate.format(*[cards.get(direction, ' ') for direction in globals.directions]) + \
+            trickFooterTemplate.format(number=n, ns=taken[sides[0]], ew=taken[sides[1]], claim=claim) + auctionTableEnd
+
+trickHeader = auctionRowTemplate.format(*[f'<b>{direction}</b>' for direction in globals.directions])
+trickFooterTemplate = '<tr>\n   <td align="left" colspan="4">Trick {number}: North-South {ns}, East-West {ew}{claim}</td>\n</tr>\n'
  
 def buildHandTable(deal: dict, args) -> str:
     # build html to display deal
-    hands = formatHandDiagrams(deal["Seats"])
-    return '<div align="center"><table><tbody>\n' + \
+    # only the seats that are shown are formatted
+    seats = dict([(seat['Direction'], seat) for seat in deal["Seats"]])
+    return handTableTemplate.format(
+        north=formatHandDiagram(seats["North"]) if args.north else '',
+        west=formatHandDiagram(seats["West"]) if args.west else '',
+        east=formatHandDiagram(seats["East"]) if args.east else '',
+        south=formatHandDiagram(seats["South"]) if args.south else '')
+
+handTableTemplate = '<div align="center"><table><tbody>\n' + \
             '   <tr>\n'  + \
             '      <td align="left" width="125"><br /></td>\n' + \
-            '      <td align="left" width="125">' + (hands["North"] if args.north else '') + '<br /></td>\n' + \
+            '      <td align="left" width="125">{north}<br /></td>\n' + \
             '      <td align="left" width="125"><br /></td>\n' + \
             '   </tr>\n' + \
             '   <tr>\n'  + \
-            '      <td align="left" width="125">' + (hands["West"] if args.west else '') + '<br /></td>\n' + \
+            '      <td align="left" width="125">{west}<br /></td>\n' + \
             '      <td align="left" width="125"><br /></td>\n' + \
-            '      <td align="left" width="125">' + (hands["East"] if args.east else '') + '<br /></td>\n' + \
+            '      <td align="left" width="125">{east}<br /></td>\n' + \
             '   </tr>\n' + \
             '   <tr>\n'  + \
             '      <td align="left" width="125"><br /></td>\n' + \
-            '      <td align="left" width="125">' + (hands["South"] if args.south else '') + '<br /></td>\n' + \
+            '      <td align="left" width="125">{south}<br /></td>\n' + \
             '      <td align="left" width="125"><br /></td>\n' + \
             '   </tr>\n' + \
             '</tbody></table></div>\n'
@@ -223,9 +357,11 @@ def buildSingleHand(hand: str) -> str:
     return f'<TABLE width="300" border="0" cellspacing="0" cellpadding="0" align="center"><TR><TD WIDTH="100%" Align="center">{hand}</TR></TABLE>'
         
     
-def build(deal : dict, args) -> str:
+def buildChunks(deal : dict, args) -> Iterator[str]:
+    # the page a table section at a time, so it can be written out as it is built
     
-    html = ''
+    if isinstance(deal, model.Deal):
+        deal = deal.toDict()
     
     # rotate deal if necessary
     if args.rotate:
@@ -236,20 +372,43 @@ def build(deal : dict, args) -> str:
     if len(seatsToShow) == 1:
         for seat in deal['Seats']:
             if seat['Direction'] == globals.seats[seatsToShow[0]]:
-                 html = buildSingleHand(formatHand(seat['Hand'], False))
+                 yield buildSingleHand(formatHand(seat['Hand'], False))
                  break
     
     elif len(seatsToShow) > 1:
-        html = buildHandTable(deal, args)
+        yield buildHandTable(deal, args)
+
+    # if specified, add the double dummy tricks and par
+    if getattr(args, 'tricks', False):
+        yield buildTricksTable(deal)
         
     # if specified, add auction
     if args.auction:
-        html += buildAuctionTable(deal)
-        
-    return html
+        yield from auctionTableChunks(deal)
+
+    # if specified, add a view of each trick
+    if getattr(args, 'play', False) and deal.get('Play'):
+        import replay
+        yield from trickViews(replay.Replay(deal), args)
+
+def build(deal : dict, args) -> str:
+    return ''.join(buildChunks(deal, args))
+
+def writeDeals(deals: Iterable[dict], args, f, separator: str = '<br />\n') -> int:
+    # write the html for each deal to the file object f as it is built, with separator between deals
+    # only one deal's html is held at a time; returns the number of deals written
+    count = 0
+    for deal in deals:
+        if count:
+            f.write(separator)
+        for chunk in buildChunks(deal, args):
+            f.write(chunk)
+        count += 1
+    return count
 
     
 
+
 # for testing
 if __name__ == '__main__' :
    
@@ -0,0 +1,653 @@
+# -*- coding: utf-8 -*-
+"""
+A double dummy solver: how many tricks each declarer takes in each strain when every player can see every card.
+
+    table = ddsolver.trickTable(deal)       # {'North': {'C': 8, 'D': 9, 'H': 11, 'S': 7, 'N': 9}, 'East': {...}, ...}
+    result = ddsolver.solve(deal)           # {'Tricks': table, 'Par': {'Score': 650, 'Contracts': ['4H-N', '4H-S']}}
+    results = list(ddsolver.solveMany(deals, jobs=8))
+
+The deal is a dictionary as parseurl.parse returns it (or a model.Deal), with all four hands and no x's.
+The hands may have fewer than 13 cards, as long as they all have the same number.
+
+A position is the four hands as 52 bit masks (see model.Hand), in the order of globals.directions, and the seat on lead.
+Solver.search is an alpha-beta search with a null window: can North-South take target of the remaining tricks?
+Solver.tricks finds the number of tricks by searching for targets either side of a guess.
+
+    the position at the start of each trick is normalized: the cards still out in each suit are renumbered
+        from the ace down, so positions that differ only in cards already played are the same position
+        (after a trick only the suits played to are renumbered)
+    the transposition table stores what each search found at the start of a trick, with the cards that decided it:
+        the top cards of each suit down to the lowest that won a trick by its rank (or that made two cards equivalent),
+        so a position with the same suit lengths and the same owners of those cards has the same result
+    the tricks the side on lead can cash from the top (the leader's, partner's when the leader can reach them, or both,
+        counting length winners once the others are out of the suit) and the top trumps in sequence in one hand
+        bound the result before searching
+    moves are ordered: the lead that last succeeded in the position (or in one with the same suit lengths), winners,
+        leads to partner's winners, then the rest, with leads into an opponent's void last; a player who can beat
+        the winning card plays the cheapest card that does, third hand plays high enough to beat fourth hand,
+        and otherwise players follow low and discard low before ruffing
+    of cards in sequence in one hand (e.g. QJ when the K has been played) only the lowest is tried, and it
+        counts the higher one as deciding the result only when the search found that the lower one did
+
+Every strain and leader shares the strain's table, so solveStrain solves each strain once for all four declarers,
+with the garbage collector off (the table is millions of small objects without cycles);
+with a pool (solveMany, or trickTable(deal, pool)) the five strains are solved in different processes.
+This is pure Python: the table of an ending of eight or nine cards takes about a second, but a full deal takes
+from half a minute to several minutes (python benchmark.py --only solver). So where libdds (Bo Haglund and
+Soren Hein's solver, in C) is installed, trickTable, solve and solveMany give it full deals instead, through ctypes:
+it solves a whole table in a fraction of a second. It is found as $HANDVIEWER_DDS (the path of the library; set it
+empty to use the solver here), as the system's libdds, or in the endplay package (pip install endplay); see library.
+
+par (in scoring) is worked out from the trick table and the deal's vulnerability.
+
+    python ddsolver.py <file>... [-j 4]     the trick table and par of each url or json deal (one per line) or .lin file
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import functools
+import gc
+import globals
+import model
+import os
+import sys
+import threading
+
+from collections.abc import Iterable, Iterator
+
+
+# strains in the order of the table, and the index in globals.suits of each trump suit
+strains = 'CDHSN'
+trumps = { 'C': 3, 'D': 2, 'H': 1, 'S': 0, 'N': None }
+suitMasks = tuple(0x1FFF << (13 * suit) for suit in range(4))
+
+# for each suit (the four seats' 13 bit holdings): the holdings renumbered from the ace down, the number of cards
+# each seat holds, and the seat holding the top card with the number of top cards it holds in sequence
+suitCache: dict[tuple[int, int, int, int], tuple] = {}
+
+
+def normalizeSuit(holdings: tuple[int, int, int, int]) -> tuple:
+    normalized = [0, 0, 0, 0]
+    remaining = holdings[0] | holdings[1] | holdings[2] | holdings[3]
+    position = 12
+    topSeat = None
+    run = 0
+    while remaining:
+        top = 1 << (remaining.bit_length() - 1)
+        seat = 0 if holdings[0] & top else 1 if holdings[1] & top else 2 if holdings[2] & top else 3
+        normalized[seat] |= 1 << position
+        if topSeat is None:
+            topSeat = seat
+        if seat == topSeat and run == 12 - position:
+            run += 1
+        remaining ^= top
+        position -= 1
+    lengths = tuple(holding.bit_count() for holding in holdings)
+    return normalized, lengths, lengths[0] | lengths[1] << 4 | lengths[2] << 8 | lengths[3] << 12, topSeat, run
+
+def normalize(hands: tuple[int, int, int, int]) -> tuple[tuple[int, int, int, int], int, list]:
+    # the hands renumbered, a key for the suit lengths of every hand and the suitCache entry of each suit
+    h0, h1, h2, h3 = hands
+    n0 = n1 = n2 = n3 = 0
+    key = 0
+    suits = []
+    for shift in (0, 13, 26, 39):
+        holdings = ((h0 >> shift) & 0x1FFF, (h1 >> shift) & 0x1FFF, (h2 >> shift) & 0x1FFF, (h3 >> shift) & 0x1FFF)
+        suit = suitCache.get(holdings)
+        if suit is None:
+            suit = suitCache[holdings] = normalizeSuit(holdings)
+        normalized = suit[0]
+        n0 |= normalized[0] << shift
+        n1 |= normalized[1] << shift
+        n2 |= normalized[2] << shift
+        n3 |= normalized[3] << shift
+        key = key << 16 | suit[2]
+        suits.append(suit)
+    return (n0, n1, n2, n3), key, suits
+
+def topCards(suit: int, depth: int) -> int:
+    # the top depth cards of a normalized suit
+    return ((1 << depth) - 1) << (13 * suit + 13 - depth)
+
+def downTo(present: int, card: int) -> int:
+    # the cards of card's suit from the top down to card
+    suit = (card.bit_length() - 1) // 13
+    return topCards(suit, (present & suitMasks[suit] & ~(card - 1)).bit_count())
+
+# (cards of a suit before a trick, those played in it, relevant depth after it) -> relevant depth before it
+depthCache: dict[tuple[int, int, int], int] = {}
+
+def depthBefore(present: int, played: int, depth: int) -> int:
+    # the lowest relevant card after the trick is the depth'th highest of the cards left after it
+    remaining = present & ~played
+    for i in range(depth - 1):
+        remaining ^= 1 << (remaining.bit_length() - 1)
+    lowest = 1 << (remaining.bit_length() - 1)
+    return (present & ~(lowest - 1)).bit_count()
+
+def beforeTrick(present: int, played: int, relevant: int) -> int:
+    # the cards relevant to the position after a trick, as cards of the position before it
+    # (the suits nobody played to are the same before and after)
+    cards = relevant
+    for suit in range(4):
+        shift = 13 * suit
+        suitPlayed = (played >> shift) & 0x1FFF
+        if suitPlayed:
+            depth = ((relevant >> shift) & 0x1FFF).bit_count()
+            cards &= ~suitMasks[suit]
+            if depth:
+                key = ((present >> shift) & 0x1FFF, suitPlayed, depth)
+                before = depthCache.get(key)
+                if before is None:
+                    before = depthCache[key] = depthBefore(key[0], suitPlayed, depth)
+                cards |= topCards(suit, before)
+    return cards
+
+def renormalize(hands: list, suits: list, played: int) -> tuple[tuple[int, int, int, int], int, list]:
+    # normalize after a trick: only the suits played to have changed
+    h0, h1, h2, h3 = hands
+    suits = suits[:]
+    for i in range(4):
+        if played & suitMasks[i]:
+            shift = 13 * i
+            holdings = ((h0 >> shift) & 0x1FFF, (h1 >> shift) & 0x1FFF, (h2 >> shift) & 0x1FFF, (h3 >> shift) & 0x1FFF)
+            suit = suitCache.get(holdings)
+            if suit is None:
+                suit = suitCache[holdings] = normalizeSuit(holdings)
+            normalized = suit[0]
+            clear = ~suitMasks[i]
+            h0 = h0 & clear | normalized[0] << shift
+            h1 = h1 & clear | normalized[1] << shift
+            h2 = h2 & clear | normalized[2] << shift
+            h3 = h3 & clear | normalized[3] << shift
+            suits[i] = suit
+    return (h0, h1, h2, h3), suits[0][2] << 48 | suits[1][2] << 32 | suits[2][2] << 16 | suits[3][2], suits
+
+
+def equivalents(relevant: int, skipped: list, present: int) -> int:
+    # a card that was not tried because the next card down is in the same hand matters only if the card itself does;
+    # then so does the next card down, which must still be in the same hand for the two to be the same
+    for card, next in reversed(skipped):
+        if relevant & card:
+            relevant |= downTo(present, next)
+    return relevant
+
+
+# (the four seats' normalized holdings of a suit, seat) -> cash
+cashCache: dict[tuple[int, int, int, int, int], tuple[int, ...]] = {}
+
+def cash(normalized: list, seat: int) -> tuple[int, ...]:
+    # the tricks seat wins in a suit leading from the top while the others follow low (partner under the card led):
+    # for each, the number of top cards that decide it
+    holdings = list(normalized)
+    partner = (seat + 2) & 3
+    depths = []
+    while holdings[seat]:
+        lead = 1 << (holdings[seat].bit_length() - 1)
+        if holdings[(seat + 1) & 3] > lead or holdings[(seat + 3) & 3] > lead or holdings[partner] & -holdings[partner] > lead:
+            break
+        for other in range(4):
+            holdings[other] ^= lead if other == seat else holdings[other] & -holdings[other]
+        depths.append(14 - lead.bit_length())
+    return tuple(depths)
+
+
+playsCache: dict[tuple[int, int], tuple[list, list]] = {}
+
+def playsOf(holding: int, present: int) -> tuple[list, list]:
+    # the cards of one suit of a hand worth trying, lowest first (of cards in sequence, only the lowest),
+    # and the (card, next lower card) pairs left out
+    key = (holding, present)
+    found = playsCache.get(key)
+    if found is None:
+        cards, skipped = [], []
+        rest = holding
+        while rest:
+            card = rest & -rest
+            rest ^= card
+            below = present & (card - 1)
+            if below:
+                next = 1 << (below.bit_length() - 1)
+                if next & holding:
+                    skipped.append((card, next))
+                    continue
+            cards.append(card)
+        found = playsCache[key] = (cards, skipped)
+    return found
+
+
+class Solver:
+    # solves positions with one trump suit (an index into globals.suits, or None for notrump)
+    def __init__(self, trump: int | None):
+        self.trump = trump
+        self.trumpMask = suitMasks[trump] if trump is not None else 0
+        # (leader, suit lengths) -> relevant cards -> owners of those cards -> [lower, upper] bounds of North-South's tricks
+        self.table: dict[tuple[int, int], dict[int, dict[tuple[int, int, int, int], list]]] = {}
+        # the lead that last succeeded in each position, and in any position with the same leader and suit lengths
+        self.best: dict[tuple[tuple[int, int, int, int] | int, int], int] = {}
+        self.nodes = 0
+
+    def tricks(self, hands: tuple[int, int, int, int], leader: int, guess: int | None = None) -> int:
+        # the number of tricks North-South take with leader on lead (an index into globals.directions)
+        hands, key, suits = normalize(hands)
+        left = hands[leader].bit_count()
+        lower, upper = 0, left
+        target = guess if guess is not None else (left + 1) // 2
+        while lower < upper:
+            target = min(max(target, lower + 1), upper)
+            if self.search(hands, key, suits, leader, target)[0]:
+                lower = target
+                target += 1
+            else:
+                upper = target - 1
+                target -= 1
+        return lower
+
+    def winners(self, suits: list, seat: int) -> tuple[int, int]:
+        # the tricks seat can cash from the top of its suits, and those cards
+        lho = (seat + 1) & 3
+        rho = (seat + 3) & 3
+        ruff = self.trump is not None and (suits[self.trump][1][lho] or suits[self.trump][1][rho])
+        total = 0
+        cards = 0
+        for i, (normalized, lengths, code, topSeat, run) in enumerate(suits):
+            if topSeat == seat:
+                key = (normalized[0], normalized[1], normalized[2], normalized[3], seat)
+                depths = cashCache.get(key)
+                if depths is None:
+                    depths = cashCache[key] = cash(normalized, seat)
+                n = len(depths)
+                if ruff and i != self.trump:
+                    # until an opponent can ruff
+                    n = min(n, lengths[lho], lengths[rho])
+                if n:
+                    total += n
+                    cards |= topCards(i, depths[n - 1])
+        return total, cards
+
+    def quickTricks(self, hands: tuple[int, int, int, int], suits: list, leader: int) -> tuple[int, int]:
+        # tricks the side on lead can take at once: the leader's winners, or partner's when the leader has a card
+        # in one of partner's winning suits to lead to them - or both, when nobody can ruff and partner has
+        # enough other cards to discard while the leader cashes first
+        total, cards = self.winners(suits, leader)
+        partner = (leader + 2) & 3
+        partnerTotal, partnerCards = self.winners(suits, partner)
+        if partnerTotal:
+            hand = hands[leader]
+            for i in range(4):
+                if partnerCards & suitMasks[i] and hand & suitMasks[i]:
+                    lengths = suits[self.trump][1] if self.trump is not None else None
+                    if (lengths is None or not (lengths[(leader + 1) & 3] or lengths[(leader + 3) & 3])) \
+                            and hands[partner].bit_count() - partnerTotal >= total:
+                        return total + partnerTotal, cards | partnerCards
+                    if partnerTotal > total:
+                        return partnerTotal, partnerCards
+                    break
+        return total, cards
+
+    def lookup(self, bucket: dict, hands: tuple[int, int, int, int], target: int) -> tuple[bool, int] | None:
+        h0, h1, h2, h3 = hands
+        for cards, owners in bucket.items():
+            bounds = owners.get((h0 & cards, h1 & cards, h2 & cards, h3 & cards))
+            if bounds is not None:
+                if bounds[0] >= target:
+                    return True, cards
+                if bounds[1] < target:
+                    return False, cards
+        return None
+
+    def store(self, bucket: dict, hands: tuple[int, int, int, int], cards: int, lower: int, upper: int):
+        owners = bucket.setdefault(cards, {})
+        pattern = (hands[0] & cards, hands[1] & cards, hands[2] & cards, hands[3] & cards)
+        bounds = owners.get(pattern)
+        if bounds is None:
+            owners[pattern] = [lower, upper]
+        else:
+            bounds[0] = max(bounds[0], lower)
+            bounds[1] = min(bounds[1], upper)
+
+    def search(self, hands: tuple[int, int, int, int], key: int, suits: list, leader: int, target: int) -> tuple[bool, int]:
+        # whether North-South can take target of the remaining tricks from this (normalized) position at the start
+        # of a trick, and the cards that decided it
+        if target <= 0:
+            return True, 0
+        left = hands[leader].bit_count()
+        if target > left:
+            return False, 0
+        bucket = self.table.get((leader, key))
+        if bucket is None:
+            bucket = self.table[(leader, key)] = {}
+        else:
+            found = self.lookup(bucket, hands, target)
+            if found is not None:
+                return found
+
+        quick, cards = self.quickTricks(hands, suits, leader)
+        if leader & 1:
+            if quick >= target:
+                self.store(bucket, hands, cards, quick, left)
+                return True, cards
+        elif left - quick < target:
+            self.store(bucket, hands, cards, 0, left - quick)
+            return False, cards
+        if self.trump is not None and suits[self.trump][3] is not None:
+            # each of the top trumps in sequence in one hand takes a trick
+            run = suits[self.trump][4]
+            cards = topCards(self.trump, run)
+            if suits[self.trump][3] & 1:
+                if target <= run:
+                    self.store(bucket, hands, cards, run, left)
+                    return True, cards
+            elif target > left - run:
+                self.store(bucket, hands, cards, 0, left - run)
+                return False, cards
+
+        self.nodes += 1
+        h0, h1, h2, h3 = hands
+        present = h0 | h1 | h2 | h3
+        hand = hands[leader]
+        partner = hands[(leader + 2) & 3]
+        ns = leader & 1
+        position = (hands, leader)
+        best = self.best.get(position) or self.best.get((leader, key), 0)
+        if not best & hand:
+            # the other position's lead is not in this hand
+            best = 0
+        winning, toPartner, others = [], [], []
+        relevant = 0
+        skipped = []
+        rest = hand
+        while rest:
+            card = rest & -rest
+            rest ^= card
+            suitMask = suitMasks[(card.bit_length() - 1) // 13]
+            below = present & suitMask & (card - 1)
+            if below:
+                next = 1 << (below.bit_length() - 1)
+                if next & hand:
+                    skipped.append((card, next))
+                    continue
+            if card == best:
+                continue
+            above = present & suitMask & ~((card << 1) - 1)
+            if not above:
+                winning.append(card)
+            elif 1 << (above.bit_length() - 1) & partner:
+                toPartner.append(card)
+            else:
+                others.append(card)
+        winning.reverse()
+        # leads to a suit an opponent is void in (a ruff or a free discard for them) come last
+        lho = hands[(leader + 1) & 3]
+        rho = hands[(leader + 3) & 3]
+        order = sorted(winning + toPartner + others, key=lambda card: (not lho & suitMasks[(card.bit_length() - 1) // 13],
+                                                                       not rho & suitMasks[(card.bit_length() - 1) // 13]))
+        if best:
+            order.insert(0, best)
+
+        played = list(hands)
+        result = not ns
+        for card in order:
+            played[leader] = hand ^ card
+            r, cards = self.follow(played, leader, target, 1, suitMasks[(card.bit_length() - 1) // 13], leader, card, present, card, suits)
+            if r == ns:
+                result = ns
+                relevant = cards
+                self.best[position] = card
+                self.best[(leader, key)] = card
+                break
+            relevant |= cards
+        if result != ns:
+            relevant = equivalents(relevant, skipped, present)
+        result = bool(result)
+        self.store(bucket, hands, relevant, target if result else 0, left if result else target - 1)
+        return result, relevant
+
+    def follow(self, hands: list, leader: int, target: int, n: int, ledMask: int, winner: int, winning: int,
+               present: int, played: int, suits: list) -> tuple[bool, int]:
+        # the nth card of the trick (hands is changed and put back); winner holds the winning card so far
+        self.nodes += 1
+        seat = (leader + n) & 3
+        ns = seat & 1
+        hand = hands[seat]
+        trumpMask = self.trumpMask
+        partnerWinning = not (winner ^ seat) & 1
+        following = hand & ledMask
+        if following:
+            order, skipped = playsOf(following, present & ledMask)
+            order = list(order)
+            if not partnerWinning and winning & ledMask and order[-1] > winning:
+                # the cheapest card that wins
+                for i, card in enumerate(order):
+                    if card > winning:
+                        order.insert(0, order.pop(i))
+                        break
+            elif n == 2 and partnerWinning and winning & ledMask:
+                # third hand: when fourth hand can beat partner's card, the cheapest card that fourth hand cannot beat
+                fourth = hands[(seat + 1) & 3] & ledMask
+                if fourth > winning:
+                    top = 1 << (fourth.bit_length() - 1)
+                    for i, card in enumerate(order):
+                        if card > top:
+                            order.insert(0, order.pop(i))
+                            break
+        else:
+            # discards, the lowest cards first whatever their suit, and ruffs last
+            order = []
+            skipped = []
+            for suit in range(4):
+                if hand & suitMasks[suit]:
+                    cards, equal = playsOf(hand & suitMasks[suit], present & suitMasks[suit])
+                    order += cards
+                    skipped += equal
+            if trumpMask and hand & trumpMask:
+                order.sort(key=lambda card: ((card & trumpMask) != 0, (card.bit_length() - 1) % 13))
+                if not partnerWinning:
+                    # the cheapest ruff that wins
+                    winningTrump = winning & trumpMask
+                    for i, card in enumerate(order):
+                        if card & trumpMask and card > winningTrump:
+                            order.insert(0, order.pop(i))
+                            break
+            else:
+                order.sort(key=lambda card: (card.bit_length() - 1) % 13)
+
+        relevant = 0
+        winningSuit = suitMasks[(winning.bit_length() - 1) // 13]
+        for card in order:
+            hands[seat] = hand ^ card
+            if card > winning if card & winningSuit else card & trumpMask:
+                nextWinner, nextWinning = seat, card
+            else:
+                nextWinner, nextWinning = winner, winning
+            if n < 3:
+                r, cards = self.follow(hands, leader, target, n + 1, ledMask, nextWinner, nextWinning, present, played | card, suits)
+            else:
+                trick = played | card
+                after, key, afterSuits = renormalize(hands, suits, trick)
+                r, cards = self.search(after, key, afterSuits, nextWinner, target - (nextWinner & 1))
+                if cards:
+                    cards = beforeTrick(present, trick, cards)
+                if trick & suitMasks[(nextWinning.bit_length() - 1) // 13] != nextWinning:
+                    # the trick was won by the rank of its winning card
+                    cards |= downTo(present, nextWinning)
+            if r == ns:
+                hands[seat] = hand
+                return ns, cards
+            relevant |= cards
+        hands[seat] = hand
+        return not ns, equivalents(relevant, skipped, present) if skipped else relevant
+
+
+def handMasks(deal) -> tuple[int, int, int, int]:
+    # the four hands of a deal dictionary (or model.Deal), in the order of globals.directions
+    if not isinstance(deal, model.Deal):
+        deal = model.Deal.fromDict(deal)
+    seats = dict([(seat.direction, seat) for seat in deal.seats])
+    assert all(direction in seats and seats[direction].hand is not None for direction in globals.directions), "The solver needs all four hands"
+    hands = [seats[direction].hand for direction in globals.directions]
+    assert not any(hand.spots for hand in hands), "The solver needs every card, not x's"
+    masks = tuple(hand.mask for hand in hands)
+    assert len(set(mask.bit_count() for mask in masks)) == 1, "Every hand must have the same number of cards"
+    assert not (masks[0] & masks[1] or masks[0] & masks[2] or masks[0] & masks[3] or masks[1] & masks[2] or masks[1] & masks[3] or masks[2] & masks[3]), \
+        "A card is in more than one hand"
+    return masks
+
+def solveStrain(job: tuple[tuple[int, int, int, int], str]) -> dict[str, int]:
+    # the tricks each declarer takes in one strain: {'West': 4, 'North': 9, ...}
+    hands, strain = job
+    solver = Solver(trumps[strain])
+    cards = hands[0].bit_count()
+    tricks = {}
+    guess = None
+    # the search makes millions of small objects but no cycles; the garbage collector's passes over them cost a third of the time
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for declarer in range(4):
+            # the declarer's left hand opponent leads
+            ns = solver.tricks(hands, (declarer + 1) & 3, guess)
+            guess = ns
+            tricks[globals.directions[declarer]] = ns if declarer & 1 else cards - ns
+    finally:
+        if collecting:
+            gc.enable()
+    return tricks
+
+
+class TableDeal(ctypes.Structure):
+    # libdds's ddTableDeal: the cards of each hand (North, East, South, West) in each suit (spades first), 2 at bit 2
+    _fields_ = [('cards', ctypes.c_uint * 4 * 4)]
+
+class TableResults(ctypes.Structure):
+    # libdds's ddTableResults: the tricks of each declarer (North first) in each strain (spades first, notrump last)
+    _fields_ = [('resTable', ctypes.c_int * 4 * 5)]
+
+
+class Dds:
+    # the trick tables of full deals from libdds (Bo Haglund and Soren Hein's double dummy solver, in C), through ctypes
+    def __init__(self, path: str):
+        self.path = path
+        self.lib = ctypes.CDLL(path)
+        # as many threads as the machine has cpus, for the strains of one table
+        self.lib.SetMaxThreads(0)
+        # a solve uses all the library's threads, so callers in different threads take turns
+        self.lock = threading.Lock()
+
+    def strains(self, hands: tuple[int, int, int, int]) -> list[dict[str, int]]:
+        # the tricks of each declarer in each strain, as solveStrain's results in the order of strains
+        deal = TableDeal()
+        for seat in range(4):
+            for suit in range(4):
+                deal.cards[(seat + 3) & 3][suit] = ((hands[seat] >> (13 * suit)) & 0x1FFF) << 2
+        results = TableResults()
+        with self.lock:
+            status = self.lib.CalcDDtable(deal, ctypes.byref(results))
+        if status != 1:
+            raise RuntimeError(f'CalcDDtable failed ({status})')
+        return [dict([(direction, results.resTable['SHDCN'.index(strain)][(seat + 3) & 3])
+                      for seat, direction in enumerate(globals.directions)]) for strain in strains]
+
+def libraryPath() -> str | None:
+    # $HANDVIEWER_DDS (empty for none), the system's libdds, or the one in the endplay package if it is installed
+    path = os.environ.get('HANDVIEWER_DDS')
+    if path is not None:
+        return path or None
+    path = ctypes.util.find_library('dds')
+    if path:
+        return path
+    import importlib.util
+    spec = importlib.util.find_spec('endplay')
+    for directory in (spec.submodule_search_locations or []) if spec is not None else []:
+        for name in ('libdds.so', 'libdds.dylib', 'dds.dll'):
+            if os.path.exists(os.path.join(directory, '_dds', name)):
+                return os.path.join(directory, '_dds', name)
+    return None
+
+@functools.lru_cache(maxsize=1)
+def library() -> Dds | None:
+    # the libdds found by libraryPath, loaded once; None (so the solver here is used) if there is none or it will not load
+    path = libraryPath()
+    if path is None:
+        return None
+    try:
+        return Dds(path)
+    except (OSError, AttributeError) as e:
+        print(f'{path}: {e}: using the python solver', file=sys.stderr)
+        return None
+
+def fastStrains(hands: tuple[int, int, int, int]) -> list[dict[str, int]] | None:
+    # every strain of a full deal from libdds, or None if it is not there (libdds only solves full deals)
+    dds = library()
+    if dds is None or hands[0].bit_count() != 13:
+        return None
+    return dds.strains(hands)
+
+def tableFromStrains(results: Iterable[dict[str, int]]) -> dict[str, dict[str, int]]:
+    # {declarer: {strain: tricks}} from the results of solveStrain in the order of strains
+    table = dict([(direction, {}) for direction in globals.directions])
+    for strain, tricks in zip(strains, results):
+        for direction, count in tricks.items():
+            table[direction][strain] = count
+    return table
+
+def trickTable(deal, pool=None) -> dict[str, dict[str, int]]:
+    # the tricks each declarer takes in each strain: {'West': {'C': 4, 'D': 5, 'H': 3, 'S': 6, 'N': 4}, 'North': ...}
+    # from libdds for a full deal where it is installed; otherwise with a multiprocessing pool, the strains are solved at the same time
+    hands = handMasks(deal)
+    fast = fastStrains(hands)
+    if fast is not None:
+        return tableFromStrains(fast)
+    jobs = [(hands, strain) for strain in strains]
+    return tableFromStrains(pool.map(solveStrain, jobs) if pool is not None else map(solveStrain, jobs))
+
+def result(deal, table: dict[str, dict[str, int]]) -> dict:
+    # the trick table with par for the deal's vulnerability and dealer
+    import scoring
+    if isinstance(deal, model.Deal):
+        vulnerability, dealer = deal.vulnerability or 'None', deal.dealer
+    else:
+        vulnerability, dealer = deal.get('Vulnerability', 'None'), deal.get('Dealer')
+    return { 'Tricks': table, 'Par': scoring.par(table, vulnerability, dealer or 'North') }
+
+def solve(deal, pool=None) -> dict:
+    # the trick table and par of a deal: {'Tricks': trickTable(deal), 'Par': {'Score': ..., 'Contracts': [...]}}
+    return result(deal, trickTable(deal, pool))
+
+def solveMany(deals: Iterable, jobs: int | None = None) -> Iterator[dict]:
+    # solve for each deal, in order, using jobs processes (all the cpus if None)
+    # every strain of every deal is a separate task, so a few slow deals do not hold up the others;
+    # with libdds, full deals are solved here (it uses every cpu itself) and only the others go to the pool
+    import itertools
+    import multiprocessing
+    deals = list(deals)
+    masks = [handMasks(deal) for deal in deals]
+    fast = [fastStrains(hands) for hands in masks]
+    tasks = [(hands, strain) for hands, solved in zip(masks, fast) if solved is None for strain in strains]
+    if not tasks:
+        for deal, solved in zip(deals, fast):
+            yield result(deal, tableFromStrains(solved))
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        results = pool.imap(solveStrain, tasks)
+        for deal, solved in zip(deals, fast):
+            yield result(deal, tableFromStrains(solved if solved is not None else itertools.islice(results, len(strains))))
+
+
+def parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description = 'Handviewer Double Dummy Solver', )
+    parser.add_argument('files', nargs='+', help='files of urls or json deals (one per line), or .lin files')
+    parser.add_argument('-j', '--jobs', type=int, help='number of worker processes (default: one per cpu)')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    import dealstore
+    import itertools
+    import json
+    import sys
+    args = parse_args(sys.argv[1:])
+    for solved in solveMany(itertools.chain.from_iterable(map(dealstore.readDeals, args.files)), args.jobs):
+        print(json.dumps(solved))
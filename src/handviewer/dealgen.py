@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Random but reproducible BBO handviewer urls, for benchmarks.
+
+Each board is a shuffled 52-card deal with the dealer and vulnerability of its board number, an auction bid by
+simple rules from each hand's HCP and suit lengths (so it is legal and usually looks like a real one),
+and optionally annotations of the calls and the card play.
+
+    urls = list(dealgen.urls(1000, seed=1))                              # same urls for the same seed
+    urls = list(dealgen.urls(100, seed=1, annotate=1.0, played=52))      # every call annotated, every card played
+
+    python dealgen.py <count> [--seed 0] [--annotate 0.3] [--play 52]   prints the urls, one per line
+"""
+from __future__ import annotations
+
+import argparse
+import globals
+import random
+import sys
+import urllib.parse
+
+from collections.abc import Iterator
+
+
+ranks = 'AKQJT98765432'
+strains = 'CDHSN'
+names = ['PSMartin', 'sarab', 'Zia', 'Meckwell', 'bridgefan', 'kibitzer', 'dummy42', 'Lisa_B', 'no_trump_ned', 'squeezeplay']
+notes = ['2-5 !C', '2-5 !D', '4-5 !H', '2-4 !S', '15-17 HCP', '18- total points', 'forcing', 'Stayman', 'transfer',
+         'Blackwood (H)', 'Two or five key cards; queen', 'no !CA', 'cue bid', 'natural', '11-15 HCP', '5+ !S', 'takeout']
+
+# index of each seat in the md tag (South first) and the digit that names the dealer there
+mdOrder = ['South', 'West', 'North', 'East']
+dealerDigit = dict([(direction, str(i + 1)) for i, direction in enumerate(mdOrder)])
+# dealer and vulnerability repeat every 16 boards
+boardDealers = ['North', 'East', 'South', 'West']
+boardVulnerability = 'onebnebobebonebo'
+
+
+def shuffle(rng: random.Random) -> dict[str, dict[str, str]]:
+    # a hand of 13 cards for each direction, as {suit: ranks} in rank order
+    cards = [(suit, rank) for suit in range(4) for rank in range(13)]
+    rng.shuffle(cards)
+    hands = {}
+    for seat, direction in enumerate(globals.directions):
+        held = sorted(cards[13 * seat:13 * seat + 13])
+        hands[direction] = dict([(name, ''.join(ranks[rank] for s, rank in held if s == suit)) for suit, name in enumerate(globals.suits)])
+    return hands
+
+def lengths(hand: dict[str, str]) -> list[int]:
+    # in the order of strains (clubs first)
+    return [len(hand[suit]) for suit in reversed(globals.suits)]
+
+
+class Bidder:
+    # bids one auction: each call is the cheapest bid that fits the side's combined strength, or a pass
+    def __init__(self, hands: dict[str, dict[str, str]], dealer: str, rng: random.Random):
+        self.hands = hands
+        self.rng = rng
+        self.dealer = globals.directions.index(dealer)
+        self.seat = self.dealer
+        self.calls: list[str] = []
+        self.last: tuple[int, int, int] | None = None     # level, strain, side of the last bid
+        self.doubled = ''
+        self.strains: dict[int, list[int]] = { 0: [], 1: [] }  # strains each side has bid
+
+    def legalBid(self, strain: int) -> int:
+        # cheapest level at which strain can be bid
+        if self.last is None:
+            return 1
+        level, lastStrain, side = self.last
+        return level if strain > lastStrain else level + 1
+
+    def target(self, side: int, strain: int) -> int:
+        # the level a side would like to reach in strain, from its HCP and fit
+        points = globals.hcp(self.hands[globals.directions[side]]) + globals.hcp(self.hands[globals.directions[side + 2]])
+        points += self.rng.randint(-2, 2)
+        if strain == 4:
+            return 7 if points >= 37 else 6 if points >= 33 else 3 if points >= 25 else 2 if points >= 23 else 1
+        fit = len(self.hands[globals.directions[side]][globals.suits[3 - strain]]) + \
+              len(self.hands[globals.directions[side + 2]][globals.suits[3 - strain]])
+        game = 4 if strain >= 2 else 5
+        level = 7 if points >= 37 else 6 if points >= 33 else game if points >= 25 else 2 if points >= 20 else 1
+        return min(7, level + max(0, fit - 8))
+
+    def call(self) -> str:
+        direction = globals.directions[self.seat % 4]
+        side = self.seat % 2
+        hand = self.hands[direction]
+        points = globals.hcp(hand)
+        suitLengths = lengths(hand)
+        longest = max(range(4), key=lambda i: (suitLengths[i], i))
+
+        if self.last is None:
+            if points >= 15 and points <= 17 and min(suitLengths) >= 2 and sorted(suitLengths)[-2] <= 4 and max(suitLengths) <= 5:
+                return self.bid(1, 4, side)
+            if points >= 12 or (points >= 10 and suitLengths[longest] >= 6):
+                return self.bid(1 if points >= 12 else 2, longest, side)
+            if points >= 6 and suitLengths[longest] >= 7:
+                return self.bid(3, longest, side)
+            return 'p'
+
+        level, lastStrain, lastSide = self.last
+        if lastSide != side:
+            # opponents hold the contract
+            if not self.strains[side]:
+                if points >= 13 and suitLengths[lastStrain if lastStrain < 4 else 0] <= 2 and not self.doubled and self.rng.random() < 0.6:
+                    return self.double()
+                if points >= 9 and suitLengths[longest] >= 5 and self.legalBid(longest) <= 2:
+                    return self.bid(self.legalBid(longest), longest, side)
+                return 'p'
+            if self.doubled == '' and level >= 3 and self.rng.random() < 0.08:
+                return self.double()
+
+        if self.doubled == 'X' and lastSide == side and self.rng.random() < 0.15:
+            self.doubled = 'XX'
+            return 'r'
+
+        # choose a strain for the side: partner's suit with support, else our long suit, else notrump
+        partnerStrains = [strain for strain in self.strains[side] if strain < 4]
+        strain = longest
+        for partnerStrain in reversed(partnerStrains):
+            if suitLengths[partnerStrain] >= 3:
+                strain = partnerStrain
+                break
+        else:
+            if partnerStrains and suitLengths[longest] < 6 and min(suitLengths) >= 2:
+                strain = 4
+        if 4 in self.strains[side] and suitLengths[longest] < 6:
+            strain = 4
+        bidLevel = self.legalBid(strain)
+        if bidLevel <= 7 and bidLevel <= self.target(side, strain):
+            if self.strains[side] and bidLevel + 1 <= self.target(side, strain) and self.rng.random() < 0.3:
+                bidLevel += 1
+            return self.bid(bidLevel, strain, side)
+        return 'p'
+
+    def bid(self, level: int, strain: int, side: int) -> str:
+        self.last = (level, strain, side)
+        self.doubled = ''
+        self.strains[side].append(strain)
+        return f'{level}{strains[strain]}'
+
+    def double(self) -> str:
+        self.doubled = 'X'
+        return 'd'
+
+    def auction(self) -> list[str]:
+        # calls until three passes follow a bid, or all four players pass
+        passes = 0
+        while passes < (3 if self.last else 4):
+            call = self.call()
+            passes = passes + 1 if call == 'p' else 0
+            self.calls.append(call)
+            self.seat += 1
+        return self.calls
+
+    def declarer(self) -> str | None:
+        # the first player of the declaring side to name the final strain
+        if self.last is None:
+            return None
+        level, strain, side = self.last
+        seat = self.dealer
+        for call in self.calls:
+            if seat % 2 == side and call[:1].isdigit() and strains.index(call[1]) == strain:
+                return globals.directions[seat % 4]
+            seat += 1
+
+
+def play(hands: dict[str, dict[str, str]], declarer: str, strain: int, rng: random.Random, cards: int = 52) -> list[str]:
+    # the first cards played (e.g. 'S4'), each following suit when it can; the winner of each trick leads to the next
+    held = dict([(direction, [suit[0] + rank for suit in globals.suits for rank in hand[suit]]) for direction, hand in hands.items()])
+    trumps = 'SHDC'[3 - strain] if strain < 4 else None
+    leader = (globals.directions.index(declarer) + 1) % 4
+    played = []
+    while len(played) < cards:
+        trick = []
+        for i in range(4):
+            seat = (leader + i) % 4
+            cardsHeld = held[globals.directions[seat]]
+            following = [card for card in cardsHeld if trick and card[0] == trick[0][1][0]]
+            card = rng.choice(following or cardsHeld)
+            cardsHeld.remove(card)
+            trick.append((seat, card))
+            played.append(card)
+        led = trick[0][1][0]
+        winner = max(trick, key=lambda item: (item[1][0] == trumps, item[1][0] == led, -ranks.index(item[1][1])))
+        leader = winner[0]
+    return played[:cards]
+
+def annotation(rng: random.Random) -> str:
+    return urllib.parse.quote('; '.join(rng.choice(notes) for i in range(rng.randint(1, 8))), safe='!;')
+
+def url(rng: random.Random, board: int, annotate: float = 0.3, played: int | None = None) -> str:
+    # one board; annotate is the chance that each call has an annotation, played the number of cards played
+    # (0 to 52; random if not given)
+    hands = shuffle(rng)
+    dealer = boardDealers[(board - 1) % 4]
+    bidder = Bidder(hands, dealer, rng)
+    calls = bidder.auction()
+
+    players = ','.join(rng.choice(names) if rng.random() < 0.7 else '~M' + direction.lower() for direction in mdOrder)
+    md = [''.join(suit[0] + hands[direction][suit] for suit in globals.suits) for direction in mdOrder]
+    md[0] = dealerDigit[dealer] + md[0]
+    if rng.random() < 0.5:
+        # lin files often leave the last hand out
+        md[3] = ''
+
+    fields = ['st', '', 'pn', players, 'md', ','.join(md), 'sv', boardVulnerability[(board - 1) % 16], 'rh', '', 'ah', f'Board%20{board}']
+    for call in calls:
+        alerted = call[:1].isdigit() and rng.random() < annotate / 2
+        fields += ['mb', call + ('!' if alerted else '')]
+        if rng.random() < annotate:
+            fields += ['an', annotation(rng)]
+
+    declarer = bidder.declarer()
+    if declarer:
+        cards = rng.randint(0, 52) if played is None else played
+        for card in play(hands, declarer, bidder.last[1], rng, cards):
+            fields += ['pc', card]
+        if cards < 52:
+            fields += ['mc', str(rng.randint(0, 13))]
+    return 'https://www.bridgebase.com/tools/handviewer.html?lin=' + '|'.join(fields) + '|'
+
+def urls(count: int, seed: int = 0, annotate: float = 0.3, played: int | None = None) -> Iterator[str]:
+    rng = random.Random(seed)
+    for n in range(count):
+        yield url(rng, n % 32 + 1, annotate, played)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Deal Generator', )
+    parser.add_argument('count', type=int, help='number of urls')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (the same seed gives the same urls)')
+    parser.add_argument('--annotate', type=float, default=0.3, help='chance that each call is annotated')
+    parser.add_argument('--play', type=int, help='number of cards played (random if not given)')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    for line in urls(args.count, args.seed, args.annotate, args.play):
+        print(line)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+A persistent store of deals in an SQLite database, indexed for fast queries.
+
+Each deal is kept whole (as json, so query results go straight to buildhtml.build), along with
+    deals   board number, dealer, final contract (e.g. '3N', '4HX', or 'P' if passed out; none if the auction has an illegal call),
+            declarer (direction and player), and the combined HCP of the declaring side
+    seats   for each seat: direction, player, HCP, shape (e.g. '5-4-3-1') and suit lengths
+Each of these is indexed. A deal that is already in the store is not added again.
+
+    store = DealStore('deals.db')
+    store.addMany(linfile.readDeals(f))
+    for deal in store.query(declaredBy='Phillip', contract='3N', minCombinedHcp=25):
+        html = buildhtml.build(deal, args)
+
+    python dealstore.py deals.db add <file>...       add urls, json deals (one per line) or .lin files
+    python dealstore.py deals.db query [options]     write the html of matching deals (see --help)
+"""
+from __future__ import annotations
+
+import argparse
+import bidding
+import buildhtml
+import globals
+import hashlib
+import json
+import linfile
+import parseurl
+import sqlite3
+import sys
+
+from collections.abc import Iterable, Iterator
+
+
+schema = '''
+create table if not exists deals (
+    id integer primary key,
+    hash text unique not null,
+    board integer,
+    dealer text,
+    contract text,
+    declarer text,
+    declarer_player text,
+    declarer_hcp integer,
+    deal text not null);
+create table if not exists seats (
+    deal_id integer not null references deals(id),
+    direction text not null,
+    player text,
+    hcp integer,
+    shape text,
+    spades integer, hearts integer, diamonds integer, clubs integer);
+create index if not exists deals_board on deals(board);
+create index if not exists deals_dealer on deals(dealer);
+create index if not exists deals_contract on deals(contract, declarer_hcp);
+create index if not exists deals_declarer_player on deals(declarer_player, contract);
+create index if not exists seats_deal on seats(deal_id);
+create index if not exists seats_player on seats(player, hcp);
+create index if not exists seats_hcp on seats(hcp);
+create index if not exists seats_shape on seats(shape, hcp);
+'''
+
+
+def finalContract(auction: Iterable[str], dealer: str) -> tuple[str | None, str | None]:
+    # returns the contract ('3N', '4SX', '2HXX', or 'P' if passed out) and the direction of the declarer (see bidding)
+    # an auction with an illegal call has neither, so the deal is still stored
+    try:
+        return bidding.finalContract(auction, dealer)
+    except AssertionError:
+        return None, None
+
+def handFeatures(hand: dict) -> tuple[int, str, list]:
+    # HCP, shape (longest suit first) and suit lengths in the order of globals.suits
+    lengths = [len(hand[suit]) for suit in globals.suits]
+    return globals.hcp(hand), '-'.join(map(str, sorted(lengths, reverse=True))), lengths
+
+
+class DealStore:
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(schema)
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        # let sqlite gather the statistics it uses to pick the best index for each query
+        self.connection.execute('pragma optimize')
+        self.connection.close()
+
+    def insert(self, deal: dict) -> bool:
+        # add one deal without committing; returns False if it was already in the store
+        saved = json.dumps(deal, sort_keys=True)
+        key = hashlib.sha256(saved.encode('utf-8')).hexdigest()
+        seats = [seat for seat in deal.get('Seats', [])]
+        players = dict([(seat['Direction'], seat.get('Player')) for seat in seats])
+        features = dict([(seat['Direction'], handFeatures(seat['Hand'])) for seat in seats if 'Hand' in seat])
+
+        if 'Result' in deal:
+            # already worked out (see scoring)
+            contract, declarer = deal['Result']['Contract'], deal['Result']['Declarer']
+        else:
+            contract, declarer = finalContract(deal.get('Auction', []), deal.get('Dealer'))
+        declarerHcp = None
+        if declarer:
+            partner = globals.directions[(globals.directions.index(declarer) + 2) % 4]
+            if declarer in features and partner in features:
+                declarerHcp = features[declarer][0] + features[partner][0]
+
+        cursor = self.connection.execute(
+            'insert or ignore into deals (hash, board, dealer, contract, declarer, declarer_player, declarer_hcp, deal) values (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, deal.get('Board number'), deal.get('Dealer'), contract, declarer, players.get(declarer), declarerHcp, saved))
+        if cursor.rowcount == 0:
+            return False
+        rows = []
+        for seat in seats:
+            hcp, shape, lengths = features.get(seat['Direction'], (None, None, [None] * 4))
+            rows.append([cursor.lastrowid, seat['Direction'], seat.get('Player'), hcp, shape] + lengths)
+        self.connection.executemany(
+            'insert into seats (deal_id, direction, player, hcp, shape, spades, hearts, diamonds, clubs) values (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return True
+
+    def add(self, deal: dict) -> bool:
+        added = self.insert(deal)
+        self.commit()
+        return added
+
+    def addMany(self, deals: Iterable[dict]) -> int:
+        # add deals in a single transaction; returns the number added
+        # a deal that cannot be added is reported on stderr and skipped
+        added = 0
+        for n, deal in enumerate(deals, 1):
+            try:
+                added += self.insert(deal)
+            except Exception as e:
+                print(f'Deal {n}: {type(e).__name__}: {e}', file=sys.stderr)
+        self.commit()
+        return added
+
+    def query(self, player: str | None = None, board: int | None = None, dealer: str | None = None,
+              contract: str | None = None, declaredBy: str | None = None, minCombinedHcp: int | None = None,
+              minHcp: int | None = None, maxHcp: int | None = None, shape: str | None = None,
+              limit: int | None = None) -> Iterator[dict]:
+        # yield the deals that match every condition given
+        #   player: someone sat at the table; declaredBy: that player declared
+        #   contract: e.g. '3N' (any doubling) or '3NX' (doubled only)
+        #   minCombinedHcp: the declaring side held at least that many HCP
+        #   minHcp, maxHcp, shape: a single hand (held by player, if given) has those features
+        conditions = []
+        values = []
+        for column, value in [('board', board), ('dealer', dealer), ('declarer_player', declaredBy)]:
+            if value is not None:
+                conditions.append(f'deals.{column} = ?')
+                values.append(value)
+        if contract is not None:
+            contracts = [contract] if contract.endswith('X') or contract == 'P' else [contract, contract + 'X', contract + 'XX']
+            conditions.append(f'deals.contract in ({", ".join("?" * len(contracts))})')
+            values += contracts
+        if minCombinedHcp is not None:
+            conditions.append('deals.declarer_hcp >= ?')
+            values.append(minCombinedHcp)
+
+        seatConditions = []
+        for condition, value in [('seats.player = ?', player), ('seats.hcp >= ?', minHcp), ('seats.hcp <= ?', maxHcp), ('seats.shape = ?', shape)]:
+            if value is not None:
+                seatConditions.append(condition)
+                values.append(value)
+        if seatConditions:
+            conditions.append('deals.id in (select deal_id from seats where ' + ' and '.join(seatConditions) + ')')
+
+        sql = 'select deal from deals' + (' where ' + ' and '.join(conditions) if conditions else '') + ' order by deals.id'
+        if limit is not None:
+            sql += f' limit {int(limit)}'
+        for (saved,) in self.connection.execute(sql, values):
+            yield json.loads(saved)
+
+
+def readDeals(path: str) -> Iterator[dict]:
+    # urls and json deals one per line, or a .lin file
+    # lines that cannot be parsed are reported on stderr and skipped
+    with open(path, 'r') as f:
+        if path.endswith('.lin'):
+            yield from linfile.readDeals(f)
+            return
+        for lineNumber, line in enumerate(f, 1):
+            line = line.strip()
+            try:
+                if line.startswith('http'):
+                    yield parseurl.parse(line)
+                elif line.startswith('{'):
+                    yield json.loads(line)
+            except Exception as e:
+                print(f'{path} line {lineNumber}: {type(e).__name__}: {e}', file=sys.stderr)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Deal Store', )
+    parser.add_argument('database', help='sqlite file holding the store')
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='add deals to the store')
+    add.add_argument('files', nargs='+', help='files of urls or json deals (one per line), or .lin files')
+    query = commands.add_parser('query', help='write the html of matching deals')
+    query.add_argument('--player', help='someone at the table')
+    query.add_argument('--board', type=int, help='board number')
+    query.add_argument('--dealer', help='North, South, East or West')
+    query.add_argument('--contract', help="final contract, e.g. 3N or 4SX")
+    query.add_argument('--declarer', help='player who declared')
+    query.add_argument('--min-combined-hcp', type=int, help='minimum HCP of the declaring side')
+    query.add_argument('--min-hcp', type=int, help='minimum HCP of one hand')
+    query.add_argument('--max-hcp', type=int, help='maximum HCP of one hand')
+    query.add_argument('--shape', help='shape of one hand, longest suit first, e.g. 5-4-3-1')
+    query.add_argument('--limit', type=int, help='maximum number of deals')
+    query.add_argument('-n', '--north', action='store_true', help='print North hand')
+    query.add_argument('-e', '--east', action='store_true', help='print East hand')
+    query.add_argument('-s', '--south', action='store_true', help='print South hand')
+    query.add_argument('-w', '--west', action='store_true', help='print West hand')
+    query.add_argument('-a', '--auction', action='store_true', help='print auction')
+    query.add_argument('-r', '--rotate', type=int, help='number of seats to rotate clockwise')
+    query.add_argument('-o', '--output', help='html file (stdout if not given)')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    store = DealStore(args.database)
+    if args.command == 'add':
+        for path in args.files:
+            print(f'{store.addMany(readDeals(path))} deals added from {path}')
+    else:
+        deals = store.query(args.player, args.board, args.dealer, args.contract, args.declarer, args.min_combined_hcp,
+                            args.min_hcp, args.max_hcp, args.shape, args.limit)
+        f = open(args.output, 'w') if args.output else sys.stdout
+        count = buildhtml.writeDeals(deals, args, f)
+        if f is not sys.stdout:
+            f.close()
+        print(f'{count} deals', file=sys.stderr)
+    store.close()
@@ -4,24 +4,35 @@ Created on Sat Apr 10 17:20:52 2021
 
 @author: sarab
 """
-from typing import List
+import types
+
+
+suits = ("Spades", "Hearts", "Diamonds", "Clubs")
+# West is first so it will appear first in the auction
+directions = ('West', 'North', 'East', 'South')
+seats = types.MappingProxyType({ 'S': 'South', 
+    'W': 'West',
+    'N': 'North',
+    'E': 'East'
+    })
+# high card points of each honor
+honors = types.MappingProxyType({ 'A': 4, 'K': 3, 'Q': 2, 'J': 1 })
 
 def initialize():
-    global suits
-    global directions 
-    global seats
-    suits = ["Spades", "Hearts", "Diamonds", "Clubs"]
-    # West is first so it will appear first in the auction
-    directions = ['West', 'North', 'East', 'South']
-    seats = { 'S': 'South', 
-        'W': 'West',
-        'N': 'North',
-        'E': 'East'
-        }
+    # the constants above are set when this module is imported; kept for scripts that still call it
+    pass
     
 
-def buildHand(suitList: List[str]) -> dict:
+def hcp(hand: dict) -> int:
+    # input {'Spades': 'AK5', 'Hearts': 'KT43', 'Diamonds': 'K7', 'Clubs': 'AK62'}
+    # output 20
+    return sum(honors.get(card, 0) for holding in hand.values() for card in holding)
+
+def buildHand(suitList: list[str]) -> dict:
     # input ['96432', 'KQ9', 'T5', '73']
     # output {'Spades': '96432', 'Hearts': 'KQ94', 'Diamonds': 'T5', 'Clubs': '73'}
+    # a model.Hand is also accepted
+    if hasattr(suitList, 'suit'):
+        suitList = [suitList.suit(i) for i in range(4)]
     assert len(suitList) == 4, "Invalid input to buildHand method"
     return dict(zip(suits, suitList))
@@ -7,60 +7,131 @@ Created on Sat Apr 10 11:33:59 2021
 
 """
 import argparse
-import buildhtml
-import inputdeal
-import json
-import parseurl
-import re
+import os
 import sys
 
+# every other module is imported where it is first needed, so that --help, ** and a single url start quickly
+
 
 def parse_args(argv):
     parser = argparse.ArgumentParser(description = 'Handviewer Tool', )
-    parser.add_argument('input', help='html string, * for console input, or ** for previous deal ')
+    parser.add_argument('input', help='html string, * for console input, or ** for previous deal (with -b, a file of urls or json deals, or - for stdin)')
     parser.add_argument('-n', '--north', action='store_true', help='print North hand')
     parser.add_argument('-e', '--east', action='store_true', help='print East hand')
     parser.add_argument('-s', '--south', action='store_true', help='print South hand')
     parser.add_argument('-w', '--west', action='store_true', help='print West hand')
     parser.add_argument('-a', '--auction', action='store_true', help='print auction')
+    parser.add_argument('-t', '--tricks', action='store_true', help='print the double dummy tricks of each declarer and par (a fraction of a second a deal with libdds, minutes without: see ddsolver)')
+    parser.add_argument('-p', '--play', action='store_true', help='print a view of each trick of the play, after the auction')
     parser.add_argument('-r', '--rotate', type=int, help='number of seats to rotate clockwise')
-    parser.add_argument('-o', '--output', default='output', help='common prefix for json and html output files')
+    parser.add_argument('-o', '--output', default='output', help='common prefix for json and html output files (with -b -c, - for stdout)')
+    parser.add_argument('-b', '--batch', action='store_true', help='render every url or json deal in the input file, one per line')
+    parser.add_argument('-c', '--combine', action='store_true', help='with -b, write all boards to a single html file')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='with -b, number of worker processes')
+    parser.add_argument('--chunksize', type=int, default=16, help='with -j, number of records sent to a worker at a time')
+    parser.add_argument('--cache', help='directory of previously parsed and rendered urls, shared between runs')
+    parser.add_argument('--store', help='sqlite database to add every deal to (see dealstore)')
+    parser.add_argument('--cache-size', type=int, default=100, help='with --cache, maximum size of the cache in megabytes')
+    parser.add_argument('--instrument', default=os.environ.get('HANDVIEWER_INSTRUMENT'), help='file to append timings of each stage, counters and cache hit rates to, as json lines (default $HANDVIEWER_INSTRUMENT)')
+    parser.add_argument('--profile', help='file to write cProfile statistics of the run to (read with pstats)')
     return parser.parse_args(argv)
  
 
 def main(args):
     assert '.' not in args.output, "Output file name should be prefix only" 
+    if args.tricks:
+        import ddsolver
+        if ddsolver.library() is None:
+            print("-t: libdds was not found, so each full deal takes minutes to solve (see ddsolver)", file=sys.stderr)
+    
+    if args.batch:
+        import batch
+        written, failed, seconds = batch.run(args)
+        rate = (written + failed) / seconds if seconds else 0
+        # keep the report out of the html when it is written to stdout
+        report = sys.stderr if args.output == '-' else sys.stdout
+        print(f"Html for {written} boards has been written to {args.output} ({failed} failed)", file=report)
+        print(f"{written + failed} deals in {seconds:.2f} seconds ({rate:.1f} deals/sec)", file=report)
+        return
     
+    import buildhtml
+    import json
+
     deal = {}
+    html = None
+    saved = None
     
     # build deal
-    if args.input == '**':
+    if args.input == '**' and os.path.exists(args.output + ".hva"):
+        import archive
+        with archive.Archive(args.output + ".hva") as deals:
+            deal = deals[0]
+    elif args.input == '**':
+        # saved by an older version, or a deal the archive cannot hold
         saveFile = open(args.output + ".json", "r")
         deal = json.load(saveFile)
         saveFile.close()
     else:
         saveFile = open(args.output + ".json", "w")
         if args.input == '*':
+            import inputdeal
             deal = inputdeal.inputDeal()
             json.dump(deal, saveFile)
-        elif re.match("http", args.input):
+        elif args.input.startswith("http") and args.cache:
+            # a repeated url skips parsing and building
+            import rendercache
+            saved, html = rendercache.fromArgs(args).render(args.input, args, buildhtml.build)
+            saveFile.write(saved)
+        elif args.input.startswith("http"):
+            import parseurl
             deal = parseurl.parse(args.input)
             json.dump(deal, saveFile)
         saveFile.close()
      
-    assert deal, 'Input must be *, **, or start with http'
+    assert deal or html is not None, 'Input must be *, **, or start with http'
     
-    # build the html
-    html = buildhtml.build(deal, args)
-   
-    # write it to the specified file
+    if args.input != '**':
+        # for the next **
+        import archive
+        archive.save(args.output + ".hva", deal or json.loads(saved))
+
+    if args.store and args.input != '**':
+        import dealstore
+        store = dealstore.DealStore(args.store)
+        try:
+            store.add(deal or json.loads(saved))
+        except Exception as e:
+            # the html is written all the same
+            print(f"Deal not stored: {type(e).__name__}: {e}", file=sys.stderr)
+        store.close()
+    
+    # build the html and write it to the specified file
     f = open(args.output + ".html", 'w')
-    f.write(html)
+    if args.instrument:
+        # so the write stage counts only the file I/O, not the building of what is written
+        import instrument
+        f = instrument.timedFile(f)
+    if html is None:
+        buildhtml.writeDeals([deal], args, f)
+    else:
+        f.write(html)
     f.close()
     
     print(f"Html has been written to {args.output}")
   
     
 if __name__ == '__main__':
-    main(parse_args(sys.argv[1:]))
+    args = parse_args(sys.argv[1:])
+    if args.instrument:
+        import instrument
+        instrument.enable()
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.runcall(main, args)
+        profiler.dump_stats(args.profile)
+    else:
+        main(args)
+    if args.instrument:
+        instrument.report(args.instrument, ' '.join(sys.argv[1:]))
 
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Fetches many BBO pages at once (sessions, travellers, or anything else that links to boards), finds the handviewer
+links in them and renders each board, in a single asyncio event loop.
+
+    fetcher = Fetcher(HttpTransport(), limit=8, retries=3, cache='pages')
+    pages = asyncio.run(fetcher.fetchAll(urls))                 # {url: text}, in the order of urls
+    for link, deal in boards(pages):                            # each board once, through parseurl.parse
+        html = buildhtml.build(deal, args)
+
+    rendered = asyncio.run(ingest(urls, args))                  # [(link, html)] for every board of every page
+
+A transport is anything with
+    async request(url) -> (status, headers, body)     headers as a dictionary with lower case names, body as bytes
+    async close()
+HttpTransport speaks http/1.1 (https through ssl) over asyncio streams and keeps the connections it has opened to each host,
+so the pages of one site are fetched over a few kept-alive connections rather than one connection each.
+MappingTransport answers from a dictionary of pages, so the whole stage runs offline (or against a local server,
+since HttpTransport takes any http url).
+
+The Fetcher
+    sends at most limit requests at once (the others wait their turn),
+    follows redirects (up to maxRedirects),
+    tries a request again when it fails (a connection error, a timeout, a 5xx or 429 status) up to retries times,
+        waiting backoff, 2 * backoff, 4 * backoff, ... seconds in between,
+    with cache (a directory), keeps each page on disk (see rendercache) and reads it from there the next time.
+A page that still cannot be fetched is reported on stderr and left out; the rest of the run continues.
+
+Links are found in href and src attributes and in javascript strings (handviewer.html?lin=..., url encoded or not),
+and in BBO's hv_popuplin('...') calls, which give the lin itself. A page that is lin (e.g. from fetchlin.php) is read
+as a lin file, one board per board in it (see linfile).
+Likewise a board that cannot be parsed or built is reported on stderr and left out, and the other boards are kept.
+
+    python ingest.py <file of page urls> [-o output] [--limit 8] [--retries 3] [--cache dir] [-n -e -s -w -a -r n]
+        writes every link found to <output>.txt (one per line, for handviewer.py -b) and the boards to <output>.html
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import buildhtml
+import hashlib
+import html
+import io
+import linfile
+import parseurl
+import re
+import ssl
+import sys
+import urllib.parse
+
+from collections.abc import Iterable, Iterator
+
+
+handviewerUrl = 'https://www.bridgebase.com/tools/handviewer.html?lin='
+linkPattern = re.compile(r'''["']([^"'<>\s]*handviewer\.html\?[^"'<>\s]*lin=[^"'<>\s]*)["']''', re.IGNORECASE)
+popupPattern = re.compile(r'''hv_popuplin\(\s*(["'])(.*?)\1''', re.IGNORECASE)
+linStart = re.compile(r'\s*[a-z]{2}\|', re.IGNORECASE)
+redirects = (301, 302, 303, 307, 308)
+
+
+class HttpTransport:
+    def __init__(self, timeout: float = 30.0, userAgent: str = 'handviewer'):
+        self.timeout = timeout
+        self.userAgent = userAgent
+        # idle connections, by (scheme, host, port)
+        self.idle: dict[tuple[str, str, int], list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self.opened = 0
+        self.sslContext = None
+
+    async def connect(self, scheme: str, host: str, port: int) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        # an idle connection to the host if there is one, otherwise a new one
+        connections = self.idle.get((scheme, host, port))
+        while connections:
+            reader, writer = connections.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        if scheme == 'https' and self.sslContext is None:
+            self.sslContext = ssl.create_default_context()
+        self.opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(host, port, ssl=self.sslContext if scheme == 'https' else None), self.timeout)
+
+    async def request(self, url: str) -> tuple[int, dict[str, str], bytes]:
+        parts = urllib.parse.urlsplit(url)
+        assert parts.scheme in ('http', 'https'), f"{url} is not an http or https url"
+        host = parts.hostname
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        target = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        reader, writer = await self.connect(parts.scheme, host, port)
+        try:
+            status, headers, body = await asyncio.wait_for(self.exchange(reader, writer, parts.netloc, target), self.timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if headers.get('connection', '').lower() == 'close' or reader.at_eof():
+            writer.close()
+        else:
+            self.idle.setdefault((parts.scheme, host, port), []).append((reader, writer))
+        return status, headers, body
+
+    async def exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, netloc: str, target: str) -> tuple[int, dict[str, str], bytes]:
+        # send one GET and read the whole response
+        writer.write((f'GET {target} HTTP/1.1\r\nHost: {netloc}\r\nUser-Agent: {self.userAgent}\r\n'
+                      f'Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ', 2)[1])
+        headers = dict([(name.strip().lower(), value.strip()) for name, value in
+                        [line.split(':', 1) for line in lines[1:] if ':' in line]])
+        if lines[0].startswith('HTTP/1.0') and headers.get('connection', '').lower() != 'keep-alive':
+            # an http/1.0 server closes the connection after each response
+            headers['connection'] = 'close'
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    # trailers, up to the blank line
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            # the body runs to the end of the connection
+            body = await reader.read()
+            headers['connection'] = 'close'
+        return status, headers, body
+
+    async def close(self):
+        for connections in self.idle.values():
+            for reader, writer in connections:
+                writer.close()
+        self.idle.clear()
+
+
+class MappingTransport:
+    # pages from a dictionary: url -> body (str or bytes), or -> (status, body), or -> a list of those, answered in turn
+    # (the last one again once the list is used up); any other url is 404
+    def __init__(self, pages: dict[str, object]):
+        self.pages = pages
+        self.requests: list[str] = []
+
+    async def request(self, url: str) -> tuple[int, dict[str, str], bytes]:
+        self.requests.append(url)
+        response = self.pages.get(url, (404, b''))
+        if isinstance(response, list):
+            response = response[min(self.requests.count(url), len(response)) - 1]
+        status, body = response if isinstance(response, tuple) else (200, response)
+        headers = { 'location': body } if status in redirects else {}
+        return status, headers, body.encode('utf-8') if isinstance(body, str) else body
+
+    async def close(self):
+        pass
+
+
+def decode(headers: dict[str, str], body: bytes) -> str:
+    # the body as text, in the charset of its content type (utf-8 if none is given)
+    match = re.search(r'charset=([\w-]+)', headers.get('content-type', ''), re.IGNORECASE)
+    try:
+        return body.decode(match.group(1) if match else 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+class Fetcher:
+    def __init__(self, transport=None, limit: int = 8, retries: int = 3, backoff: float = 0.5, cache: str | None = None,
+                 maxRedirects: int = 5):
+        self.transport = transport if transport is not None else HttpTransport()
+        self.limit = asyncio.Semaphore(limit)
+        self.retries = retries
+        self.backoff = backoff
+        self.maxRedirects = maxRedirects
+        if cache:
+            import rendercache
+            self.cache = rendercache.Cache(cache)
+        else:
+            self.cache = None
+        self.fetched = 0
+        self.retried = 0
+
+    def cacheKey(self, url: str) -> str:
+        return hashlib.sha256(('page\0' + url).encode('utf-8')).hexdigest()
+
+    async def fetch(self, url: str) -> str:
+        # the text of the page at url; raises OSError if it cannot be fetched
+        if self.cache is not None:
+            text = self.cache.read(self.cacheKey(url), '.html')
+            if text is not None:
+                return text
+        async with self.limit:
+            text = await self.get(url)
+        self.fetched += 1
+        if self.cache is not None:
+            self.cache.write(self.cacheKey(url), '.html', text)
+        return text
+
+    async def get(self, url: str) -> str:
+        location = url
+        redirected = 0
+        attempt = 0
+        while True:
+            try:
+                status, headers, body = await self.transport.request(location)
+            except (OSError, EOFError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                error = OSError(f'{location}: {type(e).__name__}: {e}')
+            else:
+                if status == 200:
+                    return decode(headers, body)
+                if status in redirects and 'location' in headers and redirected < self.maxRedirects:
+                    location = urllib.parse.urljoin(location, headers['location'])
+                    redirected += 1
+                    continue
+                error = OSError(f'{location}: HTTP {status}')
+                if status < 500 and status != 429:
+                    raise error
+            if attempt >= self.retries:
+                raise error
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+            self.retried += 1
+
+    async def fetchAll(self, urls: Iterable[str]) -> dict[str, str]:
+        # every page that could be fetched, in the order of urls; the others are reported on stderr
+        urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*[self.fetch(url) for url in urls], return_exceptions=True)
+        pages = {}
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                print(result, file=sys.stderr)
+            else:
+                pages[url] = result
+        return pages
+
+    async def close(self):
+        await self.transport.close()
+
+
+def isLin(text: str) -> bool:
+    # a lin file rather than a web page: it starts with a tag, e.g. 'qx|o1|' or 'pn|...'
+    return bool(linStart.match(text))
+
+def extractLinks(text: str, base: str = '') -> list[str]:
+    # the handviewer urls in a page, in the order they appear, each once
+    links = [urllib.parse.urljoin(base, html.unescape(match.group(1))) for match in linkPattern.finditer(text)]
+    links += [handviewerUrl + html.unescape(match.group(2)) for match in popupPattern.finditer(text)]
+    return list(dict.fromkeys(links))
+
+def boards(pages: dict[str, str]) -> Iterator[tuple[str, dict]]:
+    # (link, deal) for each board in the pages, through parseurl.parse (or linfile for a lin page)
+    # a board that cannot be parsed is reported on stderr and skipped
+    seen = set()
+    for url, text in pages.items():
+        if isLin(text):
+            for n, tokens in enumerate(linfile.readBoards(io.StringIO(text)), 1):
+                try:
+                    deal = parseurl.dealFromTokens(tokens)
+                except Exception as e:
+                    print(f'{url} board {n}: {type(e).__name__}: {e}', file=sys.stderr)
+                    continue
+                yield url, deal
+            continue
+        for link in extractLinks(text, url):
+            if link in seen:
+                continue
+            seen.add(link)
+            try:
+                deal = parseurl.parse(link)
+            except Exception as e:
+                print(f'{link}: {type(e).__name__}: {e}', file=sys.stderr)
+                continue
+            yield link, deal
+
+def render(found: Iterable[tuple[str, dict]], args) -> Iterator[tuple[str, str]]:
+    # (link, html) for each (link, deal); a board that cannot be built is reported on stderr and skipped
+    for link, deal in found:
+        try:
+            yield link, buildhtml.build(deal, args)
+        except Exception as e:
+            print(f'{link}: {type(e).__name__}: {e}', file=sys.stderr)
+
+async def ingest(urls: Iterable[str], args, transport=None, **options) -> list[tuple[str, str]]:
+    # (link, html) for every board of every page; options are those of Fetcher
+    fetcher = Fetcher(transport, **options)
+    try:
+        pages = await fetcher.fetchAll(urls)
+    finally:
+        await fetcher.close()
+    return list(render(boards(pages), args))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Page Ingestion', )
+    parser.add_argument('input', help='file of page urls, one per line (- for stdin)')
+    parser.add_argument('-o', '--output', default='ingested', help='common prefix for the txt (links) and html output files')
+    parser.add_argument('--limit', type=int, default=8, help='number of pages fetched at once')
+    parser.add_argument('--retries', type=int, default=3, help='number of times a failed page is tried again')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds to wait for a page')
+    parser.add_argument('--cache', help='directory to keep fetched pages in, shared between runs')
+    parser.add_argument('-n', '--north', action='store_true', help='print North hand')
+    parser.add_argument('-e', '--east', action='store_true', help='print East hand')
+    parser.add_argument('-s', '--south', action='store_true', help='print South hand')
+    parser.add_argument('-w', '--west', action='store_true', help='print West hand')
+    parser.add_argument('-a', '--auction', action='store_true', help='print auction')
+    parser.add_argument('-r', '--rotate', type=int, help='number of seats to rotate clockwise')
+    return parser.parse_args(argv)
+
+async def main(args):
+    f = sys.stdin if args.input == '-' else open(args.input, 'r')
+    urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if f is not sys.stdin:
+        f.close()
+    fetcher = Fetcher(HttpTransport(args.timeout), args.limit, args.retries, cache=args.cache)
+    try:
+        pages = await fetcher.fetchAll(urls)
+    finally:
+        await fetcher.close()
+
+    found = list(boards(pages))
+    with open(args.output + '.txt', 'w') as f:
+        f.writelines(link + '\n' for link, deal in found if link not in pages)
+    written = 0
+    with open(args.output + '.html', 'w') as f:
+        # one board at a time, as buildhtml.writeDeals writes them
+        for link, page in render(found, args):
+            f.write(('<br />\n' if written else '') + page)
+            written += 1
+    print(f'{len(pages)} of {len(urls)} pages fetched ({fetcher.retried} retries), {written} boards written to {args.output}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args(sys.argv[1:])))
@@ -20,13 +20,12 @@ The input method of this module asks for input from the user and returns a dicti
                 ]
       }
 """
-import globals
+from __future__ import annotations
 
-from typing import List
+import globals
 
-globals.initialize()
 
-def inputHands() -> List[dict]:
+def inputHands() -> list[dict]:
     seats = []
     for direction in globals.directions:
         name = input(f"{direction} name (or leave blank): ")
@@ -39,7 +38,7 @@ def inputHands() -> List[dict]:
             seats[-1]["Hand"] = globals.buildHand(hand.upper().split(','))
     return seats
 
-def inputAuction() -> List[str]:
+def inputAuction() -> list[str]:
     return(input("Enter auction (S, H, D, C, N, P, D, R), comma delimited: ").upper().split(','))
 
 
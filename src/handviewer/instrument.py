@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Optional timings of each stage of parsing, rendering and writing, with counters and cache hit rates.
+
+Nothing is measured unless enable is called (handviewer.py does so for --instrument <file> or the environment variable
+HANDVIEWER_INSTRUMENT=<file>). enable replaces the functions of each stage with timed versions, so when it is not called
+the code runs exactly as it would without this module.
+
+    stage               functions timed
+    tokenize            parseurl.tokenize, linfile.readBoards
+    extract hands       parseurl.handsFromTokens
+    extract players     parseurl.playersFromTokens
+    extract auction     parseurl.auctionFromTokens
+    format hands        buildhtml.formatHand
+    format auction      buildhtml.auctionTableChunks
+    solve               ddsolver.trickTable (with -t)
+    write               batch.writeBoard, and the writes to an html file given to timedFile (the combined file of -b -c,
+                        or the one html file of a single deal): only the file I/O, not the formatting of what is written
+
+report appends one json line per run to the file: the stages (calls and seconds), counters, and the hit counts of
+buildhtml's caches and any rendercache in use.
+"""
+from __future__ import annotations
+
+import functools
+import time
+
+
+
+stages = {
+    'tokenize': [('parseurl', 'tokenize'), ('linfile', 'readBoards')],
+    'extract hands': [('parseurl', 'handsFromTokens')],
+    'extract players': [('parseurl', 'playersFromTokens')],
+    'extract auction': [('parseurl', 'auctionFromTokens')],
+    'format hands': [('buildhtml', 'formatHand')],
+    'format auction': [('buildhtml', 'auctionTableChunks')],
+    'solve': [('ddsolver', 'trickTable')],
+    'write': [('batch', 'writeBoard')]
+    }
+
+enabled = False
+timings: dict[str, list] = {}
+counters: dict[str, int] = {}
+
+
+def timed(name: str, f):
+    # f, recording the number of calls and the time spent in timings[name]
+    # for a generator, only the time spent producing its items is counted
+    import inspect
+    record = timings.setdefault(name, [0, 0.0])
+    if inspect.isgeneratorfunction(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            record[0] += 1
+            items = f(*args, **kwargs)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    record[1] += time.perf_counter() - start
+                    return
+                record[1] += time.perf_counter() - start
+                yield item
+    else:
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            record[0] += 1
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                record[1] += time.perf_counter() - start
+    wrapper.untimed = f
+    return wrapper
+
+class TimedFile:
+    # a file whose write, flush and close calls are timed as the write stage
+    def __init__(self, f):
+        self.f = f
+        self.record = timings.setdefault('write', [0, 0.0])
+
+    def timedCall(self, method, *args):
+        self.record[0] += 1
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.record[1] += time.perf_counter() - start
+
+    def write(self, text: str) -> int:
+        return self.timedCall(self.f.write, text)
+
+    def flush(self):
+        self.timedCall(self.f.flush)
+
+    def close(self):
+        self.timedCall(self.f.close)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+def timedFile(f):
+    # f, with its writes timed if instrumenting is enabled
+    return TimedFile(f) if enabled else f
+
+def enable():
+    # time every stage from now on (in this process, and in worker processes that call enable too)
+    import importlib
+    global enabled
+    if enabled:
+        return
+    enabled = True
+    for name, functions in stages.items():
+        for moduleName, functionName in functions:
+            module = importlib.import_module(moduleName)
+            setattr(module, functionName, timed(name, getattr(module, functionName)))
+
+def count(name: str, n: int = 1):
+    if enabled:
+        counters[name] = counters.get(name, 0) + n
+
+def take() -> dict | None:
+    # the timings and counters so far, which are then cleared (for worker processes to send back with their results)
+    if not enabled:
+        return None
+    taken = { 'stages': dict([(name, list(record)) for name, record in timings.items() if record[0]]), 'counters': dict(counters) }
+    for record in timings.values():
+        record[:] = [0, 0.0]
+    counters.clear()
+    return taken
+
+def merge(taken: dict | None):
+    # add the timings and counters from take (in another process) to this one's
+    if not taken:
+        return
+    for name, (calls, seconds) in taken['stages'].items():
+        record = timings.setdefault(name, [0, 0.0])
+        record[0] += calls
+        record[1] += seconds
+    for name, n in taken['counters'].items():
+        count(name, n)
+
+def report(path: str, label: str = ''):
+    # append this run's results to path as a json line
+    import buildhtml
+    import json
+    import rendercache
+    caches = dict([(name, dict((key, info[key]) for key in ['hits', 'misses', 'currsize'])) for name, info in buildhtml.cacheInfo().items()])
+    for (directory, size), cache in rendercache.openCaches.items():
+        caches[f'rendercache {directory}'] = { 'hits': cache.hits, 'misses': cache.misses }
+    for info in caches.values():
+        lookups = info['hits'] + info['misses']
+        info['hit rate'] = info['hits'] / lookups if lookups else None
+    line = { 'run': label, 'time': time.time(),
+             'stages': dict([(name, { 'calls': calls, 'seconds': seconds }) for name, (calls, seconds) in timings.items() if calls]),
+             'counters': counters, 'caches': caches }
+    with open(path, 'a') as f:
+        f.write(json.dumps(line) + '\n')
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+The readDeals method of this module reads a BBO .lin file (or any stream of lin) and yields one deal per board,
+in the format described in parseurl, so each can go straight to buildhtml.build:
+
+    with open('session.lin') as f:
+        for deal in linfile.readDeals(f):
+            html = buildhtml.build(deal, args)
+
+The file is read a line at a time, so memory use does not grow with the size of the file.
+Lines may be raw lin ('qx|o1|md|3S...|') or url encoded, including whole handviewer urls, one per line.
+
+A new board starts at each qx tag, or at a pn, st or md tag if the current board already has hands
+(as in BBO's 'pn|...|st||md|...|' records, where each board names its players before its hands).
+Tags that come before the first board (e.g. a pn tag naming the players for the whole session) apply to every board,
+and a board's pn tag carries over to the boards after it.
+"""
+from __future__ import annotations
+
+import parseurl
+import urllib.parse
+
+from collections.abc import Iterable, Iterator
+
+
+# tags that open a board, once the current board has its hands
+boardStart = ('pn', 'st', 'md')
+
+
+def decodeLine(line: str) -> str:
+    # strip the url from a handviewer link and undo url encoding; raw lin is returned as it is
+    match = parseurl.linStart.search(line)
+    if match:
+        lin = urllib.parse.unquote(line[match.end():].strip())
+        return lin if lin.endswith('|') else lin + '|'
+    if '%7C' in line or '%7c' in line:
+        return urllib.parse.unquote(line)
+    return line
+
+def readPairs(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    # yield (tag, value) for each key|value| pair, whichever lines they are spread over
+    pending = ''
+    for line in lines:
+        fields = (pending + decodeLine(line.rstrip('\r\n'))).split('|')
+        pending = fields.pop()
+        if len(fields) % 2:
+            pending = fields.pop() + '|' + pending
+        for tag, value in zip(fields[0::2], fields[1::2]):
+            yield tag.strip(), value
+
+def readBoards(f: Iterable[str]) -> Iterator[dict[str, list[str]]]:
+    # yield the tokens of each board (as parseurl.tokenize would return them)
+    # boards with no players named anywhere get seats without a Player
+    players = ',,,'
+    tokens = {'pn': [players]}
+    for tag, value in readPairs(f):
+        if tag == 'qx' or (tag in boardStart and 'md' in tokens):
+            if 'md' in tokens:
+                yield tokens
+            tokens = {'pn': [players]}
+        if tag == 'pn':
+            players = value
+            tokens['pn'] = [value]
+        else:
+            tokens.setdefault(tag, []).append(value)
+    if 'md' in tokens:
+        yield tokens
+
+def readDeals(f: Iterable[str]) -> Iterator[dict]:
+    # yield each board as a deal dictionary
+    return map(parseurl.dealFromTokens, readBoards(f))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Load test for server.py: opens a number of keep-alive connections and sends render requests over each of them,
+then prints the throughput and the p50 and p99 latency.
+
+    python loadtest.py [--host 127.0.0.1] [--port 8080] [--connections 16] [--requests 200] [--url <handviewer url>]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import parseurl
+import sys
+import time
+
+
+
+async def client(host: str, port: int, body: bytes, count: int, latencies: list[float]):
+    # send count requests over one connection, recording the time each takes
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (f'POST /render HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+               f'Content-Length: {len(body)}\r\n\r\n').encode('latin-1') + body
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = head.split(b' ', 2)[1]
+            assert status == b'200', f'Server returned {status.decode()}'
+            length = int([line.split(b':')[1] for line in head.split(b'\r\n') if line.lower().startswith(b'content-length')][0])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+async def run(args) -> dict:
+    body = json.dumps({ 'url': args.url, 'seats': 'NESW', 'auction': 1 }).encode('utf-8')
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(args.host, args.port, body, args.requests, latencies) for i in range(args.connections)])
+    seconds = time.perf_counter() - start
+    return { 'requests': len(latencies),
+             'requests/sec': len(latencies) / seconds,
+             'p50 (ms)': percentile(latencies, 50) * 1000,
+             'p99 (ms)': percentile(latencies, 99) * 1000
+            }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Server Load Test', )
+    parser.add_argument('--host', default='127.0.0.1', help='server address')
+    parser.add_argument('--port', type=int, default=8080, help='server port')
+    parser.add_argument('--connections', type=int, default=16, help='number of connections open at once')
+    parser.add_argument('--requests', type=int, default=200, help='number of requests sent over each connection')
+    parser.add_argument('--url', default=parseurl.sampleUrl, help='handviewer url to render')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    for measure, value in asyncio.run(run(parse_args(sys.argv[1:]))).items():
+        print(f'{measure:14} {value:10.2f}')
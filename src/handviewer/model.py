@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Compact classes for the deal dictionary described in parseurl and buildhtml, for holding many deals in memory.
+
+    Deal    board number, dealer, auction (a tuple of calls), a tuple of Seats, the play (a tuple of cards)
+            and claim, if any, and vulnerability
+    Seat    player, direction and Hand
+    Hand    the cards as a 52 bit mask: bit suit * 13 + rank, with suits in the order of globals.suits
+            and ranks from 0 for the 2 to 12 for the ace
+            small cards entered as 'x' (see inputdeal) are kept as a count per suit
+
+Deal.fromDict and Deal.toDict convert to and from the dictionary; a dictionary whose suits are written
+from the ace down (as BBO and inputdeal write them) comes back unchanged.
+Keys missing from the dictionary (e.g. a seat with no player) are stored as None and left out again by toDict.
+
+packCards and unpackCards store all four hands of a deal in 13 bytes, 2 bits per card giving the seat that holds it.
+"""
+from __future__ import annotations
+
+import functools
+import globals
+import sys
+
+from collections.abc import Sequence
+
+
+ranks = 'AKQJT98765432'
+rankBits = { rank: 12 - i for i, rank in enumerate(ranks) }
+
+
+@functools.lru_cache(maxsize=8192)
+def holdingBits(holding: str) -> tuple[int, int]:
+    # the 13 bit mask of a suit holding and its number of 'x' cards, e.g. 'AJTx' -> (0b1001100000000, 1)
+    # as buildhtml shows them, '10' is the ten and 'X' a spot card (inputdeal upper-cases them)
+    bits = spots = 0
+    for card in holding.upper().replace('10', 'T'):
+        if card == 'X':
+            spots += 1
+        else:
+            assert card in rankBits, f"{card} is not a rank"
+            bits |= 1 << rankBits[card]
+    return bits, spots
+
+@functools.lru_cache(maxsize=8192)
+def holdingString(bits: int) -> str:
+    # reverse of holdingBits (without the x's): the ranks of a 13 bit mask, ace first
+    return ''.join(rank for rank in ranks if bits >> rankBits[rank] & 1)
+
+# the low bit of each card's 2 bit field in packCards, and the steps that squeeze every other bit of a 104 bit value together
+evenBits = sum(1 << (2 * card) for card in range(52))
+compressSteps = [(shift, sum(((1 << (2 * shift)) - 1) << start for start in range(0, 128, 4 * shift))) for shift in (1, 2, 4, 8, 16, 32, 64)]
+
+
+class Hand:
+    __slots__ = ('mask', 'spots')
+
+    def __init__(self, mask: int = 0, spots: tuple[int, int, int, int] | None = None):
+        self.mask = mask
+        self.spots = spots
+
+    @classmethod
+    def fromDict(cls, hand: dict[str, str]) -> 'Hand':
+        # input {'Spades': 'T5', 'Hearts': 'AJ7', 'Diamonds': 'KQJ2', 'Clubs': 'AJT6'}
+        mask = 0
+        spots = []
+        for suitIndex, suit in enumerate(globals.suits):
+            bits, count = holdingBits(hand[suit])
+            mask |= bits << (suitIndex * 13)
+            spots.append(count)
+        return cls(mask, tuple(spots) if any(spots) else None)
+
+    def suit(self, suitIndex: int) -> str:
+        # holding in one suit, ace first, e.g. 'AJT6'
+        holding = holdingString(self.mask >> (suitIndex * 13) & 0x1FFF)
+        return holding + 'x' * self.spots[suitIndex] if self.spots else holding
+
+    def toDict(self) -> dict[str, str]:
+        return globals.buildHand([self.suit(i) for i in range(4)])
+
+    def __len__(self) -> int:
+        return bin(self.mask).count('1') + (sum(self.spots) if self.spots else 0)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Hand) and self.mask == other.mask and self.spots == other.spots
+
+    def __repr__(self) -> str:
+        return f'Hand({self.toDict()})'
+
+
+class Seat:
+    __slots__ = ('player', 'direction', 'hand')
+
+    def __init__(self, direction: str, player: str | None = None, hand: Hand | None = None):
+        self.direction = sys.intern(direction)
+        self.player = sys.intern(player) if player is not None else None
+        self.hand = hand
+
+    @classmethod
+    def fromDict(cls, seat: dict) -> 'Seat':
+        hand = seat.get('Hand')
+        return cls(seat['Direction'], seat.get('Player'), Hand.fromDict(hand) if hand is not None else None)
+
+    def toDict(self) -> dict:
+        # keys in the order parseurl writes them
+        seat = {}
+        if self.player is not None:
+            seat['Player'] = self.player
+        seat['Direction'] = self.direction
+        if self.hand is not None:
+            seat['Hand'] = self.hand.toDict()
+        return seat
+
+    def __repr__(self) -> str:
+        return f'Seat({self.toDict()})'
+
+
+class Deal:
+    __slots__ = ('boardNumber', 'dealer', 'auction', 'seats', 'play', 'claim', 'vulnerability')
+
+    def __init__(self, seats: Sequence[Seat], boardNumber: int | None = None, dealer: str | None = None,
+                 auction: Sequence[str] | None = None, play: Sequence[str] | None = None, claim: int | None = None,
+                 vulnerability: str | None = None):
+        self.seats = tuple(seats)
+        self.boardNumber = boardNumber
+        self.dealer = sys.intern(dealer) if dealer is not None else None
+        self.auction = tuple(map(sys.intern, auction)) if auction is not None else None
+        self.play = tuple(map(sys.intern, play)) if play is not None else None
+        self.claim = claim
+        self.vulnerability = sys.intern(vulnerability) if vulnerability is not None else None
+
+    @classmethod
+    def fromDict(cls, deal: dict) -> 'Deal':
+        return cls([Seat.fromDict(seat) for seat in deal.get('Seats', [])],
+                   deal.get('Board number'), deal.get('Dealer'), deal.get('Auction'), deal.get('Play'), deal.get('Claim'),
+                   deal.get('Vulnerability'))
+
+    def toDict(self) -> dict:
+        # a new dictionary every time, so buildhtml.build can rotate it without changing the Deal
+        deal = {}
+        if self.boardNumber is not None:
+            deal['Board number'] = self.boardNumber
+        if self.dealer is not None:
+            deal['Dealer'] = self.dealer
+        if self.auction is not None:
+            deal['Auction'] = list(self.auction)
+        deal['Seats'] = [seat.toDict() for seat in self.seats]
+        if self.play is not None:
+            deal['Play'] = list(self.play)
+        if self.claim is not None:
+            deal['Claim'] = self.claim
+        if self.vulnerability is not None:
+            deal['Vulnerability'] = self.vulnerability
+        return deal
+
+    def seat(self, direction: str) -> Seat | None:
+        for seat in self.seats:
+            if seat.direction == direction:
+                return seat
+        return None
+
+    def packCards(self) -> bytes:
+        # the four hands in 13 bytes (see packCards below)
+        return packCards([getattr(self.seat(direction), 'hand', None) for direction in globals.directions])
+
+    def __repr__(self) -> str:
+        return f'Deal({self.toDict()})'
+
+
+def packCards(hands: list[Hand]) -> bytes:
+    # hands in the order of globals.directions (West first); together they must hold all 52 cards
+    # card n (the bit numbering of Hand) is held by the seat in bits 2 * (n % 4) of byte n // 4
+    assert len(hands) == 4 and all(hand is not None and not hand.spots for hand in hands), "packCards needs all four hands in full"
+    assert sum(len(hand) for hand in hands) == 52 and hands[0].mask | hands[1].mask | hands[2].mask | hands[3].mask == (1 << 52) - 1, \
+        "Hands must hold each card exactly once"
+    packed = 0
+    for seatIndex, hand in enumerate(hands):
+        mask = hand.mask
+        while mask:
+            card = (mask & -mask).bit_length() - 1
+            packed |= seatIndex << (2 * card)
+            mask &= mask - 1
+    return packed.to_bytes(13, 'little')
+
+def compress(spread: int) -> int:
+    # bits 0, 2, 4, ... of spread as bits 0, 1, 2, ...
+    for shift, mask in compressSteps:
+        spread = (spread | spread >> shift) & mask
+    return spread
+
+def unpackMasks(packed: bytes) -> list[int]:
+    # the Hand.mask of each seat in packed, in the order of globals.directions
+    value = int.from_bytes(packed, 'little')
+    low = value & evenBits
+    high = value >> 1 & evenBits
+    return [compress(evenBits & ~(low | high)), compress(low & ~high), compress(high & ~low), compress(low & high)]
+
+def unpackCards(packed: bytes) -> list[Hand]:
+    # reverse of packCards: four Hands in the order of globals.directions
+    return [Hand(mask) for mask in unpackMasks(packed)]
@@ -16,15 +16,33 @@ The parse method of this module takes a BBO handviewer url, parses it, and retur
                             }
                     },
                     ...
-                ]
+                ],
+        "Play": <the cards played, in order, eg. ['S4', 'SA', 'S2', 'S3', 'HK'] (only if any were played) >
+        "Claim": <the number of tricks declarer claimed in all (only if there was a claim) >
+        "Vulnerability": <"None", "NS", "EW", or "Both" (only if the lin gives it) >
       }
+
+tokenize walks the key|value| pairs of the lin string once and returns the values of every tag
+(md, pn, sv, ah, mb, an, pc, mc, ...) in the order they appear. parse uses it instead of scanning the url once per field;
+the extract functions below still work on a url by themselves.
+
+parse(url, compact=True) returns the deal as a model.Deal instead.
 """
+from __future__ import annotations
 
 import globals
+import model
 import re
 
-globals.initialize()
-    
+from collections.abc import Iterator
+
+linStart = re.compile('[?&]lin=')
+callPattern = re.compile('([1-7SHDCNRP]+)(?:!|$)')
+boardPattern = re.compile('Board(.*)')
+ranks = 'AKQJT98765432'
+# the values of the sv tag
+vulnerabilities = { 'o': 'None', '0': 'None', '-': 'None', 'n': 'NS', 'e': 'EW', 'b': 'Both' }
+
 def splitSuits(hand: str) -> list:
     # input 'S96432HKQ94DT5C73' (possibly with an integer preceding the S)
     # output ['96432', 'KQ9', 'T5', '73']
@@ -55,9 +73,14 @@ def extractPlayers(url: str) -> list:
     # players whose names start with ~ are robots
     playersMatch = re.findall(".*?[\|=]pn\|(.*?)\|", url)
     assert len(playersMatch) > 0, "No players"
-    players = playersMatch[0].split(',')
+    return namePlayers(playersMatch[0])
+
+def namePlayers(pn: str) -> list:
+    # input '~Mwest,PSMartin' (the value of the pn tag)
+    # output ['Robot', 'Phillip']
+    players = pn.split(',')
     for i in range(len(players)):
-        if players[i][0] == '~':
+        if players[i][:1] == '~':
             players[i] = 'Robot'
         elif players[i] == 'PSMartin':
             players[i] = 'Phillip'
@@ -69,15 +92,77 @@ def extractAuction(url: str) -> list:
     assert len(auction) > 0, "No auction"
     return auction
 
-def parse(url: str) -> dict:
-    #print('***entering parseurl***')
-    #print(f'url:{url}')
-    
-    boardNumber = extractBoardNumber(url)
-    hands = extractHands(url)
+def tokenizePairs(url: str) -> Iterator[tuple[str, str]]:
+    # yield (tag, value) for each key|value| pair of the lin string, in order
+    # input '...handviewer.html?lin=st||pn|PSMartin,~Mwest|md|2SAK5...|'
+    # output ('st', ''), ('pn', 'PSMartin,~Mwest'), ('md', '2SAK5...'), ...
+    match = linStart.search(url)
+    fields = url[match.end():].split('|') if match else url.split('|')
+    return zip(fields[0::2], fields[1::2])
+
+def tokenize(url: str) -> dict[str, list[str]]:
+    # collect the values of each tag, in order
+    # output {'st': [''], 'pn': ['PSMartin,~Mwest,~Mnorth,~Meast'], 'md': [...], 'mb': ['P', '1N', ...], 'pc': ['S4', 'SA', ...], ...}
+    tokens = {}
+    for tag, value in tokenizePairs(url):
+        tokens.setdefault(tag, []).append(value)
+    return tokens
+
+def boardNumberFromTokens(tokens: dict[str, list[str]]) -> int:
+    # same result as extractBoardNumber, from the ah tag(s)
+    # lin files may only number the board in the qx tag, e.g. 'o12' (open room, board 12)
+    for heading in tokens.get('ah', []):
+        boardMatch = boardPattern.search(heading)
+        if boardMatch:
+            return int(boardMatch.group(1)[-2:])
+    for room in tokens.get('qx', []):
+        if room[1:].isdigit():
+            return int(room[1:])
+    return 0
+
+def completeHands(hands: list[str]) -> list[str]:
+    # lin files often leave the fourth hand out ('3S..,S..,S..,'); it holds whatever cards the other three don't
+    # input  ['3SAK5HKT43DK7CAK62', 'SJ962H9DQ984CT754', 'SQ73HAQJ52DAJ5CJ9', '']
+    # output ['3SAK5HKT43DK7CAK62', 'SJ962H9DQ984CT754', 'SQ73HAQJ52DAJ5CJ9', 'ST84H876DT632CQ83']
+    if len(hands) != 4 or [hand for hand in hands if not hand] != [hands[-1]]:
+        return hands
+    held = [''.join(suit) for suit in zip(*[splitSuits(hand) for hand in hands[:3]])]
+    return hands[:3] + [''.join(letter + ''.join(rank for rank in ranks if rank not in cards) for letter, cards in zip('SHDC', held))]
+
+def handsFromTokens(tokens: dict[str, list[str]]) -> list:
+    assert 'md' in tokens, "No hands"
+    return completeHands(tokens['md'][0].split(','))
+
+def playersFromTokens(tokens: dict[str, list[str]]) -> list:
+    assert 'pn' in tokens, "No players"
+    return namePlayers(tokens['pn'][0])
+
+def auctionFromTokens(tokens: dict[str, list[str]]) -> list:
+    # alerted calls ('3S!') lose the alert mark; lin files often write calls in lower case ('p')
+    auction = [callMatch.group(1) for callMatch in map(callPattern.match, map(str.upper, tokens.get('mb', []))) if callMatch]
+    assert len(auction) > 0, "No auction"
+    return auction
+
+def playFromTokens(tokens: dict[str, list[str]]) -> tuple[list[str], int | None]:
+    # the cards of the pc tags and the tricks of the last mc tag (None if there is no claim)
+    # lin files may write cards in lower case ('s4'); replay checks the play against the hands
+    play = [card.upper() for card in tokens.get('pc', []) if card]
+    claims = [claim for claim in tokens.get('mc', []) if claim.isdigit()]
+    return play, int(claims[-1]) if claims else None
+
+def vulnerabilityFromTokens(tokens: dict[str, list[str]]) -> str | None:
+    # input {'sv': ['n'], ...}
+    # output 'NS'
+    values = tokens.get('sv', [])
+    return vulnerabilities.get(values[0].strip().lower()) if values else None
+
+def dealFromTokens(tokens: dict[str, list[str]]) -> dict:
+    # build the deal dictionary from the tokens of one board
+    boardNumber = boardNumberFromTokens(tokens)
+    hands = handsFromTokens(tokens)
     dealer = extractDealer(hands[0])
-    players = extractPlayers(url)
-    auction = extractAuction(url)
+    players = playersFromTokens(tokens)
+    auction = auctionFromTokens(tokens)
     
     # combine players names, directions, and hands into a list of tuples
     # example of an item in the list: ('PSMartin', 'South', {'Spades': 'T5', 'Hearts': 'AJ7', 'Diamonds': 'KQJ2', 'Clubs': 'AJT6'})
@@ -86,14 +171,37 @@ def parse(url: str) -> dict:
     
     # convert list of tuples into a list of dictionaries
     handsList = [dict(zip(["Player", "Direction", "Hand"], item)) for item in handsZip]
+    for seat in handsList:
+        if not seat["Player"]:
+            del seat["Player"]
     
     # combine all the above into into a single dictionary
-    return  { "Board number" : boardNumber,
+    deal = { "Board number" : boardNumber,
                  "Dealer" : globals.directions[dealer],
                  "Auction" : auction,
                  "Seats" : handsList
              }
+    
+    # the play, if any, after the seats
+    play, claim = playFromTokens(tokens)
+    if play:
+        deal["Play"] = play
+    if claim is not None:
+        deal["Claim"] = claim
+    vulnerability = vulnerabilityFromTokens(tokens)
+    if vulnerability is not None:
+        deal["Vulnerability"] = vulnerability
+    return deal
+
+def parse(url: str, compact: bool = False):
+    #print('***entering parseurl***')
+    #print(f'url:{url}')
+    # if compact is specified, returns a model.Deal instead of a dictionary
+    deal = dealFromTokens(tokenize(url))
+    return model.Deal.fromDict(deal) if compact else deal
  
+sampleUrl = "https://www.bridgebase.com/tools/handviewer.html?lin=st||pn|PSMartin,~Mwest,~Mnorth,~Meast|md|2SAK5HKT43DK7CAK62,SJ962H9DQ984CT754,SQ73HAQJ52DAJ5CJ9,ST84H876DT632CQ83|sv|n|rh||ah|Board%2012|mb|P|mb|1N|an|notrump%20opener.%20Could%20have%205M.%20--%202-5%20!C;%202-5%20!D;%202-5%20!H;%202-5%20!S;%2015-17%20HCP;%2018-%20total%20points|mb|P|mb|2C|an|Stayman%20--%20%20|mb|P|mb|2H|an|2-5%20!C;%202-5%20!D;%204-5%20!H;%202-4%20!S;%2015-17%20HCP;%2018-%20total%20points|mb|P|mb|3S!|an|forcing%20H%20raise%20--%202+%20!C;%202+%20!D;%204+%20!H;%2015+%20total%20points|mb|P|mb|4D|an|Cue%20bid%20--%202-5%20!C;%202-5%20!D;%204-5%20!H;%202-4%20!S;%2015-17%20HCP;%20no%20!CA;%20!DA;%2018-%20total%20points|mb|P|mb|4N|an|Blackwood%20(H)%20--%202+%20!C;%202+%20!D;%204+%20!H;%2017+%20total%20points|mb|P|mb|5S|an|Two%20or%20five%20key%20cards;%20queen%20--%202-5%20!C;%202-5%20!D;%204-5%20!H;%202-4%20!S;%2015-17%20HCP;%20no%20!CA;%20!DA;%20!HQ;%2018-%20total%20points|mb|P|mb|7H|an|2+%20!C;%202+%20!D;%204+%20!H;%2021+%20total%20points|mb|P|mb|P|mb|P|pc|S4|pc|SA|pc|S2|pc|S3|pc|HK|pc|H9|pc|H2|pc|H6|mc|13|"
+
 # for testing          
 if __name__ == '__main__': 
-    print (parse("https://www.bridgebase.com/tools/handviewer.html?lin=st||pn|PSMartin,~Mwest,~Mnorth,~Meast|md|2SAK5HKT43DK7CAK62,SJ962H9DQ984CT754,SQ73HAQJ52DAJ5CJ9,ST84H876DT632CQ83|sv|n|rh||ah|Board%2012|mb|P|mb|1N|an|notrump%20opener.%20Could%20have%205M.%20--%202-5%20!C;%202-5%20!D;%202-5%20!H;%202-5%20!S;%2015-17%20HCP;%2018-%20total%20points|mb|P|mb|2C|an|Stayman%20--%20%20|mb|P|mb|2H|an|2-5%20!C;%202-5%20!D;%204-5%20!H;%202-4%20!S;%2015-17%20HCP;%2018-%20total%20points|mb|P|mb|3S!|an|forcing%20H%20raise%20--%202+%20!C;%202+%20!D;%204+%20!H;%2015+%20total%20points|mb|P|mb|4D|an|Cue%20bid%20--%202-5%20!C;%202-5%20!D;%204-5%20!H;%202-4%20!S;%2015-17%20HCP;%20no%20!CA;%20!DA;%2018-%20total%20points|mb|P|mb|4N|an|Blackwood%20(H)%20--%202+%20!C;%202+%20!D;%204+%20!H;%2017+%20total%20points|mb|P|mb|5S|an|Two%20or%20five%20key%20cards;%20queen%20--%202-5%20!C;%202-5%20!D;%204-5%20!H;%202-4%20!S;%2015-17%20HCP;%20no%20!CA;%20!DA;%20!HQ;%2018-%20total%20points|mb|P|mb|7H|an|2+%20!C;%202+%20!D;%204+%20!H;%2021+%20total%20points|mb|P|mb|P|mb|P|pc|S4|pc|SA|pc|S2|pc|S3|pc|HK|pc|H9|pc|H2|pc|H6|mc|13|"))
+    print (parse(sampleUrl))
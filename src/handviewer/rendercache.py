@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+An on-disk cache of parsed deals and rendered html, shared by every process that uses the same directory.
+
+Entries are named by a sha256 hash of their content:
+    the deal (as json) by the hash of the normalized lin of the url
+    the html by the hash of the normalized lin plus the render options (seats, auction, rotate, tricks, play)
+so the same board given in a different url (other parameters, url encoded or not) is found again.
+
+Each entry is written to a temporary file and renamed into place, so a reader never sees a partly written file.
+Reading an entry updates its modification time. The size of every entry is added to a running total (the file size) as it is written;
+whenever a write takes the total beyond maxBytes, the entries read least recently are removed and the total is counted again.
+Writers update the total one at a time (where file locking is available); a file removed while another process reads it is just a miss.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import parseurl
+import tempfile
+import urllib.parse
+
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# change this when parseurl's or buildhtml's output changes, so old deals and html are not reused
+version = '3'
+
+
+def normalize(url: str) -> str:
+    # the lin of the url as key|value| pairs, url encoding removed
+    return ''.join(f'{tag}|{value}|' for tag, value in parseurl.tokenizePairs(urllib.parse.unquote(url)))
+
+def optionsKey(args) -> str:
+    # the options that change the html, e.g. 'NS-A-r1'
+    seats = args.north * 'N' + args.east * 'E' + args.south * 'S' + args.west * 'W'
+    return f'{seats}-{args.auction * "A"}-r{(args.rotate or 0) % 4}' + ('-t' if getattr(args, 'tricks', False) else '') + \
+        ('-p' if getattr(args, 'play', False) else '')
+
+def contentHash(*parts: str) -> str:
+    return hashlib.sha256('\0'.join((version,) + parts).encode('utf-8')).hexdigest()
+
+
+class Cache:
+    def __init__(self, directory: str, maxBytes: int = 100 * 1024 * 1024):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def read(self, key: str, suffix: str) -> str | None:
+        path = self.path(key, suffix)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def write(self, key: str, suffix: str, text: str):
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            size = os.path.getsize(temp)
+            try:
+                # an entry written again replaces the old one
+                size -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        self.writes += 1
+        self.grow(size)
+
+    def grow(self, size: int):
+        # add size bytes to the total kept in the size file, and evict if that passes maxBytes
+        # every write does this under the lock, so the total counts the writes of every process
+        with open(os.path.join(self.directory, 'evict.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            total = self.readTotal()
+            total = self.evict() if total is None or total + size > self.maxBytes else total + size
+            with open(os.path.join(self.directory, 'size'), 'w') as f:
+                f.write(str(total))
+
+    def readTotal(self) -> int | None:
+        # the bytes in the cache, or None if no total has been kept yet (e.g. a cache written by an older version)
+        try:
+            with open(os.path.join(self.directory, 'size'), 'r') as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def evict(self) -> int:
+        # remove the least recently read entries until the cache is under maxBytes; returns the bytes left
+        # called with the lock held
+        entries = []
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json') or name.endswith('.html'):
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def render(self, url: str, args, build) -> tuple[str, str]:
+        # returns the deal (as json) and html for the url, from the cache if they are there
+        # otherwise parses the url and calls build(deal, args), and stores the results
+        lin = normalize(url)
+        dealKey = contentHash(lin)
+        htmlKey = contentHash(lin, optionsKey(args))
+
+        saved = self.read(dealKey, '.json')
+        html = self.read(htmlKey, '.html')
+        if saved is not None and html is not None:
+            return saved, html
+
+        if saved is None:
+            deal = parseurl.parse(url)
+            saved = json.dumps(deal)
+            self.write(dealKey, '.json', saved)
+        else:
+            deal = json.loads(saved)
+
+        html = build(deal, args)
+        self.write(htmlKey, '.html', html)
+        return saved, html
+
+
+openCaches = {}
+
+def fromArgs(args) -> Cache:
+    # the cache named by the --cache and --cache-size options
+    # one Cache per directory in each process, so its counts of hits and misses carry over between records
+    key = (args.cache, args.cache_size)
+    if key not in openCaches:
+        openCaches[key] = Cache(args.cache, args.cache_size * 1024 * 1024)
+    return openCaches[key]
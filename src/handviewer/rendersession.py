@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+A RenderSession shows one deal in many views: any combination of seats, with or without the auction, rotated any number of seats.
+
+    session = RenderSession(deal)
+    for args in views:
+        html = session.build(args)
+
+session.build(args) returns the same html as buildhtml.build(deal, args), but
+    each seat's hand diagram (below the direction), its single line form and the auction's calls are formatted once, when first needed,
+    the auction rows are built once for each position of the dealer,
+    the deal is solved double dummy once (with args.tricks), and only par is worked out again for each rotation,
+    the play is replayed once (with args.play), and the trick views are built once for each rotation and set of seats,
+    the deal is neither copied nor changed (buildhtml.build rotates the deal it is given)
+"""
+from __future__ import annotations
+
+import buildhtml
+import globals
+import model
+
+
+
+class RenderSession:
+    def __init__(self, deal: dict):
+        if isinstance(deal, model.Deal):
+            deal = deal.toDict()
+        self.deal = deal
+        self.seats = deal['Seats']
+        self.bodies: dict[int, str] = {}
+        self.singleHands: dict[int, str] = {}
+        self.calls: list[str] | None = None
+        self.rows: dict[int, str] = {}
+        self.trickTable: dict[str, dict[str, int]] | None = None
+        self.tricksTables: dict[int, str] = {}
+        self.replay = None
+        self.trickViews: dict[tuple, str] = {}
+
+    def body(self, i: int) -> str:
+        # formatHandBody of seat i
+        if i not in self.bodies:
+            self.bodies[i] = buildhtml.formatHandBody(self.seats[i])
+        return self.bodies[i]
+
+    def singleHand(self, i: int) -> str:
+        if i not in self.singleHands:
+            self.singleHands[i] = buildhtml.buildSingleHand(buildhtml.formatHand(self.seats[i]['Hand'], False))
+        return self.singleHands[i]
+
+    def auctionRows(self, offset: int) -> str:
+        # the rows of the auction table when the dealer is offset seats after West
+        if offset not in self.rows:
+            if self.calls is None:
+                self.calls = buildhtml.formatCallList(self.deal["Auction"])
+            auction = [' '] * offset + self.calls
+            auction.extend([' '] * (4 - len(auction) % 4))
+            self.rows[offset] = ''.join(buildhtml.auctionRows(auction))
+        return self.rows[offset]
+
+    def tricksTable(self, rotate: int) -> str:
+        # buildhtml.buildTricksTable of the deal rotated rotate seats
+        rotate %= 4
+        if rotate not in self.tricksTables:
+            import ddsolver
+            if self.trickTable is None:
+                self.trickTable = ddsolver.trickTable(self.deal)
+            table = dict([(buildhtml.shift(direction, rotate), tricks) for direction, tricks in self.trickTable.items()])
+            rotated = dict(self.deal, Dealer=buildhtml.shift(self.deal["Dealer"], rotate) if "Dealer" in self.deal else None)
+            if "Vulnerability" in self.deal:
+                rotated["Vulnerability"] = buildhtml.rotateVulnerability(self.deal["Vulnerability"], rotate)
+            self.tricksTables[rotate] = buildhtml.formatTricksTable(ddsolver.result(rotated, table))
+        return self.tricksTables[rotate]
+
+    def playViews(self, args, rotate: int) -> str:
+        # the views of buildhtml.trickViews of the deal rotated rotate seats
+        key = (rotate % 4, args.north, args.west, args.east, args.south)
+        if key not in self.trickViews:
+            if self.replay is None:
+                import replay
+                self.replay = replay.Replay(self.deal)
+            self.trickViews[key] = ''.join(buildhtml.trickViews(self.replay, args, rotate))
+        return self.trickViews[key]
+
+    def directions(self, rotate: int) -> list[str]:
+        # the direction of each seat after rotating the deal
+        return [buildhtml.shift(seat["Direction"], rotate) for seat in self.seats] if rotate else [seat["Direction"] for seat in self.seats]
+
+    def build(self, args) -> str:
+        rotate = args.rotate or 0
+        if rotate and "Dealer" not in self.deal:
+            # as buildhtml.build would, fail if the deal has no dealer to rotate
+            raise KeyError("Dealer")
+        directions = self.directions(rotate)
+        parts = []
+
+        seatsToShow = args.north * 'N' + args.east * 'E' + args.south * 'S' + args.west * 'W'
+        if len(seatsToShow) == 1:
+            if globals.seats[seatsToShow] in directions:
+                parts.append(self.singleHand(directions.index(globals.seats[seatsToShow])))
+
+        elif len(seatsToShow) > 1:
+            # a later seat with the same direction replaces an earlier one, as in buildhtml.buildHandTable
+            seatIndex = dict([(direction, i) for i, direction in enumerate(directions)])
+            diagrams = dict([(direction, direction.upper() + '<br />\n' + self.body(seatIndex[direction]))
+                             for direction, shown in [('North', args.north), ('West', args.west), ('East', args.east), ('South', args.south)] if shown])
+            parts.append(buildhtml.handTableTemplate.format(north=diagrams.get('North', ''), west=diagrams.get('West', ''),
+                                                            east=diagrams.get('East', ''), south=diagrams.get('South', '')))
+
+        if getattr(args, 'tricks', False):
+            parts.append(self.tricksTable(rotate))
+
+        if args.auction:
+            players = dict([(direction, seat.get('Player', '')) for direction, seat in zip(directions, self.seats)])
+            header = buildhtml.auctionHeaderTemplate.format(*[players[direction] for direction in globals.directions])
+            dealer = buildhtml.shift(self.deal["Dealer"], rotate) if rotate else self.deal["Dealer"]
+            parts += [buildhtml.auctionTableStart.format(width=300), header,
+                      self.auctionRows(globals.directions.index(dealer) % 4), buildhtml.auctionTableEnd]
+
+        if getattr(args, 'play', False) and self.deal.get('Play'):
+            parts.append(self.playViews(args, rotate))
+
+        return ''.join(parts)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Replays the card play of a deal (its Play and Claim, which parseurl reads from the pc and mc tags), checking every card.
+
+    played = replay.Replay(deal)
+    played.contract, played.declarer    e.g. '7H', 'North'
+    played.tricks                       a Trick for each trick: leader, cards (e.g. ['S4', 'SA', 'S2', 'S3']) and winner;
+                                        the last trick may be incomplete, with no winner
+    played.hands(n)                     each direction's hand after n tricks, e.g. {'West': model.Hand, ...}
+    played.taken(n)                     the tricks each side has won after n tricks, e.g. {'NS': 1, 'EW': 0}
+    played.result()                     declarer's tricks: the claim if there was one, otherwise the tricks won in play
+                                        (None if the play stopped before the end without a claim)
+
+The contract (and so the trump suit and the opening leader) comes from the auction (see bidding).
+Each card is checked as it is played: the player must hold it, and must follow suit if they can;
+the winner of each trick leads to the next. A play that breaks a rule raises AssertionError, naming the trick and the card.
+The claim is kept as it is written.
+
+The hands are kept as one 52 bit mask per direction (see model.Hand), and playing a card clears its bit.
+The masks after each trick are kept (four ints a trick) rather than a copy of the deal, so any trick can be shown
+without replaying the tricks before it; buildhtml.trickViews formats a view of every trick from them.
+
+    python replay.py <file>...      the tricks of each url or json deal (one per line) or .lin file
+"""
+from __future__ import annotations
+
+import bidding
+import globals
+import model
+
+
+suitLetters = 'SHDC'
+suitMasks = [0x1FFF << (13 * i) for i in range(4)]
+
+
+def cardBit(card: str) -> int:
+    # the bit of a card in a model.Hand mask, e.g. 'SA' -> 1 << 12, 'C2' -> 1 << 39
+    assert len(card) == 2 and card[0] in suitLetters and card[1] in model.rankBits, f"{card} is not a card"
+    return 1 << (13 * suitLetters.index(card[0]) + model.rankBits[card[1]])
+
+
+class Trick:
+    __slots__ = ('leader', 'cards', 'winner')
+
+    def __init__(self, leader: str, cards: list[str], winner: str | None):
+        self.leader = leader
+        self.cards = cards
+        self.winner = winner
+
+    def players(self) -> list[str]:
+        # the direction that played each card
+        start = globals.directions.index(self.leader)
+        return [globals.directions[(start + i) % 4] for i in range(len(self.cards))]
+
+    def __repr__(self) -> str:
+        return f'Trick({self.leader}, {self.cards}, {self.winner})'
+
+
+class Replay:
+    def __init__(self, deal: dict):
+        if isinstance(deal, model.Deal):
+            deal = deal.toDict()
+        play = deal.get('Play', [])
+        self.claim = deal.get('Claim')
+        self.contract, self.declarer = bidding.finalContract(deal.get('Auction', []), deal.get('Dealer'))
+        assert self.declarer or not play, "Cards were played, but the deal was passed out"
+        self.trumps = suitLetters.find(self.contract[1]) if self.declarer else -1
+
+        seats = dict([(seat['Direction'], seat) for seat in deal.get('Seats', [])])
+        masks = []
+        for direction in globals.directions:
+            hand = seats.get(direction, {}).get('Hand')
+            assert hand is not None or not play, f"The play needs all four hands, and {direction}'s is missing"
+            hand = model.Hand.fromDict(hand) if hand is not None else model.Hand()
+            assert not hand.spots or not play, f"The play needs every card, and {direction}'s hand has x's"
+            masks.append(hand.mask)
+
+        # the masks and the tricks won by (NS, EW) after each trick, starting before the first
+        self.masks = [tuple(masks)]
+        self.counts = [(0, 0)]
+        self.tricks: list[Trick] = []
+        leader = (globals.directions.index(self.declarer) + 1) % 4 if self.declarer else 0
+        for start in range(0, len(play), 4):
+            leader = self.playTrick(masks, leader, play[start:start + 4])
+
+    def playTrick(self, masks: list[int], leader: int, cards: list[str]) -> int:
+        # play the cards of one trick from masks (in place); returns the seat that leads next
+        number = len(self.tricks) + 1
+        led = winningSuit = winningBit = winner = None
+        for i, card in enumerate(cards):
+            seat = (leader + i) % 4
+            bit = cardBit(card)
+            suit = suitLetters.index(card[0])
+            hand = masks[seat]
+            assert hand & bit, f"Trick {number}: {globals.directions[seat]} does not hold {card}"
+            if led is None:
+                led = suit
+            else:
+                assert suit == led or not hand & suitMasks[led], f"Trick {number}: {globals.directions[seat]} must follow suit, not play {card}"
+            masks[seat] = hand ^ bit
+            # within a suit, a higher card has a higher bit
+            if winner is None or (suit == winningSuit and bit > winningBit) or (suit == self.trumps and winningSuit != suit):
+                winner, winningSuit, winningBit = seat, suit, bit
+
+        complete = len(cards) == 4
+        self.tricks.append(Trick(globals.directions[leader], cards, globals.directions[winner] if complete else None))
+        self.masks.append(tuple(masks))
+        ns, ew = self.counts[-1]
+        if complete:
+            # NS seats are the odd ones in globals.directions
+            ns, ew = (ns + 1, ew) if winner & 1 else (ns, ew + 1)
+        self.counts.append((ns, ew))
+        return winner if complete else leader
+
+    def hands(self, n: int) -> dict[str, model.Hand]:
+        # the hands after n tricks (0 for the hands as dealt)
+        return dict(zip(globals.directions, map(model.Hand, self.masks[n])))
+
+    def taken(self, n: int) -> dict[str, int]:
+        ns, ew = self.counts[n]
+        return { 'NS': ns, 'EW': ew }
+
+    def result(self) -> int | None:
+        if self.claim is not None:
+            return self.claim
+        if not self.declarer or len(self.tricks) < 13 or self.tricks[-1].winner is None:
+            return None
+        return self.taken(13)['NS' if self.declarer in ('North', 'South') else 'EW']
+
+
+def parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description = 'Handviewer Play Replay', )
+    parser.add_argument('files', nargs='+', help='files of urls or json deals (one per line), or .lin files')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    import dealstore
+    import sys
+    args = parse_args(sys.argv[1:])
+    for path in args.files:
+        for deal in dealstore.readDeals(path):
+            played = Replay(deal)
+            print(f"Board {deal.get('Board number')}: {played.contract} by {played.declarer}, result {played.result()}")
+            for n, trick in enumerate(played.tricks, 1):
+                taken = played.taken(n)
+                print(f"  {n:2}  {trick.leader:5}  {' '.join(trick.cards):11}  {trick.winner or '':5}  NS {taken['NS']} EW {taken['EW']}")
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Duplicate bridge scoring, and par from a double dummy trick table.
+
+    contractScore(4, 'H', '', True, 11)        # 650: 4H made with an overtrick, vulnerable
+    contractScore(3, 'N', 'X', False, 7)       # -300: 3NT doubled, two down, not vulnerable
+
+Strains are written as in the auction: C, D, H, S and N for notrump; doubled is '', 'X' or 'XX'.
+
+par(table, vulnerability, dealer) is the result when both sides bid as well as they can, knowing every card:
+each side may outbid the other, a contract that makes is left undoubled and one that fails is doubled.
+The trick table is ddsolver's ({declarer: {strain: tricks}}); the side's better declarer plays each contract.
+
+    {'Score': 620, 'Contracts': ['4S-N']}       Score is North-South's; a declarer of NS means either may play it
+
+The result of a deal as it was played comes from its auction (see bidding), its play or claim (see replay) and its Vulnerability:
+
+    scoreDeal(deal)         {'Contract': '4HX', 'Declarer': 'North', 'Tricks': 10, 'Score': 790}, also kept as deal['Result']
+                            (Tricks and Score are None when the play stops short without a claim)
+    scoreSession(deals)     every deal scored, and each compared with the other results of its board (its travellers):
+                            'Matchpoints' (1 for each result beaten, a half for each tie), 'Percentage' of the top,
+                            and 'IMPs', the average of the imps won against each other result (cross imps)
+
+Scores are North-South's. The result is worked out once and kept in the deal, so every report reads the same one;
+scoreSession works out the comparisons again each time, since they depend on the other deals.
+
+    python scoring.py <file>...     the travellers of each board in urls or json deals (one per line) or .lin files
+"""
+from __future__ import annotations
+
+import bisect
+import sys
+
+from collections.abc import Iterable
+
+
+strains = 'CDHSN'
+sides = { 'NS': ('North', 'South'), 'EW': ('East', 'West') }
+
+
+def isVulnerable(vulnerability: str, side: str) -> bool:
+    # vulnerability is 'None', 'NS', 'EW' or 'Both'
+    return vulnerability in ('Both', side)
+
+def contractScore(level: int, strain: str, doubled: str, vulnerable: bool, tricks: int) -> int:
+    # the declaring side's score for taking tricks in the contract
+    multiplier = { '': 1, 'X': 2, 'XX': 4 }[doubled]
+    needed = level + 6
+    if tricks < needed:
+        down = needed - tricks
+        if not doubled:
+            return -down * (100 if vulnerable else 50)
+        if vulnerable:
+            penalty = 200 + 300 * (down - 1)
+        else:
+            penalty = 100 + 200 * min(down - 1, 2) + 300 * max(down - 3, 0)
+        return -penalty * multiplier // 2
+
+    perTrick = 20 if strain in 'CD' else 30
+    contractPoints = (perTrick * level + (10 if strain == 'N' else 0)) * multiplier
+    score = contractPoints
+    score += (300 if not vulnerable else 500) if contractPoints >= 100 else 50
+    if level == 6:
+        score += 750 if vulnerable else 500
+    elif level == 7:
+        score += 1500 if vulnerable else 1000
+    if doubled:
+        score += 50 * multiplier // 2
+    overtricks = tricks - needed
+    if doubled:
+        score += overtricks * (200 if vulnerable else 100) * multiplier // 2
+    else:
+        score += overtricks * perTrick
+    return score
+
+
+def par(table: dict[str, dict[str, int]], vulnerability: str = 'None', dealer: str = 'North') -> dict:
+    # the par score (North-South's) and the contracts that reach it
+    contracts = [(level, strain) for level in range(1, 8) for strain in strains]
+
+    def outcome(i: int, side: str) -> int:
+        # North-South's score when side plays contract i: undoubled if it makes, doubled if it fails
+        level, strain = contracts[i]
+        tricks = max(table[direction][strain] for direction in sides[side])
+        making = tricks >= level + 6
+        score = contractScore(level, strain, '' if making else 'X', isVulnerable(vulnerability, side), tricks)
+        return score if side == 'NS' else -score
+
+    def better(side: str, a: tuple, b: tuple) -> tuple:
+        # the choice side prefers (each is (score, contract, side)); on a tie, the first (the lower contract)
+        return b if (b[0] > a[0] if side == 'NS' else b[0] < a[0]) else a
+
+    memo: dict[tuple, tuple] = {}
+
+    def bidding(i: int, owner: str, toBid: str) -> tuple:
+        # contract i belongs to owner and toBid may bid over it; if toBid is the owner, passing ends the auction
+        key = (i, owner, toBid)
+        if key not in memo:
+            other = 'EW' if toBid == 'NS' else 'NS'
+            if toBid == owner:
+                choice = (outcome(i, owner), i, owner)
+            else:
+                choice = bidding(i, owner, other)
+            for k in range(i + 1, len(contracts)):
+                choice = better(toBid, choice, bidding(k, toBid, other))
+            memo[key] = choice
+        return memo[key]
+
+    first = 'NS' if dealer in sides['NS'] else 'EW'
+    second = 'EW' if first == 'NS' else 'NS'
+    choice = (0, None, None)
+    for side in (second, first):
+        for k in range(len(contracts)):
+            choice = better(side, choice, bidding(k, side, 'EW' if side == 'NS' else 'NS'))
+
+    score, i, side = choice
+    if i is None:
+        return { 'Score': 0, 'Contracts': [] }
+    level, strain = contracts[i]
+    tricks = max(table[direction][strain] for direction in sides[side])
+    declarers = ''.join(direction[0] for direction in sides[side] if table[direction][strain] == tricks)
+    return { 'Score': score, 'Contracts': [f'{level}{strain}{"" if tricks >= level + 6 else "X"}-{declarers}'] }
+
+
+# the smallest difference in points worth each number of imps, from 1 to 24
+impThresholds = [20, 50, 90, 130, 170, 220, 270, 320, 370, 430, 500, 600, 750, 900, 1100, 1300, 1500, 1750, 2000, 2250, 2500, 3000, 3500, 4000]
+
+def imps(difference: int) -> int:
+    # e.g. imps(620 - 170) = 10, imps(-50) = -2
+    won = bisect.bisect_right(impThresholds, abs(difference))
+    return won if difference >= 0 else -won
+
+def matchpoints(scores: list[int]) -> list[float]:
+    # 1 for each other score beaten, a half for each tie
+    ordered = sorted(scores)
+    points = []
+    for score in scores:
+        below = bisect.bisect_left(ordered, score)
+        points.append(below + (bisect.bisect_right(ordered, score) - below - 1) / 2)
+    return points
+
+def result(deal: dict) -> dict:
+    # the contract, declarer, tricks and North-South's score of the deal as it was played
+    import bidding
+    import replay
+    contract = bidding.analyze(deal.get('Auction', []), deal.get('Dealer'))
+    if not contract.level:
+        return { 'Contract': 'P', 'Declarer': None, 'Tricks': None, 'Score': 0 if contract.complete else None }
+    tricks = replay.Replay(deal).result()
+    score = None
+    if tricks is not None:
+        side = 'NS' if contract.declarer in sides['NS'] else 'EW'
+        score = contractScore(contract.level, contract.strain, contract.doubled, isVulnerable(deal.get('Vulnerability', 'None'), side), tricks)
+        score = score if side == 'NS' else -score
+    return { 'Contract': contract.name(), 'Declarer': contract.declarer, 'Tricks': tricks, 'Score': score }
+
+def scoreDeal(deal: dict) -> dict:
+    # the deal's result, worked out the first time and kept as deal['Result']
+    if 'Result' not in deal:
+        deal['Result'] = result(deal)
+    return deal['Result']
+
+def scoreSession(deals: Iterable[dict]) -> list[dict]:
+    # every deal scored, with matchpoints, percentage and imps against the other deals with the same board number
+    # a deal whose result cannot be worked out (e.g. its play breaks the rules) is reported on stderr and not compared
+    deals = list(deals)
+    boards: dict[int, list[dict]] = {}
+    for deal in deals:
+        try:
+            score = scoreDeal(deal)['Score']
+        except AssertionError as e:
+            print(f"Board {deal.get('Board number')}: {e}", file=sys.stderr)
+            continue
+        if score is not None:
+            boards.setdefault(deal.get('Board number'), []).append(deal)
+
+    for travellers in boards.values():
+        scores = [deal['Result']['Score'] for deal in travellers]
+        top = len(scores) - 1
+        for deal, score, points in zip(travellers, scores, matchpoints(scores)):
+            deal['Result']['Matchpoints'] = points
+            deal['Result']['Percentage'] = 100 * points / top if top else 50.0
+            deal['Result']['IMPs'] = round(sum(imps(score - other) for other in scores) / top, 2) if top else 0.0
+    return deals
+
+
+def parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description = 'Handviewer Scoring', )
+    parser.add_argument('files', nargs='+', help='files of urls or json deals (one per line), or .lin files')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    import dealstore
+    import itertools
+    args = parse_args(sys.argv[1:])
+    deals = scoreSession(itertools.chain.from_iterable(map(dealstore.readDeals, args.files)))
+    for boardNumber, travellers in itertools.groupby(sorted([deal for deal in deals if 'Result' in deal], key=lambda deal: deal.get('Board number') or 0),
+                                                     key=lambda deal: deal.get('Board number') or 0):
+        print(f'Board {boardNumber}')
+        for deal in travellers:
+            played = deal['Result']
+            print(f"  {played['Contract']:5} {played['Declarer'] or '':6} {played['Tricks'] if played['Tricks'] is not None else '':>2}"
+                  f"  {played['Score'] if played['Score'] is not None else '':>6}  {played.get('Percentage', 0):6.1f}%  {played.get('IMPs', 0):+6.2f}")
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+A long-running http server that renders deals, so modules are imported and caches are warm between requests.
+
+    python server.py [--host 127.0.0.1] [--port 8080] [--limit 64] [--threads 4]
+
+GET /health
+    returns json with the server's status, the number of requests served and buildhtml's cache counters
+
+GET /render?url=<handviewer url>&seats=NESW&auction=1&rotate=0
+POST /render with a json body {"url": <handviewer url>} or {"deal": <deal, as described in buildhtml>},
+    plus optional "seats", "auction" and "rotate" (same meaning as the query parameters)
+    returns the html from buildhtml.build
+
+Connections are kept open between requests (http/1.1 keep-alive), and a POST body may be sent chunked.
+Pages are rendered on a pool of threads, so the event loop goes on reading requests and answering /health while they render.
+At most limit requests are rendered and sent at once; the others wait their turn.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import buildhtml
+import concurrent.futures
+import json
+import parseurl
+import sys
+import urllib.parse
+
+
+
+reasons = { 200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 411: 'Length Required',
+            413: 'Payload Too Large', 501: 'Not Implemented' }
+maxBody = 1024 * 1024
+
+
+def renderArgs(seats: str = 'NESW', auction=True, rotate=0) -> argparse.Namespace:
+    # the options buildhtml.build reads from the command line
+    seats = seats.upper()
+    return argparse.Namespace(north='N' in seats, east='E' in seats, south='S' in seats, west='W' in seats,
+                              auction=auction in (True, 1, '1', 'true', 'yes'), rotate=int(rotate or 0))
+
+def render(request: dict) -> str:
+    # request holds url or deal, and optionally seats, auction and rotate
+    if 'url' in request:
+        deal = parseurl.parse(request['url'])
+    elif 'deal' in request:
+        deal = request['deal']
+    else:
+        raise ValueError('Request needs a url or a deal')
+    options = dict([(key, request[key]) for key in ['seats', 'auction', 'rotate'] if key in request])
+    return buildhtml.build(deal, renderArgs(**options))
+
+
+class Server:
+    def __init__(self, limit: int = 64, threads: int = 4):
+        self.limit = asyncio.Semaphore(limit)
+        self.executor = concurrent.futures.ThreadPoolExecutor(threads, thread_name_prefix='render')
+        self.served = 0
+
+    async def readChunked(self, reader: asyncio.StreamReader) -> bytes:
+        # a body sent with Transfer-Encoding: chunked: hex size lines, each followed by that many bytes, up to a size of 0
+        chunks = []
+        size = 0
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            length = int(line.split(b';', 1)[0].strip(), 16)
+            if length == 0:
+                break
+            size += length
+            if size > maxBody:
+                raise ValueError(413)
+            chunks.append(await reader.readexactly(length))
+            if await reader.readexactly(2) != b'\r\n':
+                raise ValueError(400)
+        # trailers, up to a blank line
+        while await reader.readuntil(b'\r\n') != b'\r\n':
+            pass
+        return b''.join(chunks)
+
+    async def readRequest(self, reader: asyncio.StreamReader) -> tuple[str, str, dict, bytes] | None:
+        # returns (method, target, headers, body), or None when the client has closed the connection
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, version = lines[0].split(' ', 2)
+        headers = dict([(name.strip().lower(), value.strip()) for name, value in
+                        [line.split(':', 1) for line in lines[1:] if ':' in line]])
+        headers[':version'] = version
+        encoding = headers.get('transfer-encoding', 'identity').lower()
+        if encoding == 'chunked':
+            return method, target, headers, await self.readChunked(reader)
+        if encoding != 'identity':
+            raise ValueError(501)
+        if method == 'POST' and 'content-length' not in headers:
+            raise ValueError(411)
+        length = int(headers.get('content-length', 0))
+        if length > maxBody:
+            raise ValueError(413)
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def respond(self, method: str, target: str, body: bytes) -> tuple[int, str, bytes]:
+        # returns (status, content type, body)
+        url = urllib.parse.urlsplit(target)
+        if url.path == '/health':
+            health = { 'status': 'ok', 'served': self.served, 'caches': buildhtml.cacheInfo() }
+            return 200, 'application/json', json.dumps(health).encode('utf-8')
+        if url.path != '/render':
+            return 404, 'text/plain', b'Not found'
+
+        if method not in ('GET', 'POST'):
+            return 405, 'text/plain', b'Use GET or POST'
+        try:
+            request = dict(urllib.parse.parse_qsl(url.query)) if method == 'GET' else json.loads(body or b'{}')
+            html = await asyncio.get_running_loop().run_in_executor(self.executor, render, request)
+        except Exception as e:
+            return 400, 'text/plain', f'{type(e).__name__}: {e}'.encode('utf-8')
+        return 200, 'text/html; charset=utf-8', html.encode('utf-8')
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # serve requests on one connection until the client closes it or asks to
+        try:
+            while True:
+                try:
+                    request = await self.readRequest(reader)
+                except (ValueError, asyncio.LimitOverrunError, asyncio.IncompleteReadError) as e:
+                    status = e.args[0] if e.args and e.args[0] in reasons else 400
+                    writer.write(f'HTTP/1.1 {status} {reasons[status]}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'.encode('latin-1'))
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keepAlive = headers.get('connection', '').lower() != 'close' and headers[':version'] == 'HTTP/1.1'
+
+                # the limit covers rendering and sending the response, so slow readers can't pile up rendered pages
+                async with self.limit:
+                    status, contentType, content = await self.respond(method, target, body)
+                    self.served += 1
+                    writer.write((f'HTTP/1.1 {status} {reasons[status]}\r\n'
+                                  f'Content-Type: {contentType}\r\n'
+                                  f'Content-Length: {len(content)}\r\n'
+                                  f'Connection: {"keep-alive" if keepAlive else "close"}\r\n\r\n').encode('latin-1') + content)
+                    await writer.drain()
+                if not keepAlive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Server', )
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+    parser.add_argument('--limit', type=int, default=64, help='number of requests rendered and sent at once')
+    parser.add_argument('--threads', type=int, default=4, help='number of threads rendering pages')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    buildhtml.prewarm()
+    try:
+        asyncio.run(Server(args.limit, args.threads).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
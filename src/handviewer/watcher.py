@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Watches a directory for lin files and lists of urls, and renders each new board as soon as its file is saved.
+
+    python watcher.py <directory> [-o <output directory>] [-j 2] [--poll 0.2] [--once] [-n -e -s -w -a -t -r n ...]
+
+Files ending in .lin are read a board at a time (see linfile); files ending in .txt hold one url or json deal a line
+(as batch reads them). Other files (e.g. one still being copied under a temporary name) are left alone.
+
+Board n of <name>.lin is written to <output>/<name>-lin-<n>.html and .json, and board n of <name>.txt to <name>-txt-<n>.
+Each board is known by a sha256 hash of its record and the render options (see rendercache.contentHash); the hash of every
+board written is kept in <output>/rendered.json, so when a file is saved again only its new or changed boards are parsed
+and rendered, and a watcher started again later carries on where the last one stopped.
+When a file is saved with fewer boards than before, the pages of the boards past its end are removed.
+A board that cannot be rendered, or a file that cannot be read, is reported on stderr and tried again the next time its file changes.
+
+Changes are found with inotify where the system has it (Linux; if its queue of events overflows, every file is looked at again),
+and otherwise by looking at the size and modification time of every file each poll seconds.
+Boards are rendered by up to jobs worker processes (in this process if jobs is 1),
+and every file is written to a temporary file and renamed, so a reader never sees a partly written page.
+"""
+from __future__ import annotations
+
+import argparse
+import batch
+import ctypes
+import ctypes.util
+import json
+import os
+import rendercache
+import select
+import struct
+import sys
+import tempfile
+import time
+
+from collections.abc import Iterator
+
+
+inputSuffixes = ('.lin', '.txt')
+stateName = 'rendered.json'
+
+# inotify events: a file written and closed, or moved into the directory, and events lost because the queue was full
+inCloseWrite = 0x00000008
+inMovedTo = 0x00000080
+inQueueOverflow = 0x00004000
+eventHeader = struct.Struct('iIII')
+
+
+class Inotify:
+    # the names of files closed after writing (or moved) in one directory, through the inotify calls of libc
+    def __init__(self, directory: str):
+        self.directory = directory
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), inCloseWrite | inMovedTo) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f'cannot watch {directory}')
+
+    def wait(self, timeout: float) -> list[str]:
+        # the names changed within timeout seconds (an empty list if none)
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        names = []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        position = 0
+        while position < len(data):
+            wd, mask, cookie, length = eventHeader.unpack_from(data, position)
+            position += eventHeader.size
+            if mask & inQueueOverflow:
+                # some changes were lost, so every file may have changed
+                names.extend(os.listdir(self.directory))
+            names.append(os.fsdecode(data[position:position + length].rstrip(b'\0')))
+            position += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Poller:
+    # the names of files whose size or modification time has changed since the last look
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self.signatures: dict[str, tuple[int, int]] = self.look()
+
+    def look(self) -> dict[str, tuple[int, int]]:
+        signatures = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def wait(self, timeout: float) -> list[str]:
+        time.sleep(min(timeout, self.interval))
+        signatures = self.look()
+        names = [name for name, signature in signatures.items() if self.signatures.get(name) != signature]
+        self.signatures = signatures
+        return names
+
+    def close(self):
+        pass
+
+
+def writeAtomically(path: str, text: str):
+    # as rendercache.Cache.write: a temporary file in the same directory, renamed over the old one
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+def recordHash(record: str | dict, options: str) -> str:
+    # the hash a board is known by: its record (a line, or the tokens of a lin board) and the render options
+    return rendercache.contentHash('board', options, record if isinstance(record, str) else json.dumps(record, sort_keys=True))
+
+
+class Watcher:
+    def __init__(self, directory: str, output: str, args, jobs: int = 1, poll: float = 0.2):
+        self.directory = directory
+        self.output = output
+        self.args = args
+        self.jobs = jobs
+        self.poll = poll
+        self.options = rendercache.optionsKey(args)
+        os.makedirs(output, exist_ok=True)
+        self.statePath = os.path.join(output, stateName)
+        # the hash of each board written, by output name (e.g. 'session-lin-3')
+        self.rendered: dict[str, str] = {}
+        if os.path.exists(self.statePath):
+            with open(self.statePath) as f:
+                self.rendered = json.load(f)
+        self.pool = None
+        if jobs > 1:
+            import concurrent.futures
+            self.pool = concurrent.futures.ProcessPoolExecutor(jobs)
+        self.written = self.failed = 0
+
+    def inputs(self) -> list[str]:
+        return sorted(name for name in os.listdir(self.directory) if self.isInput(name))
+
+    def isInput(self, name: str) -> bool:
+        return name.endswith(inputSuffixes) and not name.startswith('.') and os.path.isfile(os.path.join(self.directory, name))
+
+    def records(self, name: str) -> Iterator[tuple[int, str | dict]]:
+        # (board position, record) for each board of the file
+        with open(os.path.join(self.directory, name), 'r', errors='replace') as f:
+            if name.endswith('.lin'):
+                yield from batch.readLinRecords(f)
+            else:
+                yield from enumerate((record for lineNumber, record in batch.readRecords(f)), 1)
+
+    def update(self, names: list[str]) -> int:
+        # render the boards of the files that are new or changed since they were last rendered; returns the number written
+        work = []
+        removed = False
+        for name in names:
+            stem, suffix = os.path.splitext(name)
+            try:
+                boards = []
+                count = 0
+                for n, record in self.records(name):
+                    count = n
+                    board = f'{stem}-{suffix[1:]}-{n}'
+                    key = recordHash(record, self.options)
+                    if self.rendered.get(board) != key or not os.path.exists(os.path.join(self.output, board + '.html')):
+                        boards.append((board, key, record))
+            except Exception as e:
+                # e.g. removed before it could be read, or not a lin file; the file is left until it changes again
+                print(f'{name}: {type(e).__name__}: {e}', file=sys.stderr)
+                self.failed += 1
+                continue
+            work += boards
+            removed |= self.removeBoards(f'{stem}-{suffix[1:]}-', count)
+        if not work:
+            if removed:
+                writeAtomically(self.statePath, json.dumps(self.rendered))
+            return 0
+
+        items = [(i, record) for i, (board, key, record) in enumerate(work)]
+        if self.pool is None:
+            results = [batch.renderSafely(item, self.args) for item in items]
+        else:
+            futures = [self.pool.submit(batch.renderSafely, item, self.args) for item in items]
+            results = [future.result() for future in futures]
+
+        written = 0
+        for i, saved, html, error, timings in results:
+            board, key, record = work[i]
+            if error:
+                print(f'{board}: {error}', file=sys.stderr)
+                self.failed += 1
+                continue
+            try:
+                writeAtomically(os.path.join(self.output, board + '.json'), saved)
+                writeAtomically(os.path.join(self.output, board + '.html'), html)
+            except OSError as e:
+                print(f'{board}: {e}', file=sys.stderr)
+                self.failed += 1
+                continue
+            self.rendered[board] = key
+            written += 1
+        writeAtomically(self.statePath, json.dumps(self.rendered))
+        self.written += written
+        return written
+
+    def removeBoards(self, prefix: str, count: int) -> bool:
+        # remove the pages and state of boards past count, left from when the file had more boards; returns True if any were
+        stale = [board for board in self.rendered if board.startswith(prefix) and board[len(prefix):].isdigit()
+                 and int(board[len(prefix):]) > count]
+        for board in stale:
+            for extension in ('.html', '.json'):
+                try:
+                    os.unlink(os.path.join(self.output, board + extension))
+                except FileNotFoundError:
+                    pass
+            del self.rendered[board]
+        return bool(stale)
+
+    def changes(self):
+        # inotify where there is one, otherwise a Poller
+        try:
+            return Inotify(self.directory)
+        except (OSError, AttributeError, TypeError):
+            return Poller(self.directory, self.poll)
+
+    def run(self, once: bool = False, duration: float | None = None):
+        # render what is there already, then each change as it comes (until duration seconds have passed, if given)
+        # the watch starts before the first look, so a file saved in between is not missed
+        source = None if once else self.changes()
+        try:
+            self.report(self.update(self.inputs()))
+            end = time.monotonic() + duration if duration is not None else None
+            while source is not None and (end is None or time.monotonic() < end):
+                timeout = self.poll if end is None else max(0, min(self.poll, end - time.monotonic()))
+                names = sorted(set(name for name in source.wait(timeout) if self.isInput(name)))
+                if names:
+                    self.report(self.update(names), names)
+        finally:
+            if source is not None:
+                source.close()
+            if self.pool is not None:
+                self.pool.shutdown()
+
+    def report(self, written: int, names: list[str] | None = None):
+        if written:
+            print(f"{written} boards written to {self.output}" + (f" from {', '.join(names)}" if names else ''), flush=True)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description = 'Handviewer Folder Watcher', )
+    parser.add_argument('directory', help='directory to watch for .lin files and .txt files of urls or json deals')
+    parser.add_argument('-o', '--output', help='directory for the html and json of each board (default <directory>/html)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--poll', type=float, default=0.2, help='seconds between looks at the directory, where there is no inotify')
+    parser.add_argument('--once', action='store_true', help='render what is in the directory and stop')
+    parser.add_argument('--cache', help='directory of previously parsed and rendered urls, shared between runs (see rendercache)')
+    parser.add_argument('--cache-size', type=int, default=100, help='with --cache, maximum size of the cache in megabytes')
+    parser.add_argument('-n', '--north', action='store_true', help='print North hand')
+    parser.add_argument('-e', '--east', action='store_true', help='print East hand')
+    parser.add_argument('-s', '--south', action='store_true', help='print South hand')
+    parser.add_argument('-w', '--west', action='store_true', help='print West hand')
+    parser.add_argument('-a', '--auction', action='store_true', help='print auction')
+    parser.add_argument('-t', '--tricks', action='store_true', help='print the double dummy tricks of each declarer and par (see ddsolver: needs libdds to keep up)')
+    parser.add_argument('-p', '--play', action='store_true', help='print a view of each trick of the play')
+    parser.add_argument('-r', '--rotate', type=int, help='number of seats to rotate clockwise')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    import buildhtml
+    buildhtml.prewarm()
+    watcher = Watcher(args.directory, args.output or os.path.join(args.directory, 'html'), args, args.jobs, args.poll)
+    try:
+        watcher.run(args.once)
+    except KeyboardInterrupt:
+        pass
+    print(f"{watcher.written} boards written, {watcher.failed} failed", file=sys.stderr)
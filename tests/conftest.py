@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+The modules import each other by their plain names (e.g. import parseurl), as when run from src/handviewer,
+so the tests put that directory on the path.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'handviewer'))
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of analytics: HCP, suit lengths, shape and the losing trick count, including hands with spots entered as 'x'.
+"""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import analytics
+import globals
+
+
+def dealWith(west: list) -> dict:
+    return { 'Board number': 1, 'Seats': [{ 'Direction': 'West', 'Hand': globals.buildHand(west) }] }
+
+@pytest.mark.parametrize('holding, losers', [('A', 0), ('K', 1), ('Axx', 2), ('KQx', 1), ('xxx', 3), ('AKQ', 0),
+                                             ('Kx', 1), ('AJ9x', 2), ('xxxxx', 3), ('', 0)])
+def testSuitLosers(holding, losers):
+    archive = analytics.pack([dealWith([holding, '', '', ''])])
+    assert archive.losers()[0, 0] == losers
+
+def testLosersOfHand():
+    archive = analytics.pack([dealWith(['Axx', 'KQx', 'xxx', 'AKQJ'])])
+    assert archive.losers()[0, 0] == 2 + 1 + 3 + 0
+    assert archive.hcp()[0, 0] == 4 + 5 + 0 + 10
+    assert archive.lengths()[0, 0].tolist() == [3, 3, 3, 4]
+    assert archive.shapes()[0, 0] == '4-3-3-3'
+
+def testColumnsMarkMissingSeats():
+    columns = analytics.columns(analytics.pack([dealWith(['AKQJ', 'xxx', 'xxx', 'xxx'])]))
+    assert columns['West HCP'].tolist() == [10]
+    assert columns['North HCP'].tolist() == [-1]
+    assert columns['EW HCP'].tolist() == [-1]
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of archive: every deal reads back as the dictionary that was written, boards are found through the index,
+and ** renders the archived deal as the url did.
+"""
+import archive
+import dealgen
+import handviewer
+import os
+import parseurl
+import pytest
+import struct
+
+
+def testRoundTrip(tmp_path):
+    deals = [parseurl.parse(url) for url in dealgen.urls(100, seed=17, annotate=0.5, played=20)]
+    deals.append(parseurl.parse(parseurl.sampleUrl))
+    # two hands only, no dealer or board number
+    deals.append({'Auction': [], 'Seats': [{'Direction': 'North', 'Hand': {'Spades': 'AKQJT98765432', 'Hearts': '', 'Diamonds': '', 'Clubs': ''}},
+                                           {'Player': 'Ann', 'Direction': 'South', 'Hand': {'Spades': '', 'Hearts': 'AK', 'Diamonds': '', 'Clubs': 'Q32'}}]})
+    path = str(tmp_path / 'deals.hva')
+    assert archive.write(path, deals) == len(deals)
+    with archive.Archive(path) as stored:
+        assert len(stored) == len(deals)
+        assert list(stored) == deals
+        assert stored[-1] == deals[-1] and stored[50] == deals[50]
+        with pytest.raises(IndexError):
+            stored[len(deals)]
+        assert stored.board(7) == [deal for deal in deals if deal.get('Board number') == 7][0]
+        assert stored.board(1000) is None
+
+def testOldVersion(tmp_path):
+    # a version 1 archive, written before the claim and play were kept
+    deal = parseurl.parse(next(dealgen.urls(1, seed=18, played=8)))
+    strings = archive.Strings()
+    current = archive.record.unpack(archive.packDeal(deal, strings))
+    cards, dealer, vulnerability, seatBits, order, claim, boardNumber, auction, play, *players = current
+    old = archive.oldRecords[1]
+    path = tmp_path / 'old.hva'
+    boards = boardNumber + 1
+    recordsOffset = archive.header.size + 4 * boards
+    path.write_bytes(archive.header.pack(archive.magic, 1, old.size, 1, boards, recordsOffset, len(strings.numbers), recordsOffset + old.size)
+                     + struct.pack(f'<{boards}I', *[0 if n == boardNumber else archive.none for n in range(boards)])
+                     + old.pack(cards, dealer, vulnerability, seatBits, order, boardNumber, auction, *players)
+                     + strings.table())
+    with archive.Archive(str(path)) as stored:
+        assert stored[0] == dict([(key, value) for key, value in deal.items() if key not in ('Play', 'Claim')])
+
+def testNotArchived(tmp_path):
+    path = str(tmp_path / 'deal.hva')
+    deal = parseurl.parse(parseurl.sampleUrl)
+    assert archive.save(path, deal) and os.path.exists(path)
+    spots = dict(deal, Seats=[dict(seat, Hand=dict(seat['Hand'], Clubs='xx')) if 'Hand' in seat else seat for seat in deal['Seats']])
+    assert not archive.save(path, spots) and not os.path.exists(path)
+
+def testReload(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = next(dealgen.urls(1, seed=19, played=12))
+    handviewer.main(handviewer.parse_args([url, '-nesw', '-a', '-o', 'deal']))
+    html = (tmp_path / 'deal.html').read_text()
+    assert (tmp_path / 'deal.hva').exists()
+    (tmp_path / 'deal.html').unlink()
+    handviewer.main(handviewer.parse_args(['**', '-nesw', '-a', '-o', 'deal']))
+    assert (tmp_path / 'deal.html').read_text() == html
+    # without the archive, ** reads the json
+    (tmp_path / 'deal.hva').unlink()
+    handviewer.main(handviewer.parse_args(['**', '-nesw', '-a', '-o', 'deal']))
+    assert (tmp_path / 'deal.html').read_text() == html
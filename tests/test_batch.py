@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of batch: every record of a file rendered in one run, bad records reported and skipped, one combined file,
+and the same output from a pool of workers.
+"""
+import batch
+import buildhtml
+import handviewer
+import json
+import parseurl
+
+second = parseurl.sampleUrl.replace('PSMartin', 'Someone').replace('Board%2012', 'Board%2013')
+
+
+def run(tmp_path, lines: list[str], *options: str) -> tuple[int, int]:
+    (tmp_path / 'deals.txt').write_text(''.join(line + '\n' for line in lines))
+    args = handviewer.parse_args([str(tmp_path / 'deals.txt'), '-b', '-nesw', '-o', str(tmp_path / 'out')] + list(options))
+    written, failed, seconds = batch.run(args)
+    return written, failed
+
+def single(url: str) -> str:
+    return buildhtml.build(parseurl.parse(url), handviewer.parse_args([url, '-nesw']))
+
+
+def testEveryRecord(tmp_path, capsys):
+    # a url, a json deal, a comment, a blank line and a line that is neither; boards are numbered in the order of the records
+    lines = [parseurl.sampleUrl, '# a comment', '', json.dumps(parseurl.parse(second)), 'not a deal']
+    assert run(tmp_path, lines) == (2, 1)
+    assert (tmp_path / 'out-1.html').read_text() == single(parseurl.sampleUrl)
+    assert (tmp_path / 'out-2.html').read_text() == single(second)
+    assert json.loads((tmp_path / 'out-1.json').read_text()) == parseurl.parse(parseurl.sampleUrl)
+    assert 'Line 5: ValueError' in capsys.readouterr().err
+
+def testCombined(tmp_path):
+    assert run(tmp_path, [parseurl.sampleUrl, second], '-c') == (2, 0)
+    assert (tmp_path / 'out.html').read_text() == single(parseurl.sampleUrl) + '<br />\n' + single(second)
+    assert not (tmp_path / 'out-1.html').exists()
+
+def testJobsKeepOrder(tmp_path):
+    # the boards come back from the workers in input order, so the output is the same as from one process
+    lines = [parseurl.sampleUrl, second, 'not a deal'] * 3
+    assert run(tmp_path, lines, '-c', '-j', '2', '--chunksize', '1') == (6, 3)
+    combined = (tmp_path / 'out.html').read_text()
+    assert run(tmp_path, lines, '-c') == (6, 3)
+    assert combined == (tmp_path / 'out.html').read_text()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of buildhtml: the templates render the same bytes as the string concatenation they replaced, cold or prewarmed,
+and the caches of formatted calls, suits and hands serve repeated boards within their sizes;
+writeDeals writes the same pages a deal at a time.
+
+data/renders.json holds deals, options and the html the original buildhtml (before templates and caches) made of them.
+"""
+import buildhtml
+import dealgen
+import handviewer
+import io
+import json
+import os
+import parseurl
+import subprocess
+import sys
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'renders.json'), encoding='utf-8') as f:
+    renders = json.load(f)
+
+
+def renderAll() -> list[str]:
+    return [buildhtml.build(json.loads(json.dumps(render['Deal'])), handviewer.parse_args(['x'] + render['Options'])) for render in renders]
+
+def testSameHtml():
+    buildhtml.clearCaches()
+    assert renderAll() == [render['Html'] for render in renders]
+    # again, with every call already formatted
+    buildhtml.prewarm()
+    assert renderAll() == [render['Html'] for render in renders]
+
+def testImportDoesNotPrewarm():
+    # prewarming is left to long runs (batch, the server, the watcher)
+    code = 'import buildhtml; print(buildhtml.cacheInfo()["formatCall"]["currsize"])'
+    assert subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(buildhtml.__file__), capture_output=True, text=True).stdout.strip() == '0'
+
+def testCaches():
+    # rendering the same boards again is served from the caches, which stay within their sizes
+    deals = [parseurl.parse(url) for url in dealgen.urls(300, seed=8, annotate=1.0)]
+    args = handviewer.parse_args(['x', '-nesw', '-a'])
+    buildhtml.clearCaches()
+    first = [buildhtml.build(json.loads(json.dumps(deal)), args) for deal in deals[:20]]
+    missed = dict([(name, info['misses']) for name, info in buildhtml.cacheInfo().items()])
+    assert first == [buildhtml.build(json.loads(json.dumps(deal)), args) for deal in deals[:20]]
+    assert all(info['misses'] == missed[name] and info['hits'] for name, info in buildhtml.cacheInfo().items() if name != 'formatCard')
+    for deal in deals:
+        buildhtml.build(deal, args)
+    assert all(info['currsize'] <= info['maxsize'] for info in buildhtml.cacheInfo().values())
+
+def testWriteDeals():
+    # the same html as building every page, written a deal at a time: each deal is out before the next is read
+    deals = [parseurl.parse(url) for url in dealgen.urls(5, seed=11, annotate=1.0)]
+    args = handviewer.parse_args(['x', '-nesw', '-a', '-r', '2'])
+    expected = '<br />\n'.join(buildhtml.build(json.loads(json.dumps(deal)), args) for deal in deals)
+    f = io.StringIO()
+    written = []
+    def source():
+        for deal in deals:
+            written.append(len(f.getvalue()))
+            yield json.loads(json.dumps(deal))
+    assert buildhtml.writeDeals(source(), args, f) == 5
+    assert f.getvalue() == expected
+    assert written == sorted(set(written)) and written[1] > 0
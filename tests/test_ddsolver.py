@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of ddsolver: the solver against trying every card of small endings, and libdds (when it is installed) against the solver.
+"""
+import ddsolver
+import pytest
+import random
+
+# a suit a hand: West clubs, North spades, East hearts, South diamonds (suits at 13 * index in the order S H D C)
+suitEach = (ddsolver.suitMasks[3], ddsolver.suitMasks[0], ddsolver.suitMasks[1], ddsolver.suitMasks[2])
+
+
+def ending(seed: int, cards: int) -> tuple[int, int, int, int]:
+    deck = list(range(52))
+    random.Random(seed).shuffle(deck)
+    return tuple(sum(1 << card for card in deck[cards * seat:cards * seat + cards]) for seat in range(4))
+
+def cardsOf(mask: int) -> list[int]:
+    return [1 << bit for bit in range(52) if mask >> bit & 1]
+
+def everyCard(hands: tuple, trumpMask: int, leader: int) -> int:
+    # the tricks North-South take, trying every card each player can play
+    if not hands[leader]:
+        return 0
+    def play(hands: tuple, played: list) -> int:
+        seat = (leader + len(played)) & 3
+        if len(played) == 4:
+            ledMask = ddsolver.suitMasks[(played[0].bit_length() - 1) // 13]
+            first = max(range(4), key=lambda i: (bool(played[i] & trumpMask), bool(played[i] & ledMask), played[i]))
+            winner = (leader + first) & 3
+            return (winner & 1) + everyCard(hands, trumpMask, winner)
+        hand = hands[seat]
+        playable = hand & ddsolver.suitMasks[(played[0].bit_length() - 1) // 13] if played else 0
+        tricks = [play(hands[:seat] + (hand ^ card,) + hands[seat + 1:], played + [card]) for card in cardsOf(playable or hand)]
+        return max(tricks) if seat & 1 else min(tricks)
+    return play(hands, [])
+
+
+def testEndings():
+    for seed in range(20):
+        hands = ending(seed, 3)
+        for strain in ddsolver.strains:
+            solver = ddsolver.Solver(ddsolver.trumps[strain])
+            trumpMask = ddsolver.suitMasks[ddsolver.trumps[strain]] if strain != 'N' else 0
+            assert [solver.tricks(hands, leader) for leader in range(4)] == [everyCard(hands, trumpMask, leader) for leader in range(4)], (seed, strain)
+
+def testSolveStrain():
+    # each side takes every trick in its own suits and none in notrump, whoever leads
+    tricks = [ddsolver.solveStrain((suitEach, strain)) for strain in ddsolver.strains]
+    assert tricks[ddsolver.strains.index('S')] == {'West': 0, 'North': 13, 'East': 0, 'South': 13}
+    assert tricks[ddsolver.strains.index('C')] == {'West': 13, 'North': 0, 'East': 13, 'South': 0}
+    assert tricks[ddsolver.strains.index('N')] == {'West': 0, 'North': 0, 'East': 0, 'South': 0}
+
+def testNoLibdds(monkeypatch):
+    monkeypatch.setenv('HANDVIEWER_DDS', '')
+    ddsolver.library.cache_clear()
+    try:
+        assert ddsolver.library() is None and ddsolver.fastStrains(suitEach) is None
+    finally:
+        ddsolver.library.cache_clear()
+
+def testLibdds():
+    if ddsolver.library() is None:
+        pytest.skip('libdds is not installed')
+    assert ddsolver.fastStrains(suitEach) == [ddsolver.solveStrain((suitEach, strain)) for strain in ddsolver.strains]
+    # a full deal, against the python solver in the strain it solves quickest
+    hands = ending(1, 13)
+    assert ddsolver.fastStrains(hands)[ddsolver.strains.index('H')] == ddsolver.solveStrain((hands, 'H'))
+    # endings are left to the python solver
+    assert ddsolver.fastStrains(ending(1, 5)) is None
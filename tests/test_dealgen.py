@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of dealgen: the same seed gives the same boards on every commit (so benchmarks compare like with like),
+and every board is a legal deal with a legal auction and play.
+"""
+import bidding
+import dealgen
+import hashlib
+import parseurl
+import replay
+
+
+def testReproducible():
+    assert list(dealgen.urls(20, seed=4)) == list(dealgen.urls(20, seed=4))
+    assert list(dealgen.urls(20, seed=4)) != list(dealgen.urls(20, seed=5))
+    # the boards of the default seed; change this only with a change to the generator, which makes older benchmarks incomparable
+    assert hashlib.sha256(''.join(dealgen.urls(20, seed=0)).encode()).hexdigest() == '3736cd4239dffefc03d230a38d9f801cddb73bc465baa0eda71c98cf1dc61425'
+
+def testLegalBoards():
+    for n, url in enumerate(dealgen.urls(100, seed=16, annotate=0.5), 1):
+        deal = parseurl.parse(url, compact=True)
+        assert deal.boardNumber == (n - 1) % 32 + 1 and deal.dealer == dealgen.boardDealers[(n - 1) % 4]
+        masks = [seat.hand.mask for seat in deal.seats]
+        assert all(len(seat.hand) == 13 for seat in deal.seats) and masks[0] | masks[1] | masks[2] | masks[3] == (1 << 52) - 1
+        # these raise AssertionError on an illegal call or card
+        bidding.finalContract(deal.auction, deal.dealer)
+        played = replay.Replay(parseurl.parse(url))
+        assert len(deal.play or ()) == sum(len(trick.cards) for trick in played.tricks)
+
+def testOptions():
+    for url in dealgen.urls(20, seed=17, annotate=0, played=12):
+        tokens = parseurl.tokenize(url)
+        assert 'an' not in tokens and not any(call.endswith('!') for call in tokens['mb'])
+        assert len(tokens.get('pc', [])) in (0, 12)
+    assert all('an' in parseurl.tokenize(url) for url in dealgen.urls(5, seed=17, annotate=1.0))
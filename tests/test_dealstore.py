@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of dealstore: each query finds the same deals as looking at every deal in python, and a deal is stored once.
+"""
+import bidding
+import dealgen
+import dealstore
+import globals
+import parseurl
+import pytest
+
+
+@pytest.fixture
+def stored(tmp_path):
+    deals = [parseurl.parse(url) for url in dealgen.urls(200, seed=12)]
+    store = dealstore.DealStore(str(tmp_path / 'deals.db'))
+    assert store.addMany(deals) == len(deals)
+    yield store, deals
+    store.close()
+
+def seatOf(deal: dict, direction: str) -> dict:
+    return [seat for seat in deal['Seats'] if seat['Direction'] == direction][0]
+
+def declaringHcp(deal: dict) -> int | None:
+    contract, declarer = bidding.finalContract(deal['Auction'], deal['Dealer'])
+    if not declarer:
+        return None
+    partner = globals.directions[(globals.directions.index(declarer) + 2) % 4]
+    return globals.hcp(seatOf(deal, declarer)['Hand']) + globals.hcp(seatOf(deal, partner)['Hand'])
+
+
+def testQueries(stored):
+    store, deals = stored
+    contracts = [bidding.finalContract(deal['Auction'], deal['Dealer']) for deal in deals]
+    # '2N' finds 2N doubled or not; '2NX' only doubled
+    doubled = [c for c, d in contracts if c.endswith('X')][0]
+    assert list(store.query(contract=doubled)) == [deal for deal, (c, d) in zip(deals, contracts) if c == doubled]
+    undoubled = doubled.rstrip('X')
+    assert list(store.query(contract=undoubled)) == [deal for deal, (c, d) in zip(deals, contracts) if c.rstrip('X') == undoubled]
+    assert len(list(store.query(contract=undoubled))) > len(list(store.query(contract=doubled)))
+    assert list(store.query(board=5, dealer='North')) == [deal for deal in deals if deal['Board number'] == 5 and deal['Dealer'] == 'North']
+    assert list(store.query(minCombinedHcp=26)) == [deal for deal in deals if (declaringHcp(deal) or 0) >= 26]
+
+    player = deals[0]['Seats'][0]['Player']
+    declared = [deal for deal, (c, d) in zip(deals, contracts) if d and seatOf(deal, d).get('Player') == player]
+    assert list(store.query(declaredBy=player)) == declared
+    strong = [deal for deal in deals if any(seat.get('Player') == player and globals.hcp(seat['Hand']) >= 15 for seat in deal['Seats'])]
+    assert list(store.query(player=player, minHcp=15)) == strong
+    balanced = [deal for deal in deals if any(sorted(map(len, seat['Hand'].values()), reverse=True) == [4, 3, 3, 3] and globals.hcp(seat['Hand']) <= 5
+                                              for seat in deal['Seats'])]
+    assert list(store.query(shape='4-3-3-3', maxHcp=5)) == balanced
+    assert len(list(store.query(limit=7))) == 7
+
+def testStoredOnce(stored):
+    store, deals = stored
+    assert not store.add(deals[0])
+    assert store.addMany(deals) == 0
+    assert len(list(store.query())) == len(deals)
+
+def testIllegalAuctionStored(stored):
+    store, deals = stored
+    deal = dict(deals[0], Auction=['1N', '1C'])
+    assert store.add(deal)
+    assert list(store.query(board=deal['Board number'], contract='1N')) == []
+    assert deal in store.query(board=deal['Board number'])
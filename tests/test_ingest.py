@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of ingest: a Fetcher with an HttpTransport against a local http server, and boards that cannot be parsed.
+"""
+import argparse
+import asyncio
+import ingest
+import parseurl
+
+badLink = 'https://www.bridgebase.com/tools/handviewer.html?lin=md|zzz|'
+page = f'<a href="{parseurl.sampleUrl}">Board 12</a> <a href="{badLink}">Board 13</a>'
+
+
+class Site:
+    # a local server: /page is the page, /flaky and /busy fail (503, 429) before they answer, /moved redirects to /page
+    def __init__(self, failures: int = 1):
+        self.failures = failures
+        self.requests: list[str] = []
+        self.connections = 0
+        self.open = 0
+
+    def answer(self, path: str) -> tuple[int, str, str]:
+        # (status, extra headers, body)
+        if path in ('/flaky', '/busy') and self.requests.count(path) <= self.failures:
+            return (503 if path == '/flaky' else 429), '', ''
+        if path == '/moved':
+            return 302, 'Location: /page\r\n', ''
+        if path in ('/page', '/flaky', '/busy'):
+            return 200, 'Content-Type: text/html; charset=utf-8\r\n', page
+        return 404, '', ''
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.open += 1
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                path = head.decode('latin-1').split(' ')[1]
+                self.requests.append(path)
+                status, headers, body = self.answer(path)
+                body = body.encode('utf-8')
+                writer.write(f'HTTP/1.1 {status} X\r\n{headers}Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            self.open -= 1
+
+def fetch(site: Site, paths: list[str], runs: int = 1, **options) -> tuple[dict, ingest.Fetcher]:
+    # fetch the paths from site, one at a time, with a new Fetcher each run; returns the pages by path and the last fetcher
+    async def main():
+        listening = await asyncio.start_server(site.handle, '127.0.0.1', 0)
+        base = f'http://127.0.0.1:{listening.sockets[0].getsockname()[1]}'
+        try:
+            for run in range(runs):
+                fetcher = ingest.Fetcher(ingest.HttpTransport(timeout=5), **dict([('limit', 1), ('backoff', 0)] + list(options.items())))
+                try:
+                    pages = await fetcher.fetchAll(base + path for path in paths)
+                finally:
+                    await fetcher.close()
+            # let the server see the connections close
+            while site.open:
+                await asyncio.sleep(0.01)
+        finally:
+            listening.close()
+        return dict([(url[len(base):], text) for url, text in pages.items()]), fetcher
+    return asyncio.run(main())
+
+
+def testRetries():
+    site = Site()
+    pages, fetcher = fetch(site, ['/flaky', '/busy'])
+    assert list(pages) == ['/flaky', '/busy'] and fetcher.retried == 2
+    assert site.requests == ['/flaky', '/flaky', '/busy', '/busy']
+
+def testRetriesRunOut(capsys):
+    site = Site(failures=5)
+    pages, fetcher = fetch(site, ['/flaky', '/page'], retries=2)
+    assert list(pages) == ['/page']
+    assert site.requests.count('/flaky') == 3
+    assert 'HTTP 503' in capsys.readouterr().err
+
+def testNotFoundNotRetried():
+    site = Site()
+    pages, fetcher = fetch(site, ['/missing'])
+    assert pages == {} and site.requests == ['/missing']
+
+def testRedirect():
+    site = Site()
+    pages, fetcher = fetch(site, ['/moved'])
+    assert pages['/moved'] == page
+    assert site.requests == ['/moved', '/page']
+
+def testKeepAlive():
+    site = Site()
+    pages, fetcher = fetch(site, ['/page', '/moved', '/flaky'])
+    assert len(pages) == 3 and len(site.requests) == 5
+    assert site.connections == fetcher.transport.opened == 1
+
+def testCache(tmp_path):
+    site = Site()
+    pages, fetcher = fetch(site, ['/page'], runs=2, cache=str(tmp_path))
+    assert pages == {'/page': page} and site.requests == ['/page']
+    assert fetcher.fetched == 0
+
+def testBadBoardLeftOut(capsys):
+    args = argparse.Namespace(north=True, east=True, south=True, west=True, auction=True, rotate=0)
+    rendered = asyncio.run(ingest.ingest(['x'], args, ingest.MappingTransport({ 'x': page })))
+    assert [link for link, html in rendered] == [parseurl.sampleUrl]
+    assert badLink in capsys.readouterr().err
+
+def testMain(tmp_path, capsys):
+    # the link and the html of the board that could be parsed are written; the bad board is reported
+    site = Site()
+    async def main():
+        listening = await asyncio.start_server(site.handle, '127.0.0.1', 0)
+        (tmp_path / 'urls.txt').write_text(f'http://127.0.0.1:{listening.sockets[0].getsockname()[1]}/page\n')
+        try:
+            await ingest.main(ingest.parse_args([str(tmp_path / 'urls.txt'), '-o', str(tmp_path / 'out'), '-nesw']))
+            while site.open:
+                await asyncio.sleep(0.01)
+        finally:
+            listening.close()
+    asyncio.run(main())
+    assert (tmp_path / 'out.txt').read_text().split() == [parseurl.sampleUrl]
+    output = capsys.readouterr()
+    assert '1 boards written' in output.out and badLink in output.err
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of instrument: a run with --instrument (or $HANDVIEWER_INSTRUMENT) appends its stages and counters as a json line,
+counting the work of worker processes too, and a run without it does not instrument anything.
+Each run is a separate process, since enable replaces module functions for the rest of the process.
+"""
+import dealgen
+import json
+import os
+import subprocess
+import sys
+
+source = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'handviewer')
+
+
+def run(tmp_path, argv: list[str], environment: dict = {}) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env.pop('HANDVIEWER_INSTRUMENT', None)
+    env.update(environment)
+    return subprocess.run([sys.executable, os.path.join(source, 'handviewer.py')] + argv, cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+
+def lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def testBatch(tmp_path):
+    (tmp_path / 'deals.txt').write_text(''.join(url + '\n' for url in dealgen.urls(6, seed=14)) + 'not a deal\n')
+    for jobs in ('1', '2'):
+        run(tmp_path, ['deals.txt', '-b', '-nesw', '-a', '-o', 'out', '-j', jobs, '--instrument', 'timings.jsonl'])
+    for line in lines(tmp_path / 'timings.jsonl'):
+        assert line['counters'] == {'records rendered': 6, 'records failed': 1}
+        assert line['stages']['tokenize']['calls'] == 6 and line['stages']['write']['calls'] == 6
+        assert all(line['stages'][stage]['seconds'] >= 0 for stage in ('extract hands', 'format hands', 'format auction'))
+        assert 'formatCall' in line['caches']
+
+def testEnvironment(tmp_path):
+    url = next(dealgen.urls(1, seed=15))
+    run(tmp_path, [url, '-nesw', '-o', 'single'], {'HANDVIEWER_INSTRUMENT': 'timings.jsonl'})
+    run(tmp_path, [url, '-nesw', '-o', 'single'])
+    [line] = lines(tmp_path / 'timings.jsonl')
+    assert line['stages']['tokenize']['calls'] == 1 and line['stages']['write']['calls'] >= 1
+
+def testNotEnabled():
+    # functions are only replaced by enable
+    import buildhtml
+    import instrument
+    import parseurl
+    assert not instrument.enabled and instrument.take() is None
+    assert not hasattr(parseurl.tokenize, 'untimed') and not hasattr(buildhtml.formatHand, 'untimed')
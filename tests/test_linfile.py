@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of linfile: where boards start, and which players each board gets.
+"""
+import io
+import linfile
+import parseurl
+
+hands = '3SAK5HKT43DK7CAK62,SJ962H9DQ984CT754,SQ73HAQJ52DAJ5CJ9,'
+
+
+def boards(text: str) -> list:
+    return list(linfile.readBoards(io.StringIO(text)))
+
+def testBoardsWithoutQx():
+    # BBO records name each board's players before its hands, with no qx tag
+    found = boards(f'pn|A,B,C,D|st||md|{hands}|ah|Board 1|mb|P|pg||\n'
+                   f'pn|E,F,G,H|st||md|{hands}|ah|Board 2|mb|1C|pg||\n')
+    assert [board['pn'] for board in found] == [['A,B,C,D'], ['E,F,G,H']]
+    assert [board['ah'] for board in found] == [['Board 1'], ['Board 2']]
+    assert [board['mb'] for board in found] == [['P'], ['1C']]
+
+def testUrlPerLine():
+    first = parseurl.sampleUrl
+    second = first.replace('PSMartin', 'Someone').replace('Board%2012', 'Board%2013')
+    deals = list(linfile.readDeals(io.StringIO(first + '\n' + second + '\n')))
+    assert [deal['Board number'] for deal in deals] == [12, 13]
+    assert [parseurl.parse(first)['Seats'], parseurl.parse(second)['Seats']] == [deal['Seats'] for deal in deals]
+
+def testQxBoardsShareSessionPlayers():
+    found = boards(f'pn|A,B,C,D|st||\nqx|o1|md|{hands}|mb|P|pg||\nqx|o2|md|{hands}|mb|1C|pg||\n')
+    assert [board['pn'] for board in found] == [['A,B,C,D'], ['A,B,C,D']]
+
+def testPairsSpreadOverLines():
+    found = boards(f'qx|o1|md|{hands}|mb|P|m\nb|1N|pg||\n')
+    assert found[0]['mb'] == ['P', '1N']
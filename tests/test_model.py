@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of model: deal dictionaries through Deal and back unchanged, hand masks, and the 13 byte packing of all four hands.
+"""
+import dealgen
+import globals
+import model
+import parseurl
+
+
+def testRoundTrip():
+    # the sample, and generated boards with and without the play
+    deals = [parseurl.parse(parseurl.sampleUrl)] + [parseurl.parse(url) for url in dealgen.urls(30, seed=5, played=12)]
+    for deal in deals:
+        assert model.Deal.fromDict(deal).toDict() == deal
+    assert parseurl.parse(parseurl.sampleUrl, compact=True).toDict() == deals[0]
+
+def testMissingKeys():
+    # a seat with no player or hand, and a deal with no board number or auction, come back without them
+    deal = {'Dealer': 'North', 'Seats': [{'Direction': 'North'}, {'Player': 'A', 'Direction': 'South', 'Hand': globals.buildHand(['AK', '', 'Q2', 'JT'])}]}
+    assert model.Deal.fromDict(deal).toDict() == deal
+
+def testHand():
+    hand = model.Hand.fromDict(globals.buildHand(['AJ10x', 'K', '', 'xx']))
+    assert hand.mask == (1 << 12 | 1 << 9 | 1 << 8) | 1 << (13 + 11)
+    assert hand.spots == (1, 0, 0, 2) and len(hand) == 7
+    assert hand.toDict() == globals.buildHand(['AJTx', 'K', '', 'xx'])
+    assert model.Hand.fromDict(globals.buildHand(['A', '', '', ''])) == model.Hand(1 << 12)
+
+def testPackCards():
+    for url in dealgen.urls(30, seed=6):
+        deal = parseurl.parse(url, compact=True)
+        packed = deal.packCards()
+        assert len(packed) == 13
+        assert model.unpackCards(packed) == [deal.seat(direction).hand for direction in globals.directions]
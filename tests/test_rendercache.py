@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of rendercache: the same board in another spelling of its url is a hit, and the cache stays within its size.
+"""
+import buildhtml
+import dealgen
+import handviewer
+import os
+import rendercache
+import time
+
+
+def entries(directory) -> list[str]:
+    return sorted(name for root, dirs, files in os.walk(directory) for name in files if name.endswith(('.json', '.html')))
+
+
+def testSameBoardOtherUrl(tmp_path):
+    cache = rendercache.Cache(str(tmp_path))
+    url = next(dealgen.urls(1, seed=9))
+    args = handviewer.parse_args(['x', '-nesw'])
+    saved, html = cache.render(url, args, buildhtml.build)
+    # with the lin's separators url encoded, and another parameter
+    assert cache.render(url.replace('|', '%7C').replace(',', '%2C') + '&v3b=web', args, buildhtml.build) == (saved, html)
+    assert (cache.hits, cache.misses, cache.writes) == (2, 2, 2)
+    # other options need other html, but not another parse
+    cache.render(url, handviewer.parse_args(['x', '-nesw', '-r', '1']), buildhtml.build)
+    assert (cache.hits, cache.writes) == (3, 3)
+
+def testEviction(tmp_path):
+    # the least recently read entries go first, and the running total matches what is left
+    urls = list(dealgen.urls(12, seed=10))
+    args = handviewer.parse_args(['x', '-nesw', '-a'])
+    probe = rendercache.Cache(str(tmp_path / 'probe'))
+    probe.render(urls[0], args, buildhtml.build)
+    boardBytes = probe.readTotal()
+    cache = rendercache.Cache(str(tmp_path / 'cache'), maxBytes=boardBytes * 5)
+    for i, url in enumerate(urls):
+        cache.render(url, args, buildhtml.build)
+        if i:
+            # the first board stays in use
+            time.sleep(0.01)
+            cache.render(urls[0], args, buildhtml.build)
+    total = sum(os.path.getsize(os.path.join(root, name)) for root, dirs, files in os.walk(tmp_path / 'cache')
+                for name in files if name.endswith(('.json', '.html')))
+    assert total <= cache.maxBytes and cache.readTotal() == total
+    assert len(entries(tmp_path / 'cache')) < 2 * len(urls)
+    assert set(entries(tmp_path / 'probe')) <= set(entries(tmp_path / 'cache'))
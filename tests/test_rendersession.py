@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of rendersession: every view of a session is the html buildhtml.build makes of the deal, and the deal is left as it was.
+"""
+import buildhtml
+import dealgen
+import handviewer
+import json
+import parseurl
+import rendersession
+
+# a three card ending, so the tricks table is quick to solve
+ending = {'Board number': 3, 'Dealer': 'South', 'Vulnerability': 'EW', 'Auction': ['1N', 'P', '3N', 'P', 'P', 'P'],
+          'Seats': [{'Player': 'A', 'Direction': 'South', 'Hand': {'Spades': 'AK', 'Hearts': '', 'Diamonds': '2', 'Clubs': ''}},
+                    {'Player': 'B', 'Direction': 'West', 'Hand': {'Spades': 'Q', 'Hearts': 'A', 'Diamonds': '', 'Clubs': '2'}},
+                    {'Player': 'C', 'Direction': 'North', 'Hand': {'Spades': '2', 'Hearts': '', 'Diamonds': 'AK', 'Clubs': ''}},
+                    {'Player': 'D', 'Direction': 'East', 'Hand': {'Spades': '', 'Hearts': 'K', 'Diamonds': 'Q', 'Clubs': 'A'}}]}
+
+
+def views(extra: list[str]) -> list[list[str]]:
+    # every set of seats, with and without the auction, in every rotation
+    return [['x'] + (['-' + flags] if flags else []) + ['-r', str(rotate)] + extra
+            for bits in range(16) for auction in ('', 'a') for rotate in range(4)
+            for flags in [''.join(letter for i, letter in enumerate('nesw') if bits >> i & 1) + auction]]
+
+def check(deal: dict, extra: list[str] = []):
+    before = json.dumps(deal)
+    session = rendersession.RenderSession(deal)
+    for argv in views(extra):
+        args = handviewer.parse_args(argv)
+        assert session.build(args) == buildhtml.build(json.loads(before), args), argv
+    assert json.dumps(deal) == before
+
+
+def testSameAsBuild():
+    check(parseurl.parse(parseurl.sampleUrl))
+    for url in dealgen.urls(3, seed=13, annotate=1.0, played=24):
+        check(parseurl.parse(url), ['-p'])
+
+def testTricks():
+    check(ending, ['-t'])
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of replay: tricks are won by the right card, the hands and tricks taken follow the play, and an illegal card is refused.
+"""
+import dealgen
+import parseurl
+import pytest
+import replay
+
+# a three card ending: West leads to 3N by South
+ending = {'Board number': 3, 'Dealer': 'South', 'Vulnerability': 'EW', 'Auction': ['1N', 'P', '3N', 'P', 'P', 'P'],
+          'Seats': [{'Direction': 'South', 'Hand': {'Spades': 'AK', 'Hearts': '', 'Diamonds': '2', 'Clubs': ''}},
+                    {'Direction': 'West', 'Hand': {'Spades': 'Q', 'Hearts': 'A', 'Diamonds': '', 'Clubs': '2'}},
+                    {'Direction': 'North', 'Hand': {'Spades': '2', 'Hearts': '', 'Diamonds': 'AK', 'Clubs': ''}},
+                    {'Direction': 'East', 'Hand': {'Spades': '', 'Hearts': 'K', 'Diamonds': 'Q', 'Clubs': 'A'}}]}
+
+
+def testTricks():
+    played = replay.Replay(dict(ending, Play=['HA', 'S2', 'HK', 'D2', 'SQ', 'DA', 'DQ', 'SK', 'SA', 'C2', 'DK']))
+    assert (played.contract, played.declarer) == ('3N', 'South')
+    assert [(trick.leader, trick.winner) for trick in played.tricks] == [('West', 'West'), ('West', 'South'), ('South', None)]
+    assert played.tricks[1].players() == ['West', 'North', 'East', 'South']
+    assert played.taken(0) == {'NS': 0, 'EW': 0} and played.taken(2) == {'NS': 1, 'EW': 1} and played.taken(3) == played.taken(2)
+    hands = played.hands(2)
+    assert hands['East'].toDict() == {'Spades': '', 'Hearts': '', 'Diamonds': '', 'Clubs': 'A'} and len(hands['South']) == 1 and len(played.hands(0)['West']) == 3
+    assert played.result() is None
+    assert replay.Replay(dict(ending, Play=['HA'], Claim=9)).result() == 9
+
+def testTrumps():
+    # North ruffs West's ace
+    played = replay.Replay(dict(ending, Auction=['1S', 'P', 'P', 'P'], Play=['HA', 'S2', 'HK', 'D2']))
+    assert played.tricks[0].winner == 'North' and played.taken(1) == {'NS': 1, 'EW': 0}
+
+def testWholeDeals():
+    for url in dealgen.urls(20, seed=19, played=52):
+        deal = parseurl.parse(url)
+        played = replay.Replay(deal)
+        assert len(played.tricks) == 13 and all(len(hand) == 0 for hand in played.hands(13).values())
+        assert all(len(hand) == 13 - n for n in range(14) for hand in played.hands(n).values())
+        taken = played.taken(13)
+        assert taken['NS'] + taken['EW'] == 13
+        assert played.result() == taken['NS' if played.declarer in ('North', 'South') else 'EW']
+
+def testIllegal():
+    with pytest.raises(AssertionError, match='does not hold'):
+        replay.Replay(dict(ending, Play=['HK']))
+    with pytest.raises(AssertionError, match='must follow suit'):
+        replay.Replay(dict(ending, Play=['HA', 'S2', 'DQ']))
+    with pytest.raises(AssertionError, match='passed out'):
+        replay.Replay(dict(ending, Auction=['P', 'P', 'P', 'P'], Play=['HA']))
+    with pytest.raises(AssertionError, match='is not a card'):
+        replay.Replay(dict(ending, Play=['H1']))
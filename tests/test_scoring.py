@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of bidding and scoring: contracts and declarers of auctions, the scoring table, par, and the comparison of travellers.
+"""
+import bidding
+import pytest
+import scoring
+
+
+def testContracts():
+    assert bidding.finalContract(['1N', 'P', '3N', 'D', 'P', 'P', 'P'], 'North') == ('3NX', 'North')
+    # the first of the side to name the strain declares
+    assert bidding.finalContract(['1H', 'P', '2C', 'P', '4H', 'D', 'R', 'P', 'P', 'P'], 'West') == ('4HXX', 'West')
+    assert bidding.finalContract(['P', '1S', 'P', '2S', 'P', 'P', 'P'], 'South') == ('2S', 'West')
+    assert bidding.finalContract(['P', 'P', 'P', 'P'], 'East') == ('P', None)
+    contract = bidding.analyze(['1C', 'P'], None)
+    assert (contract.level, contract.strain, contract.declarer, contract.complete) == (1, 'C', 'West', False)
+    assert bidding.analyze(['P', 'P', 'P', 'P'], 'East').complete and not bidding.analyze(['P', 'P', 'P'], 'East').complete
+
+@pytest.mark.parametrize('calls', [['1N', '1C'], ['D'], ['1N', 'D', 'D'], ['1N', 'P', 'R'], ['1N', 'P', 'P', 'P', 'P'], ['8N'], ['1Z']])
+def testIllegalCalls(calls):
+    with pytest.raises(AssertionError, match='Call'):
+        bidding.analyze(calls, 'North')
+
+@pytest.mark.parametrize('contract, vulnerable, tricks, score', [
+    ('4H', True, 11, 650), ('3N', False, 9, 400), ('2S', False, 8, 110), ('5D', True, 11, 600), ('1C', False, 13, 190),
+    ('6S', False, 12, 980), ('7N', True, 13, 2220), ('1NX', False, 7, 180), ('2HX', False, 8, 470), ('1NXX', False, 7, 560),
+    ('3NX', True, 10, 950), ('4S', True, 8, -200), ('3NX', False, 7, -300), ('4SX', False, 6, -800), ('4SX', True, 7, -800),
+    ('4SXX', False, 9, -200)])
+def testContractScore(contract, vulnerable, tricks, score):
+    assert scoring.contractScore(int(contract[0]), contract[1], contract[2:], vulnerable, tricks) == score
+
+def testImpsAndMatchpoints():
+    assert [scoring.imps(d) for d in (10, 20, -50, 450, 4000, 5000)] == [0, 1, -2, 10, 24, 24]
+    assert scoring.matchpoints([100, 100, 50, 620]) == [1.5, 1.5, 0, 3]
+
+def table(ns: dict[str, int], ew: dict[str, int]) -> dict[str, dict[str, int]]:
+    # both players of a side take the same tricks; strains not given take 3
+    return dict([(direction, dict([(strain, tricks.get(strain, 3)) for strain in 'CDHSN']))
+                 for direction, tricks in (('North', ns), ('South', ns), ('East', ew), ('West', ew))])
+
+def testPar():
+    assert scoring.par(table({'S': 10}, {})) == {'Score': 420, 'Contracts': ['4S-NS']}
+    assert scoring.par(table({'S': 10}, {}), 'NS') == {'Score': 620, 'Contracts': ['4S-NS']}
+    # 4S outranks 4H, so East-West save in 5H doubled, two down
+    assert scoring.par(table({'S': 10}, {'H': 9}), 'NS') == {'Score': 300, 'Contracts': ['5HX-EW']}
+    assert scoring.par(table({}, {}))['Score'] == 0
+
+def testSession(capsys):
+    deal = {'Board number': 1, 'Dealer': 'North', 'Vulnerability': 'None', 'Auction': ['1H', 'P', '4H', 'P', 'P', 'P'], 'Seats': []}
+    deals = [dict(deal, Claim=10), dict(deal, Claim=9), dict(deal, Claim=10), dict(deal, Auction=['1H', '1C']),
+             dict(deal, **{'Board number': 2, 'Claim': 11})]
+    scored = scoring.scoreSession(deals)
+    assert [deal['Result']['Score'] for deal in scored if 'Result' in deal and deal['Result']['Score'] is not None] == [420, -50, 420, 450]
+    assert [deal['Result']['Matchpoints'] for deal in scored[:3]] == [1.5, 0, 1.5]
+    assert [deal['Result']['Percentage'] for deal in scored[:3]] == [75.0, 0.0, 75.0]
+    assert [deal['Result']['IMPs'] for deal in scored[:3]] == [5.0, -10.0, 5.0]
+    assert scored[4]['Result']['Percentage'] == 50.0 and scored[4]['Result']['Declarer'] == 'North'
+    assert 'Board 1' in capsys.readouterr().err
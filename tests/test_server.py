@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of server: requests on a kept-open connection, chunked bodies, and /health answered while a page renders.
+"""
+import asyncio
+import json
+import parseurl
+import server
+import time
+
+
+async def exchange(port: int, *requests: bytes) -> list[tuple[int, bytes]]:
+    # send each request on one connection and read (status, body) of each response
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    responses = []
+    for request in requests:
+        writer.write(request)
+        head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        headers = dict([line.lower().split(': ', 1) for line in head[1:] if line])
+        responses.append((int(head[0].split()[1]), await reader.readexactly(int(headers['content-length']))))
+    writer.close()
+    return responses
+
+def serve(test, **options):
+    # run test(port) against a Server on a free port
+    async def main():
+        handler = server.Server(**options)
+        listening = await asyncio.start_server(handler.handle, '127.0.0.1', 0)
+        try:
+            return await test(listening.sockets[0].getsockname()[1])
+        finally:
+            listening.close()
+            handler.executor.shutdown()
+    return asyncio.run(main())
+
+def post(body: bytes, headers: str) -> bytes:
+    return f'POST /render HTTP/1.1\r\nHost: x\r\n{headers}\r\n'.encode('latin-1') + body
+
+
+def testKeepAlive():
+    get = b'GET /health HTTP/1.1\r\nHost: x\r\n\r\n'
+    responses = serve(lambda port: exchange(port, get, get))
+    assert [status for status, body in responses] == [200, 200]
+    assert json.loads(responses[1][1])['served'] == 1
+
+def testChunkedBody():
+    body = json.dumps({'url': parseurl.sampleUrl}).encode('utf-8')
+    chunked = b''.join(b'%x\r\n%s\r\n' % (len(part), part) for part in [body[:10], body[10:]]) + b'0\r\n\r\n'
+    sized = post(body, f'Content-Length: {len(body)}\r\n')
+    [(status, page), (sizedStatus, sizedPage)] = serve(lambda port: exchange(port, post(chunked, 'Transfer-Encoding: chunked\r\n'), sized))
+    assert status == sizedStatus == 200
+    assert page == sizedPage
+
+def testUnreadableBodies():
+    assert serve(lambda port: exchange(port, post(b'', 'Transfer-Encoding: gzip\r\n')))[0][0] == 501
+    assert serve(lambda port: exchange(port, post(b'', '')))[0][0] == 411
+    assert serve(lambda port: exchange(port, post(b'', f'Content-Length: {server.maxBody + 1}\r\n')))[0][0] == 413
+
+def testHealthWhileRendering(monkeypatch):
+    def slowRender(request):
+        time.sleep(0.5)
+        return 'page'
+    monkeypatch.setattr(server, 'render', slowRender)
+
+    async def test(port):
+        start = time.monotonic()
+        rendering = asyncio.create_task(exchange(port, b'GET /render?url=x HTTP/1.1\r\nHost: x\r\n\r\n'))
+        await asyncio.sleep(0.05)
+        [(status, body)] = await exchange(port, b'GET /health HTTP/1.1\r\nHost: x\r\n\r\n')
+        answered = time.monotonic() - start
+        return status, answered, await rendering
+    status, answered, [(renderStatus, page)] = serve(test)
+    assert status == 200 and answered < 0.4
+    assert renderStatus == 200 and page == b'page'
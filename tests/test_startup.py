@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of handviewer.py's startup: --help and a single url load only the modules they use, and globals' constants are frozen.
+"""
+import globals
+import os
+import parseurl
+import pytest
+import subprocess
+import sys
+
+source = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'handviewer')
+# modules only some runs need
+optional = {'batch', 'dealstore', 'inputdeal', 'instrument', 'rendercache', 'ddsolver', 'replay', 'rendersession',
+            'multiprocessing', 'sqlite3', 'asyncio', 'numpy', 'typing'}
+
+
+def loaded(tmp_path, argv: list[str]) -> set[str]:
+    # the modules a run of handviewer.py with argv imports, from its -X importtime report
+    run = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(source, 'handviewer.py')] + argv,
+                         cwd=tmp_path, capture_output=True, text=True, check=True)
+    return {line.split('|')[-1].strip() for line in run.stderr.splitlines() if line.startswith('import time:')}
+
+
+def testHelp(tmp_path):
+    modules = loaded(tmp_path, ['--help'])
+    assert not modules & (optional | {'buildhtml', 'parseurl', 'model', 'archive'})
+
+def testOneUrl(tmp_path):
+    modules = loaded(tmp_path, [parseurl.sampleUrl, '-nesw', '-a', '-o', str(tmp_path / 'out')])
+    assert {'buildhtml', 'parseurl'} <= modules
+    assert not modules & optional
+    assert (tmp_path / 'out.html').exists()
+
+def testFrozenConstants():
+    assert isinstance(globals.suits, tuple) and isinstance(globals.directions, tuple)
+    with pytest.raises(TypeError):
+        globals.seats['N'] = 'Nobody'
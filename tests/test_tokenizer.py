@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of parseurl's tokenizer: one pass over the lin string finds what the regular expression scans of each field found.
+"""
+import dealgen
+import parseurl
+import re
+
+
+def testTokenize():
+    tokens = parseurl.tokenize('https://www.bridgebase.com/tools/handviewer.html?lin=st||pn|A,B|mb|1C!|an|short|mb|P|')
+    assert tokens == {'st': [''], 'pn': ['A,B'], 'mb': ['1C!', 'P'], 'an': ['short']}
+    assert list(parseurl.tokenizePairs('md|1S2,,,|sv|o|')) == [('md', '1S2,,,'), ('sv', 'o')]
+
+def testSameAsScans():
+    # the sample, and generated boards with annotated calls and the card play
+    urls = [parseurl.sampleUrl] + list(dealgen.urls(50, seed=3, annotate=0.5, played=20))
+    for url in urls:
+        tokens = parseurl.tokenize(url)
+        assert parseurl.boardNumberFromTokens(tokens) == parseurl.extractBoardNumber(url), url
+        # a fourth hand the md tag leaves out is filled in (generated boards leave it out as lin files do)
+        assert parseurl.handsFromTokens(tokens) == parseurl.completeHands(parseurl.extractHands(url)), url
+        assert parseurl.playersFromTokens(tokens) == parseurl.extractPlayers(url), url
+        # the scan only read upper case calls; generated boards pass as lin files do ('p')
+        assert parseurl.auctionFromTokens(tokens) == parseurl.extractAuction(re.sub(r'\|mb\|([^|]*)', lambda call: '|mb|' + call.group(1).upper(), url)), url
+
+def testLinSpellings():
+    # lower case calls and cards, and a missing fourth hand, as lin files write them
+    url = parseurl.sampleUrl
+    deal = parseurl.parse(url)
+    tokens = parseurl.tokenize(url)
+    hands = tokens['md'][0].split(',')
+    lin = f"pn|{tokens['pn'][0]}|md|{','.join(hands[:3])},|ah|Board 12|" + ''.join(f'mb|{call.lower()}|' for call in tokens['mb'])
+    assert parseurl.parse(lin) == dict([(key, value) for key, value in deal.items() if key not in ('Play', 'Claim', 'Vulnerability')])
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of watcher: only new or changed boards are rendered again, and boards past the end of a shortened file are removed.
+"""
+import json
+import os
+import parseurl
+import watcher
+
+
+def urls(count: int) -> list[str]:
+    return [parseurl.sampleUrl.replace('Board%2012', f'Board%20{n}') for n in range(1, count + 1)]
+
+def save(directory, lines: list[str]):
+    (directory / 'session.txt').write_text(''.join(line + '\n' for line in lines))
+
+def start(directory) -> watcher.Watcher:
+    return watcher.Watcher(str(directory), str(directory / 'html'), watcher.parse_args([str(directory), '-nesw']))
+
+def pages(directory) -> list[str]:
+    return sorted(name for name in os.listdir(directory / 'html') if name.endswith('.html'))
+
+
+def testOnlyChangedBoardsRendered(tmp_path):
+    lines = urls(3)
+    save(tmp_path, lines)
+    assert start(tmp_path).update(['session.txt']) == 3
+    assert pages(tmp_path) == ['session-txt-1.html', 'session-txt-2.html', 'session-txt-3.html']
+
+    lines[1] = lines[1].replace('PSMartin', 'Someone')
+    save(tmp_path, lines + urls(4)[3:])
+    # a new watcher carries on from rendered.json
+    assert start(tmp_path).update(['session.txt']) == 2
+    assert 'Someone' in (tmp_path / 'html' / 'session-txt-2.html').read_text(encoding='utf-8')
+
+def testShortenedFile(tmp_path):
+    save(tmp_path, urls(3))
+    watching = start(tmp_path)
+    watching.update(['session.txt'])
+    save(tmp_path, urls(1))
+    assert watching.update(['session.txt']) == 0
+    assert pages(tmp_path) == ['session-txt-1.html']
+    assert not (tmp_path / 'html' / 'session-txt-2.json').exists()
+    assert list(json.loads((tmp_path / 'html' / watcher.stateName).read_text())) == ['session-txt-1']
+
+def testUnreadableBoardTriedAgain(tmp_path):
+    save(tmp_path, ['http://not a deal'])
+    watching = start(tmp_path)
+    assert watching.update(['session.txt']) == 0 and watching.failed == 1
+    save(tmp_path, urls(1))
+    assert watching.update(['session.txt']) == 1
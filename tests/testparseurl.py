@@ -9,6 +9,6 @@ import sys
 
 def main(url: str):
     # build a dictionary from the specfied url and print it
-    print(parseurl.main(url))
+    print(parseurl.parse(url))
     
 main(sys.argv[1])
\ No newline at end of file